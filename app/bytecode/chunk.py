@@ -0,0 +1,108 @@
+from bisect import bisect_right
+from typing import Any, List
+
+OpNames = (
+    'GET_LOCAL', 'CONSTANT', 'STORE_LOCAL', 'SET_LOCAL', 'POP', 'GET_GLOBAL', 'GET_CELL', 'GET_UPVALUE',
+    'POP_JUMP_IF_FALSE', 'LOOP', 'ADD', 'LESS', 'SUBTRACT', 'MULTIPLY', 'GREATER', 'LESS_EQUAL',
+    'GREATER_EQUAL', 'DIVIDE', 'EQUAL', 'NOT_EQUAL',
+    'CALL', 'RETURN', 'GET_PROPERTY', 'SET_PROPERTY', 'EXPECT_INSTANCE', 'GET_SUPER',
+    'SET_GLOBAL', 'SET_CELL', 'SET_UPVALUE', 'JUMP_IF_FALSE', 'JUMP_IF_TRUE', 'JUMP', 'NOT', 'NEGATE',
+    'NIL', 'TRUE', 'FALSE', 'PRINT', 'STORE_BOXED', 'NEW_CELL', 'DEFINE_GLOBAL', 'CLOSURE', 'CLASS',
+)
+
+# Opcodes are small ints, like token kinds; an instruction is its opcode
+# followed by its operands, all in the same list. They are numbered in
+# groups, most frequent first, and the VM dispatches on the group first:
+# variables, then control flow and operators, then calls and properties,
+# then everything else.
+(
+    GET_LOCAL, CONSTANT, STORE_LOCAL, SET_LOCAL, POP, GET_GLOBAL, GET_CELL, GET_UPVALUE,
+    POP_JUMP_IF_FALSE, LOOP, ADD, LESS, SUBTRACT, MULTIPLY, GREATER, LESS_EQUAL,
+    GREATER_EQUAL, DIVIDE, EQUAL, NOT_EQUAL,
+    CALL, RETURN, GET_PROPERTY, SET_PROPERTY, EXPECT_INSTANCE, GET_SUPER,
+    SET_GLOBAL, SET_CELL, SET_UPVALUE, JUMP_IF_FALSE, JUMP_IF_TRUE, JUMP, NOT, NEGATE,
+    NIL, TRUE, FALSE, PRINT, STORE_BOXED, NEW_CELL, DEFINE_GLOBAL, CLOSURE, CLASS,
+) = range(len(OpNames))
+
+# How many operands each opcode takes; every other opcode takes none.
+OPERANDS = {
+    CONSTANT: 1, GET_LOCAL: 1, SET_LOCAL: 1, STORE_LOCAL: 1, STORE_BOXED: 1,
+    NEW_CELL: 1, GET_CELL: 1, SET_CELL: 1, GET_UPVALUE: 1, SET_UPVALUE: 1,
+    GET_GLOBAL: 1, SET_GLOBAL: 1, DEFINE_GLOBAL: 1,
+    GET_PROPERTY: 1, SET_PROPERTY: 1, GET_SUPER: 1,
+    JUMP: 1, JUMP_IF_FALSE: 1, JUMP_IF_TRUE: 1, POP_JUMP_IF_FALSE: 1, LOOP: 1,
+    CALL: 1, CLOSURE: 1, CLASS: 1,
+}
+
+
+class Chunk:
+    """
+    A sequence of instructions with its constant pool. Lines are kept as a
+    run-length table: `lines` holds the offset where each run of
+    instructions from the same source line starts, and `line_numbers`
+    that line.
+    """
+    __slots__ = ('code', 'constants', 'lines', 'line_numbers', 'indices')
+
+    def __init__(self):
+        self.code: List[int] = []
+        self.constants: List[Any] = []
+        self.lines: List[int] = []
+        self.line_numbers: List[int] = []
+        self.indices = {}
+
+    def write(self, op: int, line: int, *operands: int) -> int:
+        """Appends an instruction; returns its offset."""
+        offset = len(self.code)
+        if not self.line_numbers or self.line_numbers[-1] != line:
+            self.lines.append(offset)
+            self.line_numbers.append(line)
+        self.code.append(op)
+        self.code.extend(operands)
+        return offset
+
+    def add_constant(self, value: Any) -> int:
+        # Equal numbers and strings share a slot, but 1.0 must not be
+        # mistaken for `true`, nor 0.0 for -0.0.
+        key = (type(value), value, str(value)) if isinstance(value, (float, str)) else id(value)
+        index = self.indices.get(key)
+        if index is None:
+            index = self.indices[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def line(self, offset: int) -> int:
+        return self.line_numbers[bisect_right(self.lines, offset) - 1]
+
+
+class FunctionProto:
+    """
+    What compiling a function declaration, or top-level code, produces:
+    everything a closure of it shares. `chunk` is None until the body is
+    compiled, which for a lazily parsed body happens on the first call.
+    Top-level code has no declaration, so it records its frame size.
+    """
+    __slots__ = ('name', 'declaration', 'chunk', 'upvalues', 'size')
+
+    def __init__(self, name: str, declaration, chunk: Chunk = None, upvalues: tuple = (), size: int = 0):
+        self.name = name
+        self.declaration = declaration
+        self.chunk = chunk
+        self.upvalues = upvalues
+        self.size = size
+
+    def __repr__(self):
+        return f"<fn {self.name}>"
+
+
+class ClassProto:
+    """What compiling a class declaration produces: its name and method prototypes."""
+    __slots__ = ('name', 'methods', 'has_superclass')
+
+    def __init__(self, name: str, methods: List[FunctionProto], has_superclass: bool):
+        self.name = name
+        self.methods = methods
+        self.has_superclass = has_superclass
+
+    def __repr__(self):
+        return f"<class {self.name}>"
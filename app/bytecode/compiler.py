@@ -0,0 +1,284 @@
+from typing import List
+from app.parser.ast import (
+    Expr, Stmt, Print, Expression, Literal, Grouping, Unary, Binary, Var,
+    Variable, Assign, Block, If, Logical, While, Call, Function, Return,
+    Class, Get, Set, This, Super
+)
+from app.evaluation.visitors import Visitor, StmtVisitor
+from app.environment import Environment, LOCAL, CELL
+from app.parser.lazy import LazyBody
+from app.bytecode.chunk import (
+    Chunk, FunctionProto, ClassProto,
+    CONSTANT, NIL, TRUE, FALSE, POP,
+    GET_LOCAL, SET_LOCAL, STORE_LOCAL, STORE_BOXED, NEW_CELL,
+    GET_CELL, SET_CELL, GET_UPVALUE, SET_UPVALUE,
+    GET_GLOBAL, SET_GLOBAL, DEFINE_GLOBAL,
+    GET_PROPERTY, SET_PROPERTY, GET_SUPER,
+    EQUAL, NOT_EQUAL, GREATER, GREATER_EQUAL, LESS, LESS_EQUAL,
+    ADD, SUBTRACT, MULTIPLY, DIVIDE, NOT, NEGATE,
+    EXPECT_INSTANCE, PRINT, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, POP_JUMP_IF_FALSE, LOOP,
+    CALL, CLOSURE, CLASS, RETURN,
+)
+from app.inline_cache import InlineCaches
+from app.scan_for import tokens
+
+BINARY_OPS = {
+    tokens.PLUS: ADD, tokens.MINUS: SUBTRACT, tokens.STAR: MULTIPLY, tokens.SLASH: DIVIDE,
+    tokens.BANG_EQUAL: NOT_EQUAL, tokens.EQUAL_EQUAL: EQUAL,
+    tokens.GREATER: GREATER, tokens.GREATER_EQUAL: GREATER_EQUAL,
+    tokens.LESS: LESS, tokens.LESS_EQUAL: LESS_EQUAL,
+}
+
+# The instructions that read and write a local, by how the resolver found
+# it; anything else is an upvalue.
+LOADS = {LOCAL: GET_LOCAL, CELL: GET_CELL}
+STORES = {LOCAL: SET_LOCAL, CELL: SET_CELL}
+
+
+class Compiler(Visitor, StmtVisitor):
+    """
+    Compiles a resolved program to bytecode. Locals keep the frame slots
+    the resolver gave them, and globals are numbered by the slots of the
+    global table the program will run against, so no instruction ever
+    looks a name up.
+
+    Every instruction records the line of the token a runtime error
+    raised by it would name, or else the line of the last one emitted.
+    """
+    def __init__(self, globals: Environment):
+        self.globals = globals
+        self.chunk = None
+        self.line = 0
+        # The largest frame the outermost blocks of top-level code need.
+        self.size = 0
+        # The inline caches of the property sites compiled.
+        self.caches = InlineCaches()
+
+    def compile_script(self, statements: List[Stmt]) -> FunctionProto:
+        """Top-level code. Its outermost blocks take turns using one frame."""
+        chunk = self.begin()
+        self.size = 0
+        for statement in statements:
+            if statement: self.statement(statement)
+        self.emit(NIL)
+        self.emit(RETURN)
+        self.chunk = None
+        return FunctionProto("script", None, chunk, size=self.size)
+
+    def compile_function(self, proto: FunctionProto):
+        """Compiles the body of a function whose body has been parsed and resolved."""
+        enclosing, line = self.chunk, self.line
+        proto.chunk = self.begin()
+        for statement in proto.declaration.body:
+            if statement: self.statement(statement)
+        self.emit(NIL)
+        self.emit(RETURN)
+        self.chunk, self.line = enclosing, line
+
+    def begin(self) -> Chunk:
+        self.chunk = Chunk()
+        return self.chunk
+
+    def statement(self, stmt: Stmt): stmt.accept(self)
+    def expression(self, expr: Expr): expr.accept(self)
+
+    def emit(self, op: int, *operands: int, line: int = None) -> int:
+        if line is not None: self.line = line
+        return self.chunk.write(op, self.line, *operands)
+
+    def emit_jump(self, op: int) -> int:
+        """Emits a forward jump to be patched; returns the offset of its operand."""
+        return self.emit(op, 0) + 1
+
+    def patch_jump(self, operand: int):
+        # Jumps are relative to the end of the jump instruction.
+        self.chunk.code[operand] = len(self.chunk.code) - (operand + 1)
+
+    def emit_loop(self, start: int):
+        self.emit(LOOP, len(self.chunk.code) + 2 - start)
+
+    def constant(self, value) -> int:
+        return self.chunk.add_constant(value)
+
+    def global_slot(self, name: str) -> int:
+        return self.globals.slot(name)
+
+    # --- Variables ---
+
+    def load(self, name, access, slot):
+        if access is None:
+            self.emit(GET_GLOBAL, self.global_slot(name.lexeme), line=name.line)
+        else:
+            self.emit(LOADS.get(access, GET_UPVALUE), slot, line=name.line)
+
+    def declare(self, slot, name, boxed: bool):
+        """Stores the value on top of the stack as a new global or local."""
+        if slot is None:
+            self.emit(DEFINE_GLOBAL, self.global_slot(name.lexeme), line=name.line)
+        else:
+            self.emit(STORE_BOXED if boxed else STORE_LOCAL, slot, line=name.line)
+
+    def visit_variable(self, node: Variable):
+        self.load(node.name, node.access, node.slot)
+
+    def visit_assign(self, node: Assign):
+        self.expression(node.value)
+        if node.access is None:
+            self.emit(SET_GLOBAL, self.global_slot(node.name.lexeme), line=node.name.line)
+        else:
+            self.emit(STORES.get(node.access, SET_UPVALUE), node.slot, line=node.name.line)
+
+    def visit_this(self, node: This):
+        self.load(node.keyword, node.access, node.slot)
+
+    def visit_super(self, node: Super):
+        self.load(node.keyword, node.this_access, node.this_slot)
+        self.load(node.keyword, node.access, node.slot)
+        self.emit(GET_SUPER, self.constant(node.method.lexeme), line=node.method.line)
+
+    # --- Statements ---
+
+    def visit_expression(self, stmt: Expression):
+        self.expression(stmt.expression)
+        self.emit(POP)
+
+    def visit_print(self, stmt: Print):
+        self.expression(stmt.expression)
+        self.emit(PRINT)
+
+    def visit_var(self, stmt: Var):
+        if stmt.initializer is None:
+            self.emit(NIL, line=stmt.name.line)
+        else:
+            self.expression(stmt.initializer)
+        self.declare(stmt.slot, stmt.name, stmt.cell)
+
+    def visit_block(self, stmt: Block):
+        self.size = max(self.size, stmt.size or 0)
+        for statement in stmt.statements:
+            if statement: self.statement(statement)
+
+    def visit_if(self, stmt: If):
+        self.expression(stmt.condition)
+        else_jump = self.emit_jump(POP_JUMP_IF_FALSE)
+        self.statement(stmt.then_branch)
+        if stmt.else_branch is None:
+            self.patch_jump(else_jump)
+            return
+        end_jump = self.emit_jump(JUMP)
+        self.patch_jump(else_jump)
+        self.statement(stmt.else_branch)
+        self.patch_jump(end_jump)
+
+    def visit_while(self, stmt: While):
+        start = len(self.chunk.code)
+        self.expression(stmt.condition)
+        exit_jump = self.emit_jump(POP_JUMP_IF_FALSE)
+        self.statement(stmt.body)
+        self.emit_loop(start)
+        self.patch_jump(exit_jump)
+
+    def visit_return(self, stmt: Return):
+        if stmt.value is None:
+            self.emit(NIL, line=stmt.keyword.line)
+        else:
+            self.expression(stmt.value)
+        self.emit(RETURN, line=stmt.keyword.line)
+
+    def visit_function(self, stmt: Function):
+        proto = self.function_proto(stmt)
+        if stmt.slot is None:
+            self.emit(CLOSURE, self.constant(proto), line=stmt.name.line)
+            self.declare(None, stmt.name, False)
+            return
+        # A local function is always kept in a cell, so it can capture itself.
+        self.emit(NEW_CELL, stmt.slot, line=stmt.name.line)
+        self.emit(CLOSURE, self.constant(proto))
+        self.emit(SET_CELL, stmt.slot)
+        self.emit(POP)
+
+    def function_proto(self, declaration: Function) -> FunctionProto:
+        proto = FunctionProto(declaration.name.lexeme, declaration, upvalues=tuple(declaration.upvalues))
+        if not isinstance(declaration.body, LazyBody):
+            self.compile_function(proto)
+        return proto
+
+    def visit_class(self, stmt: Class):
+        line = stmt.name.line
+        if stmt.superclass is not None:
+            self.expression(stmt.superclass)
+            line = stmt.superclass.name.line
+        if stmt.slot is not None:
+            # A local class is always kept in a cell, which has to exist
+            # before the methods can capture it.
+            self.emit(NEW_CELL, stmt.slot, line=stmt.name.line)
+        proto = ClassProto(stmt.name.lexeme, [self.function_proto(method) for method in stmt.methods],
+                           stmt.superclass is not None)
+        self.emit(CLASS, self.constant(proto), line=line)
+        if stmt.slot is None:
+            self.declare(None, stmt.name, False)
+        else:
+            self.emit(SET_CELL, stmt.slot, line=stmt.name.line)
+            self.emit(POP)
+
+    # --- Expressions ---
+
+    def visit_literal(self, node: Literal):
+        value = node.value
+        if value is None: self.emit(NIL)
+        elif value is True: self.emit(TRUE)
+        elif value is False: self.emit(FALSE)
+        else: self.emit(CONSTANT, self.constant(value))
+
+    def visit_grouping(self, node: Grouping):
+        self.expression(node.expression)
+
+    def visit_logical(self, node: Logical):
+        self.expression(node.left)
+        # The left operand is the result unless it says to go on.
+        jump = self.emit_jump(JUMP_IF_TRUE if node.operator.kind == tokens.OR else JUMP_IF_FALSE)
+        self.emit(POP)
+        self.expression(node.right)
+        self.patch_jump(jump)
+
+    def visit_unary(self, node: Unary):
+        self.expression(node.right)
+        if node.operator.kind == tokens.MINUS:
+            self.emit(NEGATE, line=node.operator.line)
+        elif node.operator.kind == tokens.BANG:
+            self.emit(NOT, line=node.operator.line)
+        else:
+            self.emit(POP)
+            self.emit(NIL)
+
+    def visit_binary(self, node: Binary):
+        self.expression(node.left)
+        self.expression(node.right)
+        op = BINARY_OPS.get(node.operator.kind)
+        if op is None:
+            self.emit(POP)
+            self.emit(POP)
+            self.emit(NIL)
+        else:
+            self.emit(op, line=node.operator.line)
+
+    def visit_call(self, node: Call):
+        self.expression(node.callee)
+        for argument in node.arguments:
+            self.expression(argument)
+        self.emit(CALL, len(node.arguments), line=node.paren.line)
+
+    def visit_get(self, node: Get):
+        self.expression(node.obj)
+        # The constant is the node, which holds the site's shape and slot
+        # and the inline cache the VM falls back on.
+        self.caches.site(node)
+        self.emit(GET_PROPERTY, self.constant(node), line=node.name.line)
+
+    def visit_set(self, node: Set):
+        self.expression(node.obj)
+        # The object is checked before the value is evaluated.
+        self.emit(EXPECT_INSTANCE, line=node.name.line)
+        self.expression(node.value)
+        self.caches.site(node)
+        self.emit(SET_PROPERTY, self.constant(node), line=node.name.line)
@@ -0,0 +1,66 @@
+import sys
+from app.environment import Environment
+from app.stringify import stringify
+from app.parser.ast import Get, Set
+from app.bytecode.chunk import (
+    OpNames, OPERANDS, FunctionProto, ClassProto,
+    CONSTANT, GET_GLOBAL, SET_GLOBAL, DEFINE_GLOBAL, GET_PROPERTY, SET_PROPERTY, GET_SUPER,
+    JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, POP_JUMP_IF_FALSE, LOOP, CLOSURE, CLASS,
+)
+
+CONSTANT_OPS = (CONSTANT, GET_PROPERTY, SET_PROPERTY, GET_SUPER, CLOSURE, CLASS)
+GLOBAL_OPS = (GET_GLOBAL, SET_GLOBAL, DEFINE_GLOBAL)
+JUMP_OPS = (JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, POP_JUMP_IF_FALSE)
+
+
+def disassemble(script: FunctionProto, globals: Environment, out=sys.stdout):
+    """
+    Writes the instructions of top-level code and then of every function
+    and method it declares, at any depth, in the order they appear.
+    """
+    names = {slot: name for name, slot in globals.slots.items()}
+    pending = [script]
+    while pending:
+        proto = pending.pop(0)
+        if proto.chunk is None:
+            out.write(f"== {proto.name} (not compiled) ==\n")
+            continue
+        disassemble_chunk(proto, names, out)
+        for constant in proto.chunk.constants:
+            if isinstance(constant, FunctionProto):
+                pending.append(constant)
+            elif isinstance(constant, ClassProto):
+                pending.extend(constant.methods)
+
+
+def disassemble_chunk(proto: FunctionProto, names: dict, out):
+    chunk = proto.chunk
+    out.write(f"== {proto.name} ==\n")
+    code, offset, previous_line = chunk.code, 0, None
+    while offset < len(code):
+        op = code[offset]
+        line = chunk.line(offset)
+        line_column = "   |" if line == previous_line else f"{line:4}"
+        previous_line = line
+        text = f"{offset:04} {line_column} {OpNames[op]}"
+        if OPERANDS.get(op):
+            operand = code[offset + 1]
+            text = f"{text:<28}{operand:4}"
+            if op in CONSTANT_OPS:
+                text += f" '{describe(chunk.constants[operand])}'"
+            elif op in GLOBAL_OPS:
+                text += f" '{names.get(operand, '?')}'"
+            elif op in JUMP_OPS:
+                text += f" -> {offset + 2 + operand}"
+            elif op == LOOP:
+                text += f" -> {offset + 2 - operand}"
+        out.write(text.rstrip() + "\n")
+        offset += 1 + OPERANDS.get(op, 0)
+
+
+def describe(constant) -> str:
+    if isinstance(constant, (FunctionProto, ClassProto)):
+        return repr(constant)
+    if isinstance(constant, (Get, Set)):
+        return constant.name.lexeme
+    return stringify(constant)
@@ -0,0 +1,312 @@
+import sys
+from typing import List
+from app.parser.ast import Stmt
+from app.environment import Environment, Cell, UNDEFINED
+from app.evaluation.evaluator import NativeClock, RECURSION_MESSAGE
+from app.stringify import stringify
+from app.lox_callable import LoxCallable
+from app.lox_function import LoxFunction
+from app.lox_class import LoxClass
+from app.lox_instance import LoxInstance
+from app.resolver.resolver import compile_lazy
+from app.bytecode.compiler import Compiler
+from app.bytecode.chunk import (
+    FunctionProto,
+    CONSTANT, NIL, TRUE, FALSE, POP,
+    GET_LOCAL, SET_LOCAL, STORE_LOCAL, STORE_BOXED, NEW_CELL,
+    GET_CELL, SET_CELL, SET_UPVALUE,
+    GET_GLOBAL, SET_GLOBAL, DEFINE_GLOBAL,
+    GET_PROPERTY, SET_PROPERTY,
+    EQUAL, NOT_EQUAL, GREATER, GREATER_EQUAL, LESS, LESS_EQUAL,
+    ADD, SUBTRACT, MULTIPLY, NOT, NEGATE,
+    EXPECT_INSTANCE, PRINT, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, POP_JUMP_IF_FALSE, LOOP,
+    CALL, CLOSURE, CLASS, RETURN,
+)
+
+
+class VMFunction(LoxFunction):
+    """A LoxFunction whose calls run its compiled bytecode."""
+    def __init__(self, proto: FunctionProto, upvalues: tuple, is_initializer: bool,
+                 receiver: LoxInstance = None, superclass=None):
+        super().__init__(proto.declaration, upvalues, is_initializer, receiver, superclass)
+        self.proto = proto
+
+    def call(self, interpreter, arguments: list):
+        return interpreter.run(self, arguments)
+
+    def bind(self, instance: LoxInstance):
+        return VMFunction(self.proto, self.upvalues, self.is_initializer, instance, self.superclass)
+
+
+class VM:
+    """
+    Runs bytecode from the Compiler on a stack machine. Calls between Lox
+    functions push a frame in the dispatch loop instead of recursing in
+    Python, so call depth is limited by `max_depth` rather than by the
+    Python stack; going deeper fails like the tree walker running out of
+    Python stack does.
+    """
+    def __init__(self):
+        self.globals = Environment()
+        self.globals.define("clock", NativeClock())
+        self.compiler = Compiler(self.globals)
+        self.caches = self.compiler.caches
+        self.max_depth = sys.getrecursionlimit()
+
+    def evaluate_statements(self, statements: List[Stmt]):
+        script = self.compiler.compile_script(statements)
+        try:
+            self.run(VMFunction(script, (), False), [None] * script.size)
+        except RecursionError:
+            raise RecursionError(RECURSION_MESSAGE) from None
+
+    def execute(self, stmt: Stmt):
+        """Compiles and runs a top-level statement."""
+        self.evaluate_statements([stmt])
+
+    def prepare(self, function: VMFunction, arguments: list) -> list:
+        """Compiles a lazily parsed body if need be; returns the frame of a call."""
+        proto = function.proto
+        if proto.chunk is None:
+            compile_lazy(proto.declaration)
+            self.compiler.compile_function(proto)
+        return function.new_frame(arguments)
+
+    def global_name(self, slot: int) -> str:
+        for name, index in self.globals.slots.items():
+            if index == slot:
+                return name
+
+    def run(self, function: VMFunction, arguments: list):
+        """Runs a call of `function`, or top-level code given its frame, to completion; returns the result."""
+        slots = arguments if function.declaration is None else self.prepare(function, arguments)
+        chunk = function.proto.chunk
+        code, constants, upvalues = chunk.code, chunk.constants, function.upvalues
+        values = self.globals.values
+        stack = []
+        frames = []
+        ip = 0
+        # Dispatch on the group of the opcode first, then on the opcode,
+        # most frequent first; see the numbering in chunk.py.
+        while True:
+            op = code[ip]
+            if op < POP_JUMP_IF_FALSE:
+                if op == GET_LOCAL:
+                    stack.append(slots[code[ip + 1]])
+                elif op == CONSTANT:
+                    stack.append(constants[code[ip + 1]])
+                elif op == STORE_LOCAL:
+                    slots[code[ip + 1]] = stack.pop()
+                elif op == SET_LOCAL:
+                    slots[code[ip + 1]] = stack[-1]
+                elif op == POP:
+                    stack.pop()
+                    ip += 1
+                    continue
+                elif op == GET_GLOBAL:
+                    value = values[code[ip + 1]]
+                    if value is UNDEFINED:
+                        raise RuntimeError(f"[{chunk.line(ip)}] Undefined variable '{self.global_name(code[ip + 1])}'.")
+                    stack.append(value)
+                elif op == GET_CELL:
+                    stack.append(slots[code[ip + 1]].value)
+                else:  # GET_UPVALUE
+                    stack.append(upvalues[code[ip + 1]].value)
+                ip += 2
+
+            elif op < CALL:
+                if op == POP_JUMP_IF_FALSE:
+                    value = stack.pop()
+                    if value is None or value is False:
+                        ip += code[ip + 1]
+                    ip += 2
+                    continue
+                if op == LOOP:
+                    ip += 2 - code[ip + 1]
+                    continue
+                right = stack.pop()
+                left = stack[-1]
+                if op == ADD:
+                    if isinstance(left, float) and isinstance(right, float) or isinstance(left, str) and isinstance(right, str):
+                        stack[-1] = left + right
+                    else:
+                        raise RuntimeError(f"[{chunk.line(ip)}] Operands must be two numbers or two strings.")
+                elif op == EQUAL:
+                    stack[-1] = right is None if left is None else left == right
+                elif op == NOT_EQUAL:
+                    stack[-1] = right is not None if left is None else not left == right
+                elif not (isinstance(left, float) and isinstance(right, float)):
+                    raise RuntimeError(f"[{chunk.line(ip)}] Operands must be numbers.")
+                elif op == LESS:
+                    stack[-1] = left < right
+                elif op == SUBTRACT:
+                    stack[-1] = left - right
+                elif op == MULTIPLY:
+                    stack[-1] = left * right
+                elif op == GREATER:
+                    stack[-1] = left > right
+                elif op == LESS_EQUAL:
+                    stack[-1] = left <= right
+                elif op == GREATER_EQUAL:
+                    stack[-1] = left >= right
+                else:  # DIVIDE
+                    if right == 0.0:
+                        raise RuntimeError(f"[{chunk.line(ip)}] Error: Division by zero.")
+                    stack[-1] = left / right
+                ip += 1
+
+            elif op < SET_GLOBAL:
+                if op == CALL:
+                    count = code[ip + 1]
+                    callee = stack[-1 - count]
+                    if isinstance(callee, LoxClass):
+                        instance = LoxInstance(callee)
+                        initializer = callee.find_method("init")
+                        if initializer is None:
+                            if count != 0:
+                                raise RuntimeError(f"[{chunk.line(ip)}] Expected 0 arguments but got {count}.")
+                            del stack[-1 - count:]
+                            stack.append(instance)
+                            ip += 2
+                            continue
+                        callee = initializer.bind(instance)
+                    elif not isinstance(callee, LoxCallable):
+                        raise RuntimeError(f"[{chunk.line(ip)}] Can only call functions and classes.")
+                    if count != callee.arity():
+                        raise RuntimeError(f"[{chunk.line(ip)}] Expected {callee.arity()} arguments but got {count}.")
+                    arguments = stack[len(stack) - count:]
+                    del stack[-1 - count:]
+                    ip += 2
+                    if not isinstance(callee, VMFunction):
+                        stack.append(callee.call(self, arguments))
+                        continue
+                    if len(frames) >= self.max_depth:
+                        raise RecursionError(RECURSION_MESSAGE)
+                    new_slots = self.prepare(callee, arguments)
+                    frames.append((function, chunk, ip, slots, stack))
+                    function, slots, stack, ip = callee, new_slots, [], 0
+                    chunk = callee.proto.chunk
+                    code, constants, upvalues = chunk.code, chunk.constants, callee.upvalues
+                elif op == RETURN:
+                    result = stack.pop()
+                    if function.is_initializer:
+                        result = function.receiver
+                    if not frames:
+                        return result
+                    function, chunk, ip, slots, stack = frames.pop()
+                    code, constants, upvalues = chunk.code, chunk.constants, function.upvalues
+                    stack.append(result)
+                elif op == GET_PROPERTY:
+                    instance = stack[-1]
+                    if not isinstance(instance, LoxInstance):
+                        raise RuntimeError(f"[{chunk.line(ip)}] Only instances have properties.")
+                    site = constants[code[ip + 1]]
+                    if instance.shape is site.shape:
+                        stack[-1] = instance.values[site.slot]
+                    else:
+                        stack[-1] = site.cache.get(instance)
+                    ip += 2
+                elif op == SET_PROPERTY:
+                    value = stack.pop()
+                    instance = stack[-1]
+                    site = constants[code[ip + 1]]
+                    if instance.shape is site.shape:
+                        instance.values[site.slot] = value
+                    elif instance.shape is site.before:
+                        instance.values.append(value)
+                        instance.shape = site.after
+                    else:
+                        site.cache.set(instance, value)
+                    stack[-1] = value
+                    ip += 2
+                elif op == EXPECT_INSTANCE:
+                    if not isinstance(stack[-1], LoxInstance):
+                        raise RuntimeError(f"[{chunk.line(ip)}] Only instances have fields.")
+                    ip += 1
+                else:  # GET_SUPER
+                    superclass = stack.pop()
+                    name = constants[code[ip + 1]]
+                    method = superclass.find_method(name)
+                    if method is None:
+                        raise RuntimeError(f"[{chunk.line(ip)}] Undefined property '{name}'.")
+                    stack[-1] = method.bind(stack[-1])
+                    ip += 2
+
+            elif op == SET_GLOBAL:
+                if values[code[ip + 1]] is UNDEFINED:
+                    raise RuntimeError(f"[{chunk.line(ip)}] Undefined variable '{self.global_name(code[ip + 1])}'.")
+                values[code[ip + 1]] = stack[-1]
+                ip += 2
+            elif op == SET_CELL:
+                slots[code[ip + 1]].value = stack[-1]
+                ip += 2
+            elif op == SET_UPVALUE:
+                upvalues[code[ip + 1]].value = stack[-1]
+                ip += 2
+            elif op == JUMP_IF_FALSE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip += code[ip + 1]
+                ip += 2
+            elif op == JUMP_IF_TRUE:
+                value = stack[-1]
+                if not (value is None or value is False):
+                    ip += code[ip + 1]
+                ip += 2
+            elif op == JUMP:
+                ip += 2 + code[ip + 1]
+            elif op == NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+                ip += 1
+            elif op == NEGATE:
+                value = stack[-1]
+                if not isinstance(value, float):
+                    raise RuntimeError(f"[{chunk.line(ip)}] Operand must be a number.")
+                stack[-1] = -value
+                ip += 1
+            elif op == NIL:
+                stack.append(None)
+                ip += 1
+            elif op == TRUE:
+                stack.append(True)
+                ip += 1
+            elif op == FALSE:
+                stack.append(False)
+                ip += 1
+            elif op == PRINT:
+                print(stringify(stack.pop()))
+                ip += 1
+            elif op == STORE_BOXED:
+                slots[code[ip + 1]] = Cell(stack.pop())
+                ip += 2
+            elif op == NEW_CELL:
+                slots[code[ip + 1]] = Cell()
+                ip += 2
+            elif op == DEFINE_GLOBAL:
+                values[code[ip + 1]] = stack.pop()
+                ip += 2
+            elif op == CLOSURE:
+                proto = constants[code[ip + 1]]
+                stack.append(VMFunction(proto, self.capture(proto, slots, upvalues), False))
+                ip += 2
+            elif op == CLASS:
+                proto = constants[code[ip + 1]]
+                superclass = None
+                if proto.has_superclass:
+                    superclass = stack.pop()
+                    if not isinstance(superclass, LoxClass):
+                        raise RuntimeError(f"[{chunk.line(ip)}] Superclass must be a class.")
+                methods = {}
+                for method in proto.methods:
+                    methods[method.name] = VMFunction(
+                        method, self.capture(method, slots, upvalues), method.name == "init", superclass=superclass)
+                stack.append(LoxClass(proto.name, superclass, methods))
+                ip += 2
+            else:
+                raise ValueError(f"Unknown opcode {op} at {ip}.")
+
+    @staticmethod
+    def capture(proto: FunctionProto, slots: list, upvalues: tuple) -> tuple:
+        """The cells a new closure of `proto` holds."""
+        return tuple(slots[index] if is_local else upvalues[index] for is_local, index in proto.upvalues)
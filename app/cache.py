@@ -0,0 +1,148 @@
+import hashlib
+import hmac
+import os
+import pickle
+import secrets
+import sys
+import tempfile
+
+# Bump whenever the pickled layout of the AST or the resolver output changes.
+CACHE_VERSION = 10
+CACHE_DIR = '__loxcache__'
+KEY_SIZE = 32
+
+
+def interpreter_fingerprint():
+    """
+    Identifies the interpreter that produced a cache entry: the Python
+    version plus the size and modification time of every module in `app`,
+    so editing the front end invalidates everything it compiled.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    parts = [str(CACHE_VERSION), sys.version]
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(d for d in subdirectories if d != '__pycache__')
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                parts.append(f"{os.path.relpath(path, root)}:{stat.st_size}:{stat.st_mtime_ns}")
+    return '\n'.join(parts)
+
+
+def key_path():
+    """Where the signing key lives: the user's own cache directory, not next to any script."""
+    directory = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(directory, 'lox', 'cache.key')
+
+
+def signing_key():
+    """
+    The secret entries are signed with, made on first use. A key that other
+    users could read or change is replaced, which only turns the entries
+    signed with it into misses. None if no key can be read or made, which
+    leaves the cache off.
+    """
+    path = key_path()
+    try:
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_mode & 0o077 == 0:
+                key = file.read()
+                if len(key) == KEY_SIZE:
+                    return key
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return None
+    key = secrets.token_bytes(KEY_SIZE)
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        # mkstemp makes the file readable by its owner only.
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(key)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+    except OSError:
+        return None
+    return key
+
+
+class ProgramCache:
+    """
+    Keeps parsed and resolved programs in a `__loxcache__` directory next
+    to the script, one entry per script and variant (such as the
+    optimization level it was compiled at). An entry is only used when its
+    key matches the SHA-256 of the current source and interpreter
+    fingerprint; anything else, including an unreadable entry, counts as a
+    miss.
+
+    Entries are pickles, and loading a pickle can run arbitrary code, while
+    the key above is computed from public inputs and so proves nothing about
+    who wrote an entry. Each entry is therefore signed: its header line holds
+    an HMAC-SHA256 of the key, variant and payload under a secret kept in
+    the user's own cache directory (see signing_key), and the payload is
+    only unpickled once that checks out. Anyone who can write to
+    __loxcache__ can still delete or corrupt entries, but not get code run;
+    anyone who can read the secret can forge them, which is why it is
+    private to its owner.
+    """
+    def __init__(self, filename, variant=''):
+        directory, name = os.path.split(os.path.abspath(filename))
+        suffix = f".{variant}" if variant else ''
+        self.path = os.path.join(directory, CACHE_DIR, f"{name}{suffix}.pickle")
+        with open(filename, 'rb') as file:
+            source = file.read()
+        digest = hashlib.sha256(interpreter_fingerprint().encode())
+        digest.update(b'\0')
+        digest.update(source)
+        self.key = digest.hexdigest()
+        self.variant = variant
+        self.secret = signing_key()
+
+    def sign(self, payload: bytes) -> bytes:
+        message = f"{self.key}\0{self.variant}\0".encode() + payload
+        return hmac.new(self.secret, message, hashlib.sha256).hexdigest().encode('ascii')
+
+    def load(self):
+        """
+        Returns the statements of a matching entry, or None. The resolver's
+        results are stored on the nodes, so they come back with them.
+        """
+        if self.secret is None:
+            return None
+        try:
+            with open(self.path, 'rb') as file:
+                data = file.read()
+            signature, _, payload = data.partition(b'\n')
+            if not hmac.compare_digest(signature, self.sign(payload)):
+                return None
+            return pickle.loads(payload)
+        except Exception:
+            return None
+
+    def store(self, statements):
+        """
+        Writes the entry atomically, so a concurrent run sees either the old
+        entry or the new one. Failing to write just leaves the cache cold.
+        """
+        if self.secret is None:
+            return
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            payload = pickle.dumps(statements, pickle.HIGHEST_PROTOCOL)
+            data = self.sign(payload) + b'\n' + payload
+            fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    file.write(data)
+                os.replace(temporary, self.path)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+        except (OSError, RecursionError, pickle.PicklingError):
+            pass
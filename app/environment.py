@@ -1,54 +1,62 @@
+from itertools import count
 from app.scan_for.tokens import Token
-from typing import Any, Dict
+from typing import Any, Dict, List
+
+# The value of a global slot whose name has been looked up but not defined.
+UNDEFINED = object()
+
+# Every global table gets a new stamp, so a use site can tell whether the
+# slot it remembered came from the table it is looking at now.
+stamps = count(1)
+
 
 class Environment:
-    def __init__(self, enclosing=None):
-        self.values: Dict[str, Any] = {}
-        self.enclosing = enclosing
+    """
+    The global scope. Each name gets a fixed slot in `values` the first
+    time it is defined or looked up, so use sites can remember the slot
+    (tagged with `stamp`) and read or write globals by index.
+    """
+    def __init__(self):
+        self.slots: Dict[str, int] = {}
+        self.values: List[Any] = []
+        self.stamp = next(stamps)
+
+    def slot(self, name: str) -> int:
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.values)
+            self.values.append(UNDEFINED)
+        return slot
 
     def define(self, name: str, value: Any):
-        self.values[name] = value
+        self.values[self.slot(name)] = value
 
     def get(self, name: Token):
-        if name.lexeme in self.values:
-            return self.values[name.lexeme]
-        if self.enclosing is not None:
-            return self.enclosing.get(name)
-        raise RuntimeError(f"[{name.line}] Undefined variable '{name.lexeme}'.")
+        return self.get_slot(self.slot(name.lexeme), name)
 
     def assign(self, name: Token, value: Any):
-        if name.lexeme in self.values:
-            self.values[name.lexeme] = value
-            return
-        if self.enclosing is not None:
-            self.enclosing.assign(name, value)
-            return
-        raise RuntimeError(f"[{name.line}] Undefined variable '{name.lexeme}'.")
-
-    # --- NEW HELPER METHOD to safely get an ancestor environment ---
-    def ancestor(self, distance: int):
-        """Walks up the environment chain to find a specific ancestor."""
-        environment = self
-        for _ in range(distance):
-            # This check is the core of the fix.
-            if environment.enclosing is None:
-                # This should not happen if the resolver is correct, but it's a safeguard.
-                return None 
-            environment = environment.enclosing
-        return environment
-
-    def get_at(self, distance: int, name: str):
-        """Gets a variable from a resolved ancestor environment."""
-        # Use the new safe helper method.
-        env = self.ancestor(distance)
-        if env is not None:
-            return env.values.get(name)
-        return None # Should be unreachable if resolver works.
-
-    def assign_at(self, distance: int, name: Token, value: Any):
-        """Assigns a variable in a resolved ancestor environment."""
-        # Use the new safe helper method.
-        env = self.ancestor(distance)
-        if env is not None:
-            env.values[name.lexeme] = value
+        self.assign_slot(self.slot(name.lexeme), name, value)
+
+    def get_slot(self, slot: int, name: Token):
+        value = self.values[slot]
+        if value is UNDEFINED:
+            raise RuntimeError(f"[{name.line}] Undefined variable '{name.lexeme}'.")
+        return value
+
+    def assign_slot(self, slot: int, name: Token, value: Any):
+        if self.values[slot] is UNDEFINED:
+            raise RuntimeError(f"[{name.line}] Undefined variable '{name.lexeme}'.")
+        self.values[slot] = value
+
+
+class Cell:
+    """A captured local variable, shared by its frame and the closures that use it."""
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any = None):
+        self.value = value
+
 
+# Where the resolver found a variable: directly in a slot of the current
+# frame, in a Cell in that slot, or in a Cell among the closure's upvalues.
+LOCAL, CELL, UPVALUE = range(3)
@@ -0,0 +1,531 @@
+import operator as operations
+from typing import Any, Callable, List
+from app.parser.ast import (
+    Expr, Stmt, Print, Expression, Literal, Grouping, Unary, Binary, Var,
+    Variable, Assign, Block, If, Logical, While, Call, Function, Return,
+    Class, Get, Set, This, Super
+)
+from app.evaluation.visitors import Visitor, StmtVisitor
+from app.evaluation.evaluator import NativeClock, RECURSION_MESSAGE
+from app.environment import Environment, Cell, UNDEFINED, LOCAL, CELL
+from app.stringify import stringify
+from app.lox_callable import LoxCallable
+from app.lox_function import LoxFunction
+from app.lox_class import LoxClass
+from app.lox_instance import LoxInstance
+from app.inline_cache import InlineCaches
+from app.parser.lazy import LazyBody
+from app.resolver.resolver import compile_lazy
+from app.scan_for.tokens import (
+    MINUS, PLUS, SLASH, STAR, BANG, BANG_EQUAL, EQUAL_EQUAL, GREATER,
+    GREATER_EQUAL, LESS, LESS_EQUAL, OR
+)
+
+# Compiled code is a Python function of the running frame and the upvalues
+# of the running closure. An expression returns its value; a statement
+# returns None to carry on, or a 1-tuple holding the value of a `return`.
+Code = Callable[[list, tuple], Any]
+
+
+def number_operand(operator, operand):
+    if not isinstance(operand, float):
+        raise RuntimeError(f"[{operator.line}] Operand must be a number.")
+
+
+def number_operands(operator, left, right):
+    if not (isinstance(left, float) and isinstance(right, float)):
+        raise RuntimeError(f"[{operator.line}] Operands must be numbers.")
+
+
+class Body:
+    """The compiled body of a function declaration, compiled on the first call if it was parsed lazily."""
+    __slots__ = ('declaration', 'compiler', 'code')
+
+    def __init__(self, declaration: Function, compiler: 'ClosureEvaluator'):
+        self.declaration = declaration
+        self.compiler = compiler
+        self.code = None
+        if not isinstance(declaration.body, LazyBody):
+            self.code = compiler.sequence(declaration.body)
+
+    def compile(self) -> Code:
+        self.code = self.compiler.sequence(compile_lazy(self.declaration))
+        return self.code
+
+
+class CompiledFunction(LoxFunction):
+    """A LoxFunction whose calls run the compiled body instead of walking the AST."""
+    def __init__(self, body: Body, upvalues: tuple, is_initializer: bool,
+                 receiver: LoxInstance = None, superclass=None):
+        super().__init__(body.declaration, upvalues, is_initializer, receiver, superclass)
+        self.body = body
+
+    def call(self, interpreter, arguments: list):
+        code = self.body.code or self.body.compile()
+        result = code(self.new_frame(arguments), self.upvalues)
+        # An init method returns 'this', even if there's an explicit return.
+        if self.is_initializer:
+            return self.receiver
+        return None if result is None else result[0]
+
+    def bind(self, instance: LoxInstance):
+        return CompiledFunction(self.body, self.upvalues, self.is_initializer, instance, self.superclass)
+
+
+class ClosureEvaluator(Visitor, StmtVisitor):
+    """
+    Runs a resolved program by first compiling every node into a Python
+    closure specialized for it (one per operator, per kind of variable
+    access and so on), so running it involves no visitor dispatch and no
+    tests on operator kinds. Output and runtime errors are the same as
+    the Evaluator's.
+    """
+    def __init__(self):
+        self.globals = Environment()
+        self.globals.define("clock", NativeClock())
+        # The inline caches of the property sites compiled.
+        self.caches = InlineCaches()
+
+    def evaluate_statements(self, statements: list[Stmt]):
+        last_value = None
+        try:
+            for statement in statements:
+                if statement:
+                    if isinstance(statement, Expression):
+                        last_value = self.expression(statement.expression)(None, ())
+                    else:
+                        self.execute(statement)
+        except RecursionError:
+            raise RecursionError(RECURSION_MESSAGE) from None
+        return last_value
+
+    def execute(self, stmt: Stmt):
+        """Compiles and runs a top-level statement."""
+        self.statement(stmt)(None, ())
+
+    def statement(self, stmt: Stmt) -> Code: return stmt.accept(self)
+    def expression(self, expr: Expr) -> Code: return expr.accept(self)
+
+    def sequence(self, statements: List[Stmt]) -> Code:
+        codes = tuple(self.statement(statement) for statement in statements if statement)
+        if not codes:
+            return lambda frame, upvalues: None
+        if len(codes) == 1:
+            return codes[0]
+        if len(codes) == 2:
+            first, second = codes
+            def run_two(frame, upvalues):
+                result = first(frame, upvalues)
+                if result is not None: return result
+                return second(frame, upvalues)
+            return run_two
+        def run(frame, upvalues):
+            for code in codes:
+                result = code(frame, upvalues)
+                if result is not None: return result
+        return run
+
+    # --- Variables ---
+
+    def _load(self, name, access, slot) -> Code:
+        if access == LOCAL:
+            return lambda frame, upvalues: frame[slot]
+        if access == CELL:
+            return lambda frame, upvalues: frame[slot].value
+        if access is not None:
+            return lambda frame, upvalues: upvalues[slot].value
+        values, slot = self.globals.values, self.globals.slot(name.lexeme)
+        def load_global(frame, upvalues):
+            value = values[slot]
+            if value is UNDEFINED:
+                raise RuntimeError(f"[{name.line}] Undefined variable '{name.lexeme}'.")
+            return value
+        return load_global
+
+    def _define(self, slot, name: str) -> Callable[[list, Any], None]:
+        """Stores the value of a declaration: in a frame slot, or as a global."""
+        if slot is not None:
+            def define_local(frame, value): frame[slot] = value
+            return define_local
+        values, slot = self.globals.values, self.globals.slot(name)
+        def define_global(frame, value): values[slot] = value
+        return define_global
+
+    def _capture(self, upvalues) -> Callable[[list, tuple], tuple]:
+        """Collects the cells a closure of a function with these upvalues holds."""
+        if not upvalues:
+            return lambda frame, enclosing: ()
+        return lambda frame, enclosing: tuple(
+            frame[index] if is_local else enclosing[index] for is_local, index in upvalues)
+
+    def visit_variable(self, node: Variable) -> Code:
+        return self._load(node.name, node.access, node.slot)
+
+    def visit_assign(self, node: Assign) -> Code:
+        value_code, slot, name = self.expression(node.value), node.slot, node.name
+        access = node.access
+        if access == LOCAL:
+            def assign_local(frame, upvalues):
+                frame[slot] = value = value_code(frame, upvalues)
+                return value
+            return assign_local
+        if access == CELL:
+            def assign_cell(frame, upvalues):
+                frame[slot].value = value = value_code(frame, upvalues)
+                return value
+            return assign_cell
+        if access is not None:
+            def assign_upvalue(frame, upvalues):
+                upvalues[slot].value = value = value_code(frame, upvalues)
+                return value
+            return assign_upvalue
+        values, slot = self.globals.values, self.globals.slot(name.lexeme)
+        def assign_global(frame, upvalues):
+            value = value_code(frame, upvalues)
+            if values[slot] is UNDEFINED:
+                raise RuntimeError(f"[{name.line}] Undefined variable '{name.lexeme}'.")
+            values[slot] = value
+            return value
+        return assign_global
+
+    def visit_this(self, node: This) -> Code:
+        return self._load(node.keyword, node.access, node.slot)
+
+    def visit_super(self, node: Super) -> Code:
+        superclass_code = self._load(node.keyword, node.access, node.slot)
+        instance_code = self._load(node.keyword, node.this_access, node.this_slot)
+        method_name = node.method
+        def super_method(frame, upvalues):
+            superclass = superclass_code(frame, upvalues)
+            instance = instance_code(frame, upvalues)
+            method = superclass.find_method(method_name.lexeme)
+            if method is None:
+                raise RuntimeError(f"[{method_name.line}] Undefined property '{method_name.lexeme}'.")
+            return method.bind(instance)
+        return super_method
+
+    # --- Statements ---
+
+    def visit_var(self, stmt: Var) -> Code:
+        define = self._define(stmt.slot, stmt.name.lexeme)
+        if stmt.initializer is None:
+            if stmt.cell:
+                return lambda frame, upvalues: define(frame, Cell())
+            return lambda frame, upvalues: define(frame, None)
+        initializer = self.expression(stmt.initializer)
+        if stmt.cell:
+            return lambda frame, upvalues: define(frame, Cell(initializer(frame, upvalues)))
+        slot = stmt.slot
+        if slot is not None:
+            def var_local(frame, upvalues):
+                frame[slot] = initializer(frame, upvalues)
+            return var_local
+        return lambda frame, upvalues: define(frame, initializer(frame, upvalues))
+
+    def visit_function(self, stmt: Function) -> Code:
+        body, capture = Body(stmt, self), self._capture(stmt.upvalues)
+        define = self._define(stmt.slot, stmt.name.lexeme)
+        if stmt.slot is None:
+            return lambda frame, upvalues: define(frame, CompiledFunction(body, (), False))
+        # A local function is always kept in a cell, so it can capture itself.
+        def function_local(frame, upvalues):
+            cell = Cell()
+            define(frame, cell)
+            cell.value = CompiledFunction(body, capture(frame, upvalues), False)
+        return function_local
+
+    def visit_class(self, stmt: Class) -> Code:
+        superclass_code = None
+        if stmt.superclass is not None:
+            superclass_code = self.expression(stmt.superclass)
+        methods = [(method.name.lexeme, Body(method, self), self._capture(method.upvalues),
+                    method.name.lexeme == "init") for method in stmt.methods]
+        name, superclass_line, slot = stmt.name.lexeme, stmt.superclass and stmt.superclass.name.line, stmt.slot
+        define = self._define(slot, name)
+
+        def declare_class(frame, upvalues):
+            superclass = None
+            if superclass_code is not None:
+                superclass = superclass_code(frame, upvalues)
+                if not isinstance(superclass, LoxClass):
+                    raise RuntimeError(f"[{superclass_line}] Superclass must be a class.")
+            if slot is not None:
+                # A local class is always kept in a cell, which has to
+                # exist before the methods can capture it.
+                cell = Cell()
+                define(frame, cell)
+            functions = {}
+            for method_name, body, capture, is_initializer in methods:
+                functions[method_name] = CompiledFunction(
+                    body, capture(frame, upvalues), is_initializer, superclass=superclass)
+            klass = LoxClass(name, superclass, functions)
+            if slot is not None: cell.value = klass
+            else: define(frame, klass)
+        return declare_class
+
+    def visit_block(self, stmt: Block) -> Code:
+        body = self.sequence(stmt.statements)
+        if stmt.size == 0:
+            return body
+        # The outermost blocks of top-level code have a frame of their own.
+        size = stmt.size or 0
+        return lambda frame, upvalues: body([None] * size, upvalues)
+
+    def visit_if(self, stmt: If) -> Code:
+        condition, then_branch = self.expression(stmt.condition), self.statement(stmt.then_branch)
+        if stmt.else_branch is None:
+            def if_then(frame, upvalues):
+                value = condition(frame, upvalues)
+                if value is not None and value is not False:
+                    return then_branch(frame, upvalues)
+            return if_then
+        else_branch = self.statement(stmt.else_branch)
+        def if_else(frame, upvalues):
+            value = condition(frame, upvalues)
+            if value is not None and value is not False:
+                return then_branch(frame, upvalues)
+            return else_branch(frame, upvalues)
+        return if_else
+
+    def visit_while(self, stmt: While) -> Code:
+        condition, body = self.expression(stmt.condition), self.statement(stmt.body)
+        def loop(frame, upvalues):
+            while True:
+                value = condition(frame, upvalues)
+                if value is None or value is False:
+                    return None
+                result = body(frame, upvalues)
+                if result is not None:
+                    return result
+        return loop
+
+    def visit_print(self, stmt: Print) -> Code:
+        expression = self.expression(stmt.expression)
+        def print_value(frame, upvalues):
+            print(stringify(expression(frame, upvalues)))
+        return print_value
+
+    def visit_expression(self, stmt: Expression) -> Code:
+        expression = self.expression(stmt.expression)
+        def discard(frame, upvalues):
+            expression(frame, upvalues)
+        return discard
+
+    def visit_return(self, stmt: Return) -> Code:
+        if stmt.value is None:
+            return lambda frame, upvalues: (None,)
+        value = self.expression(stmt.value)
+        return lambda frame, upvalues: (value(frame, upvalues),)
+
+    # --- Expressions ---
+
+    def visit_literal(self, node: Literal) -> Code:
+        value = node.value
+        return lambda frame, upvalues: value
+
+    def visit_grouping(self, node: Grouping) -> Code:
+        return self.expression(node.expression)
+
+    def visit_logical(self, node: Logical) -> Code:
+        left, right = self.expression(node.left), self.expression(node.right)
+        if node.operator.kind == OR:
+            def logical_or(frame, upvalues):
+                value = left(frame, upvalues)
+                if value is not None and value is not False: return value
+                return right(frame, upvalues)
+            return logical_or
+        def logical_and(frame, upvalues):
+            value = left(frame, upvalues)
+            if value is None or value is False: return value
+            return right(frame, upvalues)
+        return logical_and
+
+    def visit_unary(self, node: Unary) -> Code:
+        right, operator = self.expression(node.right), node.operator
+        if operator.kind == MINUS and node.operands is not None:
+            def negate_unchecked(frame, upvalues):
+                return -right(frame, upvalues)
+            return negate_unchecked
+        if operator.kind == MINUS:
+            def negate(frame, upvalues):
+                value = right(frame, upvalues)
+                number_operand(operator, value)
+                return -value
+            return negate
+        if operator.kind == BANG:
+            def not_(frame, upvalues):
+                value = right(frame, upvalues)
+                return value is None or value is False
+            return not_
+        def unknown(frame, upvalues):
+            right(frame, upvalues)
+        return unknown
+
+    def visit_binary(self, node: Binary) -> Code:
+        left, right, operator = self.expression(node.left), self.expression(node.right), node.operator
+        kind = operator.kind
+        if node.operands is not None and kind in UNCHECKED:
+            return UNCHECKED[kind](left, right, operator)
+        if kind == PLUS:
+            def add(frame, upvalues):
+                a, b = left(frame, upvalues), right(frame, upvalues)
+                if isinstance(a, float) and isinstance(b, float): return a + b
+                if isinstance(a, str) and isinstance(b, str): return a + b
+                raise RuntimeError(f"[{operator.line}] Operands must be two numbers or two strings.")
+            return add
+        if kind == SLASH:
+            def divide(frame, upvalues):
+                a, b = left(frame, upvalues), right(frame, upvalues)
+                number_operands(operator, a, b)
+                if b == 0.0: raise RuntimeError(f"[{operator.line}] Error: Division by zero.")
+                return a / b
+            return divide
+        if kind == BANG_EQUAL:
+            def not_equal(frame, upvalues):
+                a, b = left(frame, upvalues), right(frame, upvalues)
+                return b is not None if a is None else not a == b
+            return not_equal
+        if kind == EQUAL_EQUAL:
+            def equal(frame, upvalues):
+                a, b = left(frame, upvalues), right(frame, upvalues)
+                return b is None if a is None else a == b
+            return equal
+        operation = ARITHMETIC.get(kind)
+        if operation is None:
+            def unknown(frame, upvalues):
+                left(frame, upvalues)
+                right(frame, upvalues)
+            return unknown
+        return operation(left, right, operator)
+
+    def visit_call(self, node: Call) -> Code:
+        callee_code, paren = self.expression(node.callee), node.paren
+        argument_codes = tuple(self.expression(argument) for argument in node.arguments)
+        count = len(argument_codes)
+        def call(frame, upvalues):
+            callee = callee_code(frame, upvalues)
+            arguments = [argument(frame, upvalues) for argument in argument_codes]
+            if not isinstance(callee, LoxCallable):
+                raise RuntimeError(f"[{paren.line}] Can only call functions and classes.")
+            if count != callee.arity():
+                raise RuntimeError(f"[{paren.line}] Expected {callee.arity()} arguments but got {count}.")
+            return callee.call(self, arguments)
+        return call
+
+    def visit_get(self, node: Get) -> Code:
+        obj_code, name = self.expression(node.obj), node.name
+        lookup = self.caches.site(node).get
+        def get(frame, upvalues):
+            obj = obj_code(frame, upvalues)
+            if isinstance(obj, LoxInstance):
+                if obj.shape is node.shape: return obj.values[node.slot]
+                return lookup(obj)
+            raise RuntimeError(f"[{name.line}] Only instances have properties.")
+        return get
+
+    def visit_set(self, node: Set) -> Code:
+        obj_code, value_code, name = self.expression(node.obj), self.expression(node.value), node.name
+        store = self.caches.site(node).set
+        def set_(frame, upvalues):
+            obj = obj_code(frame, upvalues)
+            if not isinstance(obj, LoxInstance):
+                raise RuntimeError(f"[{name.line}] Only instances have fields.")
+            value = value_code(frame, upvalues)
+            if obj.shape is node.shape:
+                obj.values[node.slot] = value
+            elif obj.shape is node.before:
+                obj.values.append(value)
+                obj.shape = node.after
+            else:
+                store(obj, value)
+            return value
+        return set_
+
+
+def subtract(left, right, operator):
+    def operate(frame, upvalues):
+        a, b = left(frame, upvalues), right(frame, upvalues)
+        number_operands(operator, a, b)
+        return a - b
+    return operate
+
+
+def multiply(left, right, operator):
+    def operate(frame, upvalues):
+        a, b = left(frame, upvalues), right(frame, upvalues)
+        number_operands(operator, a, b)
+        return a * b
+    return operate
+
+
+def greater(left, right, operator):
+    def operate(frame, upvalues):
+        a, b = left(frame, upvalues), right(frame, upvalues)
+        number_operands(operator, a, b)
+        return a > b
+    return operate
+
+
+def greater_equal(left, right, operator):
+    def operate(frame, upvalues):
+        a, b = left(frame, upvalues), right(frame, upvalues)
+        number_operands(operator, a, b)
+        return a >= b
+    return operate
+
+
+def less(left, right, operator):
+    def operate(frame, upvalues):
+        a, b = left(frame, upvalues), right(frame, upvalues)
+        number_operands(operator, a, b)
+        return a < b
+    return operate
+
+
+def less_equal(left, right, operator):
+    def operate(frame, upvalues):
+        a, b = left(frame, upvalues), right(frame, upvalues)
+        number_operands(operator, a, b)
+        return a <= b
+    return operate
+
+
+# The compilers for the operators whose operands must both be numbers,
+# except division.
+ARITHMETIC = {
+    MINUS: subtract,
+    STAR: multiply,
+    GREATER: greater,
+    GREATER_EQUAL: greater_equal,
+    LESS: less,
+    LESS_EQUAL: less_equal,
+}
+
+
+def unchecked(operation):
+    """The compiler for an operator whose operand types the type inference pass proved."""
+    def compile(left, right, operator):
+        def operate(frame, upvalues):
+            return operation(left(frame, upvalues), right(frame, upvalues))
+        return operate
+    return compile
+
+
+def unchecked_divide(left, right, operator):
+    def operate(frame, upvalues):
+        a, b = left(frame, upvalues), right(frame, upvalues)
+        if b == 0.0: raise RuntimeError(f"[{operator.line}] Error: Division by zero.")
+        return a / b
+    return operate
+
+
+UNCHECKED = {
+    PLUS: unchecked(operations.add),
+    MINUS: unchecked(operations.sub),
+    STAR: unchecked(operations.mul),
+    SLASH: unchecked_divide,
+    GREATER: unchecked(operations.gt),
+    GREATER_EQUAL: unchecked(operations.ge),
+    LESS: unchecked(operations.lt),
+    LESS_EQUAL: unchecked(operations.le),
+}
@@ -6,14 +6,25 @@ from app.parser.ast import (
     Class, Get, Set, This, Super
 )
 from app.evaluation.visitors import Visitor, StmtVisitor
-from app.environment import Environment
+from app.environment import Environment, Cell, UNDEFINED, LOCAL, CELL
 from app.stringify import stringify
 from app.lox_callable import LoxCallable, ReturnValue
 from app.lox_function import LoxFunction
 from app.lox_class import LoxClass
 from app.lox_instance import LoxInstance
-from typing import Dict, Any
-from app.scan_for.tokens import Token
+from app.inline_cache import InlineCaches
+from app.evaluation.quickening import (
+    GenericBinary, GenericUnary, quicken_binary, quicken_unary, quicken_logical
+)
+from typing import Any
+from app.scan_for.tokens import (
+    Token, MINUS, PLUS, SLASH, STAR, BANG, BANG_EQUAL, EQUAL_EQUAL, GREATER,
+    GREATER_EQUAL, LESS, LESS_EQUAL, OR
+)
+
+# How a Lox program that recurses too deeply fails, in every engine.
+RECURSION_MESSAGE = "maximum recursion depth exceeded"
+
 class NativeClock(LoxCallable):
     def arity(self) -> int: return 0
     def call(self, interpreter: Any, arguments: list) -> float: return time.time()
@@ -22,12 +33,13 @@ class NativeClock(LoxCallable):
 class Evaluator(Visitor, StmtVisitor):
     def __init__(self):
         self.globals = Environment()
-        self.environment = self.globals
-        self.locals: Dict[Expr, int] = {}
+        # The slots of the running call, or of a top-level block, and the
+        # cells its closure captured; top-level code has no frame.
+        self.frame = None
+        self.upvalues = ()
         self.globals.define("clock", NativeClock())
-
-    def resolve(self, expr: Expr, depth: int):
-        self.locals[expr] = depth
+        # The inline caches of the property sites that have run.
+        self.caches = InlineCaches()
 
     def evaluate_statements(self, statements: list[Stmt]):
         last_value = None
@@ -37,27 +49,43 @@ class Evaluator(Visitor, StmtVisitor):
                     result = self.execute(statement)
                     if isinstance(statement, Expression):
                         last_value = result
-        except RuntimeError as e: raise e
+        except RecursionError:
+            # Python words this differently depending on where the stack
+            # ran out; every engine reports it the same way.
+            raise RecursionError(RECURSION_MESSAGE) from None
         return last_value
 
     def execute(self, stmt: Stmt): return stmt.accept(self)
     def evaluate(self, expr: Expr): return expr.accept(self)
 
-    def execute_block(self, statements: list[Stmt], environment: Environment):
-        previous = self.environment
+    def execute_body(self, statements: list[Stmt], frame: list, upvalues: tuple):
+        previous = self.frame, self.upvalues
         try:
-            self.environment = environment
+            self.frame, self.upvalues = frame, upvalues
             for statement in statements:
                 self.execute(statement)
         finally:
-            self.environment = previous
-    
-    def _look_up_variable(self, name: Token, expr: Expr):
-        distance = self.locals.get(expr)
-        if distance is not None:
-            return self.environment.get_at(distance, name.lexeme)
-        else:
-            return self.globals.get(name)
+            self.frame, self.upvalues = previous
+
+    def _look_up_variable(self, name: Token, access, slot):
+        if access == LOCAL: return self.frame[slot]
+        if access == CELL: return self.frame[slot].value
+        if access is not None: return self.upvalues[slot].value
+        return self.globals.get(name)
+
+    def _capture(self, upvalues):
+        """The cells a closure of a function with these upvalues holds."""
+        frame, enclosing = self.frame, self.upvalues
+        return tuple(frame[index] if is_local else enclosing[index] for is_local, index in upvalues)
+
+    def _new_function(self, declaration: Function, is_initializer: bool = False, superclass=None):
+        """A closure of a function or method declared in the running frame."""
+        return LoxFunction(declaration, self._capture(declaration.upvalues), is_initializer, superclass=superclass)
+
+    def _declare(self, slot, name: str, value):
+        """Binds a global, or a local in a frame slot, which only unresolved code lacks."""
+        if slot is not None: self.frame[slot] = value
+        elif self.frame is None: self.globals.define(name, value)
 
     # --- MODIFIED: This method now handles inheritance ---
     def visit_class(self, stmt: Class):
@@ -67,35 +95,25 @@ class Evaluator(Visitor, StmtVisitor):
             if not isinstance(superclass, LoxClass):
                 raise RuntimeError(f"[{stmt.superclass.name.line}] Superclass must be a class.")
 
-        self.environment.define(stmt.name.lexeme, None)
-
-        if stmt.superclass is not None:
-            # Create a new environment for the class body that encloses the current scope.
-            self.environment = Environment(self.environment)
-            # Define 'super' in this new environment.
-            self.environment.define("super", superclass)
+        if stmt.slot is not None:
+            # A local class is always kept in a cell, which has to exist
+            # before the methods can capture it.
+            cell = self.frame[stmt.slot] = Cell()
 
         methods = {}
         for method in stmt.methods:
             is_initializer = method.name.lexeme == "init"
-            # The function will capture the environment where 'super' is defined.
-            function = LoxFunction(method, self.environment, is_initializer)
-            methods[method.name.lexeme] = function
-        
-        klass = LoxClass(stmt.name.lexeme, superclass, methods)
-        
-        if superclass is not None:
-            # Pop the environment for the class body.
-            self.environment = self.environment.enclosing
+            # Each call's frame gets the receiver and the superclass.
+            methods[method.name.lexeme] = self._new_function(method, is_initializer, superclass)
 
-        self.environment.assign(stmt.name, klass)
+        klass = LoxClass(stmt.name.lexeme, superclass, methods)
+        if stmt.slot is not None: cell.value = klass
+        else: self._declare(None, stmt.name.lexeme, klass)
 
     # --- NEW: This method handles 'super.method()' calls ---
     def visit_super(self, node: Super):
-        distance = self.locals.get(node)
-        superclass = self.environment.get_at(distance, "super")
-        # 'this' is always in the environment just inside the 'super' environment.
-        instance = self.environment.get_at(distance - 1, "this")
+        superclass = self._look_up_variable(node.keyword, node.access, node.slot)
+        instance = self._look_up_variable(node.keyword, node.this_access, node.this_slot)
         method = superclass.find_method(node.method.lexeme)
 
         if method is None:
@@ -103,17 +121,48 @@ class Evaluator(Visitor, StmtVisitor):
 
         return method.bind(instance)
 
-    def visit_variable(self, node: Variable): return self._look_up_variable(node.name, node)
+    def visit_variable(self, node: Variable):
+        access = node.access
+        if access == LOCAL: return self.frame[node.slot]
+        if access == CELL: return self.frame[node.slot].value
+        if access is not None: return self.upvalues[node.slot].value
+        globals = self.globals
+        if node.stamp == globals.stamp:
+            value = globals.values[node.slot]
+            if value is not UNDEFINED: return value
+        return globals.get_slot(self._global_slot(node), node.name)
+
+    def _global_slot(self, node):
+        """The global slot of an unresolved Variable or Assign, cached on the node."""
+        globals = self.globals
+        if node.stamp != globals.stamp:
+            node.slot = globals.slot(node.name.lexeme)
+            node.stamp = globals.stamp
+        return node.slot
+
     def visit_assign(self, node: Assign):
         value = self.evaluate(node.value)
-        distance = self.locals.get(node)
-        if distance is not None: self.environment.assign_at(distance, node.name, value)
-        else: self.globals.assign(node.name, value)
+        access = node.access
+        if access == LOCAL: self.frame[node.slot] = value
+        elif access == CELL: self.frame[node.slot].value = value
+        elif access is not None: self.upvalues[node.slot].value = value
+        else:
+            globals = self.globals
+            if node.stamp == globals.stamp and globals.values[node.slot] is not UNDEFINED:
+                globals.values[node.slot] = value
+            else:
+                globals.assign_slot(self._global_slot(node), node.name, value)
         return value
 
     def visit_get(self, node: Get):
         obj = self.evaluate(node.obj)
-        if isinstance(obj, LoxInstance): return obj.get(node.name)
+        if isinstance(obj, LoxInstance):
+            # The node knows where the field is for the first shape it read.
+            if obj.shape is node.shape: return obj.values[node.slot]
+            cache = node.cache
+            if not cache or cache.owner is not self.caches:
+                cache = self.caches.site(node)
+            return cache.get(obj)
         raise RuntimeError(f"[{node.name.line}] Only instances have properties.")
 
     def visit_set(self, node: Set):
@@ -121,10 +170,19 @@ class Evaluator(Visitor, StmtVisitor):
         if not isinstance(obj, LoxInstance):
             raise RuntimeError(f"[{node.name.line}] Only instances have fields.")
         value = self.evaluate(node.value)
-        obj.set(node.name, value)
+        if obj.shape is node.shape:
+            obj.values[node.slot] = value
+        elif obj.shape is node.before:
+            obj.values.append(value)
+            obj.shape = node.after
+        else:
+            cache = node.cache
+            if not cache or cache.owner is not self.caches:
+                cache = self.caches.site(node)
+            cache.set(obj, value)
         return value
 
-    def visit_this(self, node: This): return self._look_up_variable(node.keyword, node)
+    def visit_this(self, node: This): return self._look_up_variable(node.keyword, node.access, node.slot)
     def visit_while(self, stmt: While):
         while self._is_truthy(self.evaluate(stmt.condition)): self.execute(stmt.body)
 
@@ -138,8 +196,12 @@ class Evaluator(Visitor, StmtVisitor):
         return callee.call(self, arguments)
 
     def visit_function(self, stmt: Function):
-        function = LoxFunction(stmt, self.environment, False)
-        self.environment.define(stmt.name.lexeme, function)
+        if stmt.slot is None:
+            self._declare(None, stmt.name.lexeme, self._new_function(stmt))
+            return
+        # A local function is always kept in a cell, so it can capture itself.
+        cell = self.frame[stmt.slot] = Cell()
+        cell.value = self._new_function(stmt)
 
     def visit_return(self, stmt: Return):
         value = None
@@ -147,8 +209,9 @@ class Evaluator(Visitor, StmtVisitor):
         raise ReturnValue(value)
 
     def visit_logical(self, node: Logical):
+        if type(node) is Logical: quicken_logical(node)
         left = self.evaluate(node.left)
-        if node.operator.type == 'OR':
+        if node.operator.kind == OR:
             if self._is_truthy(left): return left
         else: # AND
             if not self._is_truthy(left): return left
@@ -157,9 +220,17 @@ class Evaluator(Visitor, StmtVisitor):
     def visit_var(self, stmt: Var):
         value = None
         if stmt.initializer is not None: value = self.evaluate(stmt.initializer)
-        self.environment.define(stmt.name.lexeme, value)
+        self._declare(stmt.slot, stmt.name.lexeme, Cell(value) if stmt.cell else value)
+
+    def visit_block(self, stmt: Block):
+        # Only the outermost blocks of top-level code have a frame of their
+        # own; unresolved blocks get an empty one their locals never reach.
+        if stmt.size == 0:
+            for statement in stmt.statements:
+                self.execute(statement)
+        else:
+            self.execute_body(stmt.statements, [None] * (stmt.size or 0), self.upvalues)
 
-    def visit_block(self, stmt: Block): self.execute_block(stmt.statements, Environment(self.environment))
     def visit_if(self, stmt: If):
         if self._is_truthy(self.evaluate(stmt.condition)): self.execute(stmt.then_branch)
         elif stmt.else_branch is not None: self.execute(stmt.else_branch)
@@ -174,47 +245,178 @@ class Evaluator(Visitor, StmtVisitor):
 
     def visit_unary(self, node: Unary):
         right = self.evaluate(node.right)
-        op_type = node.operator.type
-        if op_type == 'MINUS':
+        if type(node) is Unary: quicken_unary(node, right)
+        return self._unary(node, right)
+
+    def _unary(self, node: Unary, right):
+        op_type = node.operator.kind
+        if op_type == MINUS:
             self._check_number_operand(node.operator, right)
             return -float(right)
-        if op_type == 'BANG': return not self._is_truthy(right)
+        if op_type == BANG: return not self._is_truthy(right)
         return None
 
     def visit_binary(self, node: Binary):
         left = self.evaluate(node.left)
         right = self.evaluate(node.right)
-        op_type = node.operator.type
-        if op_type == 'MINUS':
+        if type(node) is Binary: quicken_binary(node, left, right)
+        return self._binary(node, left, right)
+
+    def _binary(self, node: Binary, left, right):
+        op_type = node.operator.kind
+        if op_type == MINUS:
             self._check_number_operands(node.operator, left, right)
             return float(left) - float(right)
-        if op_type == 'SLASH':
+        if op_type == SLASH:
             self._check_number_operands(node.operator, left, right)
             if float(right) == 0.0: raise RuntimeError(f"[{node.operator.line}] Error: Division by zero.")
             return float(left) / float(right)
-        if op_type == 'STAR':
+        if op_type == STAR:
             self._check_number_operands(node.operator, left, right)
             return float(left) * float(right)
-        if op_type == 'PLUS':
+        if op_type == PLUS:
             if isinstance(left, float) and isinstance(right, float): return left + right
             if isinstance(left, str) and isinstance(right, str): return left + right
             raise RuntimeError(f"[{node.operator.line}] Operands must be two numbers or two strings.")
-        if op_type == 'GREATER':
+        if op_type == GREATER:
             self._check_number_operands(node.operator, left, right)
             return left > right
-        if op_type == 'GREATER_EQUAL':
+        if op_type == GREATER_EQUAL:
             self._check_number_operands(node.operator, left, right)
             return left >= right
-        if op_type == 'LESS':
+        if op_type == LESS:
             self._check_number_operands(node.operator, left, right)
             return left < right
-        if op_type == 'LESS_EQUAL':
+        if op_type == LESS_EQUAL:
             self._check_number_operands(node.operator, left, right)
             return left <= right
-        if op_type == 'BANG_EQUAL': return not self._is_equal(left, right)
-        if op_type == 'EQUAL_EQUAL': return self._is_equal(left, right)
+        if op_type == BANG_EQUAL: return not self._is_equal(left, right)
+        if op_type == EQUAL_EQUAL: return self._is_equal(left, right)
         return None 
 
+    # --- Quickened nodes; see app/evaluation/quickening.py ---
+
+    def _despecialize(self, node: Binary, left, right):
+        """A guard failed: the node goes back to the generic path for good."""
+        node.__class__ = GenericBinary
+        return self._binary(node, left, right)
+
+    def visit_float_add(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if left.__class__ is float and right.__class__ is float: return left + right
+        return self._despecialize(node, left, right)
+
+    def visit_string_concat(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if left.__class__ is str and right.__class__ is str: return left + right
+        return self._despecialize(node, left, right)
+
+    def visit_float_subtract(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if left.__class__ is float and right.__class__ is float: return left - right
+        return self._despecialize(node, left, right)
+
+    def visit_float_multiply(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if left.__class__ is float and right.__class__ is float: return left * right
+        return self._despecialize(node, left, right)
+
+    def visit_float_divide(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if left.__class__ is float and right.__class__ is float and right != 0.0: return left / right
+        return self._despecialize(node, left, right)
+
+    def visit_float_less(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if left.__class__ is float and right.__class__ is float: return left < right
+        return self._despecialize(node, left, right)
+
+    def visit_float_less_equal(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if left.__class__ is float and right.__class__ is float: return left <= right
+        return self._despecialize(node, left, right)
+
+    def visit_float_greater(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if left.__class__ is float and right.__class__ is float: return left > right
+        return self._despecialize(node, left, right)
+
+    def visit_float_greater_equal(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if left.__class__ is float and right.__class__ is float: return left >= right
+        return self._despecialize(node, left, right)
+
+    def visit_equal(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        return right is None if left is None else left == right
+
+    def visit_not_equal(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        return right is not None if left is None else not left == right
+
+    # Operands the type inference pass proved need no guard.
+
+    def visit_unchecked_add(self, node: Binary):
+        return node.left.accept(self) + node.right.accept(self)
+
+    def visit_unchecked_subtract(self, node: Binary):
+        return node.left.accept(self) - node.right.accept(self)
+
+    def visit_unchecked_multiply(self, node: Binary):
+        return node.left.accept(self) * node.right.accept(self)
+
+    def visit_unchecked_divide(self, node: Binary):
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if right == 0.0: raise RuntimeError(f"[{node.operator.line}] Error: Division by zero.")
+        return left / right
+
+    def visit_unchecked_less(self, node: Binary):
+        return node.left.accept(self) < node.right.accept(self)
+
+    def visit_unchecked_less_equal(self, node: Binary):
+        return node.left.accept(self) <= node.right.accept(self)
+
+    def visit_unchecked_greater(self, node: Binary):
+        return node.left.accept(self) > node.right.accept(self)
+
+    def visit_unchecked_greater_equal(self, node: Binary):
+        return node.left.accept(self) >= node.right.accept(self)
+
+    def visit_unchecked_negate(self, node: Unary):
+        return -node.right.accept(self)
+
+    def visit_float_negate(self, node: Unary):
+        right = node.right.accept(self)
+        if right.__class__ is float: return -right
+        node.__class__ = GenericUnary
+        return self._unary(node, right)
+
+    def visit_not(self, node: Unary):
+        right = node.right.accept(self)
+        return right is None or right is False
+
+    def visit_and(self, node: Logical):
+        left = node.left.accept(self)
+        if left is None or left is False: return left
+        return node.right.accept(self)
+
+    def visit_or(self, node: Logical):
+        left = node.left.accept(self)
+        if left is None or left is False: return node.right.accept(self)
+        return left
+
     def _is_truthy(self, obj):
         if obj is None: return False
         if isinstance(obj, bool): return obj
@@ -0,0 +1,168 @@
+"""
+Specialized forms the Evaluator rewrites Binary, Unary and Logical nodes
+into once it has run them. A quickened node keeps its fields and only
+changes class, so its `accept` goes straight to the visitor method for
+the operation and the operand types it has seen. Visitors other than the
+Evaluator get the default methods in Visitor, which treat the node as
+the Binary, Unary or Logical it came from.
+
+Each variant with a guard on its operand types falls back to the generic
+path when the guard fails, and the node becomes Generic for good so it
+does not flip between forms. Operators whose operand types the type
+inference pass proved become Unchecked forms, which need no guard.
+"""
+from app.parser.ast import Binary, Unary, Logical
+from app.scan_for.tokens import (
+    MINUS, PLUS, SLASH, STAR, BANG, BANG_EQUAL, EQUAL_EQUAL, GREATER,
+    GREATER_EQUAL, LESS, LESS_EQUAL, OR
+)
+
+
+class GenericBinary(Binary):
+    """A Binary whose operand types changed after it was quickened."""
+    __slots__ = ()
+
+class FloatAdd(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_float_add(self)
+
+class StringConcat(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_string_concat(self)
+
+class FloatSubtract(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_float_subtract(self)
+
+class FloatMultiply(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_float_multiply(self)
+
+class FloatDivide(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_float_divide(self)
+
+class FloatLess(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_float_less(self)
+
+class FloatLessEqual(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_float_less_equal(self)
+
+class FloatGreater(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_float_greater(self)
+
+class FloatGreaterEqual(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_float_greater_equal(self)
+
+class Equal(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_equal(self)
+
+class NotEqual(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_not_equal(self)
+
+
+class UncheckedAdd(Binary):
+    """Numbers or strings, proven."""
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_unchecked_add(self)
+
+class UncheckedSubtract(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_unchecked_subtract(self)
+
+class UncheckedMultiply(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_unchecked_multiply(self)
+
+class UncheckedDivide(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_unchecked_divide(self)
+
+class UncheckedLess(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_unchecked_less(self)
+
+class UncheckedLessEqual(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_unchecked_less_equal(self)
+
+class UncheckedGreater(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_unchecked_greater(self)
+
+class UncheckedGreaterEqual(Binary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_unchecked_greater_equal(self)
+
+
+class GenericUnary(Unary):
+    """A Unary whose operand type changed after it was quickened."""
+    __slots__ = ()
+
+class FloatNegate(Unary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_float_negate(self)
+
+class UncheckedNegate(Unary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_unchecked_negate(self)
+
+class Not(Unary):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_not(self)
+
+
+class And(Logical):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_and(self)
+
+class Or(Logical):
+    __slots__ = ()
+    def accept(self, visitor): return visitor.visit_or(self)
+
+
+FLOAT_BINARIES = {
+    PLUS: FloatAdd, MINUS: FloatSubtract, STAR: FloatMultiply, SLASH: FloatDivide,
+    LESS: FloatLess, LESS_EQUAL: FloatLessEqual, GREATER: FloatGreater, GREATER_EQUAL: FloatGreaterEqual,
+}
+UNCHECKED_BINARIES = {
+    PLUS: UncheckedAdd, MINUS: UncheckedSubtract, STAR: UncheckedMultiply, SLASH: UncheckedDivide,
+    LESS: UncheckedLess, LESS_EQUAL: UncheckedLessEqual, GREATER: UncheckedGreater,
+    GREATER_EQUAL: UncheckedGreaterEqual,
+}
+EQUALITIES = {EQUAL_EQUAL: Equal, BANG_EQUAL: NotEqual}
+
+
+def quicken_binary(node: Binary, left, right):
+    """Specializes a Binary for the operands it was just run with, if it has a form for them."""
+    kind = node.operator.kind
+    variant = EQUALITIES.get(kind)
+    if variant is None and node.operands is not None:
+        variant = UNCHECKED_BINARIES.get(kind)
+    if variant is None:
+        if left.__class__ is float and right.__class__ is float:
+            variant = FLOAT_BINARIES.get(kind)
+        elif kind == PLUS and left.__class__ is str and right.__class__ is str:
+            variant = StringConcat
+    if variant is not None:
+        node.__class__ = variant
+
+
+def quicken_unary(node: Unary, right):
+    kind = node.operator.kind
+    if kind == BANG:
+        node.__class__ = Not
+    elif kind == MINUS and node.operands is not None:
+        node.__class__ = UncheckedNegate
+    elif kind == MINUS and right.__class__ is float:
+        node.__class__ = FloatNegate
+
+
+def quicken_logical(node: Logical):
+    node.__class__ = Or if node.operator.kind == OR else And
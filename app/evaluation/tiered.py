@@ -0,0 +1,171 @@
+import sys
+from typing import Dict, List, Optional
+from app.parser.ast import Function, While
+from app.evaluation.evaluator import Evaluator
+from app.evaluation.transpiler import PythonEvaluator, Definition
+from app.lox_callable import ReturnValue
+from app.lox_function import LoxFunction
+from app.lox_instance import LoxInstance
+
+# A function is compiled on the call after it has been called this many
+# times, or after loops in its body have gone round this many times.
+CALL_THRESHOLD = 100
+LOOP_THRESHOLD = 1000
+
+
+class Profile:
+    """
+    What the tiered evaluator has seen of one function declaration, which
+    all closures of it share.
+    """
+    __slots__ = ('declaration', 'calls', 'back_edges', 'definition', 'failed')
+
+    def __init__(self, declaration: Function):
+        self.declaration = declaration
+        self.calls = 0
+        self.back_edges = 0
+        # The translation once compiled, or why it could not be.
+        self.definition: Optional[Definition] = None
+        self.failed: Optional[str] = None
+
+    @property
+    def hot(self) -> bool:
+        return self.calls >= CALL_THRESHOLD or self.back_edges >= LOOP_THRESHOLD
+
+    def describe(self) -> str:
+        name = self.declaration.name
+        return f"'{name.lexeme}' (line {name.line})"
+
+
+class TieredFunction(LoxFunction):
+    """
+    A LoxFunction that counts its calls and, once its declaration is hot,
+    runs the Python translation of it instead of walking its body.
+    """
+    def __init__(self, declaration: Function, upvalues: tuple, is_initializer: bool,
+                 receiver: LoxInstance = None, superclass=None, profile: Profile = None):
+        super().__init__(declaration, upvalues, is_initializer, receiver, superclass)
+        self.profile = profile
+
+    def call(self, interpreter, arguments: list):
+        profile = self.profile
+        definition = profile.definition
+        if definition is None:
+            profile.calls += 1
+            if profile.hot and profile.failed is None:
+                definition = interpreter.tier_up(self)
+        if definition is not None:
+            code = definition.code
+            if self.receiver is None:
+                return code(self.upvalues, *arguments)
+            if self.superclass is None:
+                result = code(self.upvalues, self.receiver, *arguments)
+            else:
+                result = code(self.upvalues, self.receiver, self.superclass, *arguments)
+            return self.receiver if self.is_initializer else result
+
+        previous = interpreter.profile
+        interpreter.profile = profile
+        try:
+            return super().call(interpreter, arguments)
+        finally:
+            interpreter.profile = previous
+
+    def bind(self, instance: LoxInstance):
+        return TieredFunction(self.declaration, self.upvalues, self.is_initializer,
+                              instance, self.superclass, self.profile)
+
+
+class TieredEvaluator(Evaluator):
+    """
+    The tree walker, with hot code handed over to the Python translation
+    of --engine=python. Calls of each function declaration and iterations
+    of loops are counted; a function is compiled once it crosses a
+    threshold, and a loop that runs long enough is compiled in the middle
+    of running and carries on from its next iteration.
+
+    The translation keeps every runtime check, so compiled code never has
+    to leave for the tree walker. What it cannot take is code Python will
+    not compile, such as loops nested too deeply; that stays with the tree
+    walker for good. Every decision is recorded in `events` and, with
+    `trace` set, written to stderr as it is made.
+    """
+    def __init__(self):
+        super().__init__()
+        # Compiled code shares the inline caches of the sites the tree walker ran.
+        self.python = PythonEvaluator(self.globals, self, self.caches)
+        self.profiles: Dict[Function, Profile] = {}
+        # The profile of the function being walked, which loops count into.
+        self.profile: Optional[Profile] = None
+        # Compiled loops by statement and frame size; None if they failed.
+        self.loops: Dict[tuple, object] = {}
+        self.events: List[str] = []
+        self.trace = False
+
+    def record(self, event: str):
+        self.events.append(event)
+        if self.trace:
+            print(f"[tier] {event}", file=sys.stderr)
+
+    def _new_function(self, declaration: Function, is_initializer: bool = False, superclass=None):
+        profile = self.profiles.get(declaration)
+        if profile is None:
+            profile = self.profiles[declaration] = Profile(declaration)
+        return TieredFunction(declaration, self._capture(declaration.upvalues), is_initializer,
+                              superclass=superclass, profile=profile)
+
+    def tier_up(self, function: TieredFunction) -> Optional[Definition]:
+        """Compiles a hot function's declaration; returns None if it has to stay interpreted."""
+        profile = function.profile
+        if function.receiver is None:
+            prefix = ()
+        else:
+            prefix = ("this",) if function.superclass is None else ("this", "super")
+        try:
+            # A hot function has been called, so a lazily parsed body has been
+            # parsed and resolved by now.
+            profile.definition = self.python.compile_function(function.declaration, prefix)
+        except (SyntaxError, RecursionError, MemoryError) as error:
+            profile.failed = f"{type(error).__name__}: {error}"
+            self.record(f"{profile.describe()} stays interpreted: {profile.failed}")
+            return None
+        reason = f"{profile.calls} calls" if profile.calls >= CALL_THRESHOLD \
+            else f"{profile.back_edges} loop iterations"
+        self.record(f"compiled {profile.describe()} after {reason}")
+        return profile.definition
+
+    def visit_while(self, stmt: While):
+        count = 0
+        try:
+            while self._is_truthy(self.evaluate(stmt.condition)):
+                self.execute(stmt.body)
+                count += 1
+                if count == LOOP_THRESHOLD:
+                    loop = self.compile_loop(stmt)
+                    if loop is not None:
+                        result = loop(self.upvalues, self.frame)
+                        if result is not None:
+                            raise ReturnValue(result[0])
+                        return
+        finally:
+            if self.profile is not None:
+                self.profile.back_edges += count
+
+    def compile_loop(self, stmt: While):
+        """The compiled form of a loop running with the current frame; None if it has to stay interpreted."""
+        size = 0 if self.frame is None else len(self.frame)
+        key = (stmt, size)
+        if key in self.loops:
+            return self.loops[key]
+        where = "at top level" if self.profile is None else f"in {self.profile.describe()}"
+        try:
+            loop = self.python.compile_loop(stmt, size)
+            self.record(f"compiled a loop {where} after {LOOP_THRESHOLD} iterations")
+        except (SyntaxError, RecursionError, MemoryError) as error:
+            loop = None
+            self.record(f"a loop {where} stays interpreted: {type(error).__name__}: {error}")
+        self.loops[key] = loop
+        return loop
+
+    def translate_lazy(self, definition: Definition):
+        return self.python.translate_lazy(definition)
@@ -0,0 +1,635 @@
+from typing import List, Tuple
+from app.parser.ast import (
+    Expr, Stmt, Print, Expression, Literal, Grouping, Unary, Binary, Var,
+    Variable, Assign, Block, If, Logical, While, Call, Function, Return,
+    Class, Get, Set, This, Super
+)
+from app.evaluation.visitors import Visitor, StmtVisitor
+from app.evaluation.evaluator import NativeClock, RECURSION_MESSAGE
+from app.environment import Environment, Cell, UNDEFINED, LOCAL, CELL
+from app.stringify import stringify
+from app.lox_callable import LoxCallable
+from app.lox_function import LoxFunction
+from app.lox_class import LoxClass
+from app.lox_instance import LoxInstance
+from app.inline_cache import InlineCaches
+from app.parser.lazy import LazyBody
+from app.resolver.resolver import compile_lazy
+from app.scan_for import tokens
+from app.inference import NUMBER
+
+# What the transpiler knows about the value of a Python expression it
+# generated: a float, a bool, a string, or anything.
+FLOAT, BOOL, STRING, ANY = range(4)
+
+COMPARISONS = {tokens.GREATER: '>', tokens.GREATER_EQUAL: '>=', tokens.LESS: '<', tokens.LESS_EQUAL: '<='}
+ARITHMETIC = {tokens.MINUS: '-', tokens.STAR: '*', tokens.SLASH: '/'}
+
+
+class Definition:
+    """
+    A Lox function declaration and the Python function it was translated
+    to, which is None until a lazily parsed body is first called.
+    """
+    __slots__ = ('declaration', 'name', 'prefix', 'code')
+
+    def __init__(self, declaration: Function, name: str, prefix: tuple):
+        self.declaration = declaration
+        self.name = name
+        # The parameters before the arguments: the receiver and the
+        # superclass of a method, whose frame starts with them.
+        self.prefix = prefix
+        self.code = None
+
+
+class PyFunction(LoxFunction):
+    """
+    A LoxFunction whose calls run its translation. The Python function
+    takes the upvalues, then the receiver and superclass of a method, then
+    the arguments.
+    """
+    def __init__(self, definition: Definition, upvalues: tuple, is_initializer: bool,
+                 receiver: LoxInstance = None, superclass=None):
+        super().__init__(definition.declaration, upvalues, is_initializer, receiver, superclass)
+        self.definition = definition
+
+    def call(self, interpreter, arguments: list):
+        code = self.definition.code or interpreter.translate_lazy(self.definition)
+        if self.receiver is None:
+            return code(self.upvalues, *arguments)
+        if self.superclass is None:
+            result = code(self.upvalues, self.receiver, *arguments)
+        else:
+            result = code(self.upvalues, self.receiver, self.superclass, *arguments)
+        return self.receiver if self.is_initializer else result
+
+    def bind(self, instance: LoxInstance):
+        return PyFunction(self.definition, self.upvalues, self.is_initializer, instance, self.superclass)
+
+
+# --- Helpers the generated code calls for the slower paths. ---
+
+def call_value(interpreter, callee, arguments: list, line: int):
+    if not isinstance(callee, LoxCallable):
+        raise RuntimeError(f"[{line}] Can only call functions and classes.")
+    if len(arguments) != callee.arity():
+        raise RuntimeError(f"[{line}] Expected {callee.arity()} arguments but got {len(arguments)}.")
+    return callee.call(interpreter, arguments)
+
+
+def get_property(obj, site: Get):
+    """A Get whose object is not an instance of the shape the site first read."""
+    if isinstance(obj, LoxInstance): return site.cache.get(obj)
+    raise RuntimeError(f"[{site.name.line}] Only instances have properties.")
+
+
+def set_property(obj: LoxInstance, site: Set, value):
+    """A Set that is not a write to a field whose slot the site knows."""
+    if obj.shape is site.before:
+        obj.values.append(value)
+        obj.shape = site.after
+    else:
+        site.cache.set(obj, value)
+
+
+def get_super(superclass, instance, method):
+    function = superclass.find_method(method.lexeme)
+    if function is None:
+        raise RuntimeError(f"[{method.line}] Undefined property '{method.lexeme}'.")
+    return function.bind(instance)
+
+
+def make_class(name: str, superclass, line: int, methods):
+    """Builds a class from (name, definition, upvalues) for each method."""
+    if superclass is not None and not isinstance(superclass, LoxClass):
+        raise RuntimeError(f"[{line}] Superclass must be a class.")
+    functions = {}
+    for method_name, definition, upvalues in methods:
+        functions[method_name] = PyFunction(definition, upvalues, method_name == "init", superclass=superclass)
+    return LoxClass(name, superclass, functions)
+
+
+def undefined(name):
+    raise RuntimeError(f"[{name.line}] Undefined variable '{name.lexeme}'.")
+
+
+def operands_error(line: int):
+    raise RuntimeError(f"[{line}] Operands must be numbers.")
+
+
+class Transpiler(Visitor, StmtVisitor):
+    """
+    Translates a resolved program to Python source. Every Lox function
+    becomes a top-level Python function, and so does top-level code; Lox
+    locals become Python locals named after their frame slots, holding a
+    Cell when captured, and globals are indexed in `G` by their slot in
+    the global table.
+
+    Expressions are flattened into statements on temporaries, so operands
+    are evaluated in Lox order and each check raises exactly where the
+    Evaluator would. A visit returns a side-effect free Python expression
+    for the value, along with what is known about it; checks that what
+    is known makes unnecessary are left out.
+    """
+    def __init__(self, globals: Environment, constants: list, definitions: list, caches: InlineCaches):
+        self.globals = globals
+        # Tokens and other values the generated code refers to as K[i] and
+        # D[i], shared by everything translated for one program.
+        self.constants = constants
+        self.definitions = definitions
+        # The inline caches of the property sites translated.
+        self.caches = caches
+        self.functions: List[List[str]] = []
+        self.lines: List[str] = []
+        self.indent = 1
+        self.temps = 0
+        # Whether a return leaves a loop the tree walker handed over, which
+        # gives the value back as a 1-tuple.
+        self.boxed_returns = False
+
+    # --- Output ---
+
+    def emit(self, line: str):
+        self.lines.append("    " * self.indent + line)
+
+    def temp(self) -> str:
+        self.temps += 1
+        return f"t{self.temps}"
+
+    def constant(self, value) -> str:
+        self.constants.append(value)
+        return f"K[{len(self.constants) - 1}]"
+
+    def begin_function(self, header: str):
+        """Starts a new Python function; returns the state to restore with end_function."""
+        state = (self.lines, self.indent, self.temps, self.boxed_returns)
+        self.lines, self.indent, self.temps, self.boxed_returns = [header], 1, 0, False
+        return state
+
+    def end_function(self, state):
+        if len(self.lines) == 1:
+            self.emit("pass")
+        self.functions.append(self.lines)
+        self.lines, self.indent, self.temps, self.boxed_returns = state
+
+    def source(self) -> str:
+        return "\n\n".join("\n".join(lines) for lines in self.functions) + "\n"
+
+    def body(self, statements: List[Stmt]):
+        """Emits an indented block, which Python requires not to be empty."""
+        self.indent += 1
+        start = len(self.lines)
+        for statement in statements:
+            if statement: self.statement(statement)
+        if len(self.lines) == start:
+            self.emit("pass")
+        self.indent -= 1
+
+    # --- Entry points ---
+
+    def translate_script(self, statements: List[Stmt], name: str = "script"):
+        state = self.begin_function(f"def {name}(U):")
+        for statement in statements:
+            if statement: self.statement(statement)
+        self.end_function(state)
+
+    def translate_function(self, definition: Definition):
+        declaration = definition.declaration
+        count = len(definition.prefix) + len(declaration.params)
+        params = ", ".join(["U", *(f"s{slot}" for slot in range(count))])
+        state = self.begin_function(f"def {definition.name}({params}):")
+        for slot in declaration.cells:
+            self.emit(f"s{slot} = Cell(s{slot})")
+        for statement in declaration.body:
+            if statement: self.statement(statement)
+        self.end_function(state)
+
+    def translate_loop(self, stmt: While, name: str, size: int):
+        """
+        A loop the tree walker is running, as a function of the upvalues and
+        the frame it runs with, which takes over from the next iteration.
+        The frame's slots are loaded into locals and stored back on the way
+        out; a return from the enclosing function comes back as a 1-tuple.
+        """
+        slots = "".join(f"s{slot}, " for slot in range(size))
+        state = self.begin_function(f"def {name}(U, F):")
+        self.boxed_returns = True
+        if size:
+            self.emit(f"{slots}= F")
+            self.emit("try:")
+            self.indent += 1
+        self.statement(stmt)
+        if size:
+            self.indent -= 1
+            self.emit("finally:")
+            self.emit(f"    F[:] = [{slots.rstrip(', ')}]")
+        self.end_function(state)
+
+    def define(self, declaration: Function, prefix: tuple = ()) -> str:
+        """Translates a function, unless its body is lazy; returns how the generated code refers to it."""
+        index = len(self.definitions)
+        definition = Definition(declaration, f"f{index}_{declaration.name.lexeme}", prefix)
+        self.definitions.append(definition)
+        if isinstance(declaration.body, LazyBody):
+            self.functions.append([f"# {definition.name}: translated on its first call"])
+        else:
+            self.translate_function(definition)
+        return f"D[{index}]"
+
+    def capture(self, declaration: Function) -> str:
+        items = [f"s{index}" if is_local else f"U[{index}]" for is_local, index in declaration.upvalues]
+        return f"({', '.join(items)},)" if items else "()"
+
+    def statement(self, stmt: Stmt): stmt.accept(self)
+    def expression(self, expr: Expr) -> Tuple[str, int]: return expr.accept(self)
+
+    def value(self, expr: Expr, later: List[Expr]) -> Tuple[str, int]:
+        """
+        Translates an operand. A bare local is only safe to refer to by name
+        if the operands evaluated after it cannot assign to it first.
+        """
+        code, kind = self.expression(expr)
+        if code.startswith("s") and assigns(later):
+            temp = self.temp()
+            self.emit(f"{temp} = {code}")
+            code = temp
+        return code, kind
+
+    def truthy(self, code: str, kind: int) -> str:
+        if kind == BOOL: return code
+        if kind == FLOAT or kind == STRING: return "True"
+        if code == "None": return "False"
+        return f"({code} is not None and {code} is not False)"
+
+    # --- Variables ---
+
+    def load(self, name, access, slot) -> Tuple[str, int]:
+        if access == LOCAL:
+            return f"s{slot}", ANY
+        temp = self.temp()
+        if access == CELL:
+            self.emit(f"{temp} = s{slot}.value")
+        elif access is not None:
+            self.emit(f"{temp} = U[{slot}].value")
+        else:
+            self.emit(f"{temp} = G[{self.globals.slot(name.lexeme)}]")
+            self.emit(f"if {temp} is UNDEFINED: undefined({self.constant(name)})")
+        return temp, ANY
+
+    def visit_variable(self, node: Variable): return self.load(node.name, node.access, node.slot)
+    def visit_this(self, node: This): return self.load(node.keyword, node.access, node.slot)
+
+    def visit_assign(self, node: Assign):
+        code, kind = self.expression(node.value)
+        access, slot = node.access, node.slot
+        if access == LOCAL:
+            self.emit(f"s{slot} = {code}")
+            return f"s{slot}", kind
+        if access == CELL:
+            self.emit(f"s{slot}.value = {code}")
+        elif access is not None:
+            self.emit(f"U[{slot}].value = {code}")
+        else:
+            index = self.globals.slot(node.name.lexeme)
+            self.emit(f"if G[{index}] is UNDEFINED: undefined({self.constant(node.name)})")
+            self.emit(f"G[{index}] = {code}")
+        return code, kind
+
+    def visit_super(self, node: Super):
+        superclass, _ = self.load(node.keyword, node.access, node.slot)
+        instance, _ = self.load(node.keyword, node.this_access, node.this_slot)
+        temp = self.temp()
+        self.emit(f"{temp} = get_super({superclass}, {instance}, {self.constant(node.method)})")
+        return temp, ANY
+
+    # --- Statements ---
+
+    def declare(self, slot, name, code: str, boxed: bool):
+        if slot is None:
+            self.emit(f"G[{self.globals.slot(name.lexeme)}] = {code}")
+        elif boxed:
+            self.emit(f"s{slot} = Cell({code})")
+        else:
+            self.emit(f"s{slot} = {code}")
+
+    def visit_var(self, stmt: Var):
+        code = "None"
+        if stmt.initializer is not None:
+            code, _ = self.expression(stmt.initializer)
+        self.declare(stmt.slot, stmt.name, code, stmt.cell)
+
+    def visit_expression(self, stmt: Expression):
+        self.expression(stmt.expression)
+
+    def visit_print(self, stmt: Print):
+        code, _ = self.expression(stmt.expression)
+        self.emit(f"print(stringify({code}))")
+
+    def visit_block(self, stmt: Block):
+        for statement in stmt.statements:
+            if statement: self.statement(statement)
+
+    def visit_if(self, stmt: If):
+        code, kind = self.expression(stmt.condition)
+        self.emit(f"if {self.truthy(code, kind)}:")
+        self.body([stmt.then_branch])
+        if stmt.else_branch is not None:
+            self.emit("else:")
+            self.body([stmt.else_branch])
+
+    def visit_while(self, stmt: While):
+        # A condition that needs statements of its own is tested inside the loop.
+        self.emit("while True:")
+        self.indent += 1
+        code, kind = self.expression(stmt.condition)
+        self.emit(f"if not {self.truthy(code, kind)}: break")
+        self.indent -= 1
+        self.body([stmt.body])
+
+    def visit_return(self, stmt: Return):
+        code = "None"
+        if stmt.value is not None:
+            code, _ = self.expression(stmt.value)
+        self.emit(f"return ({code},)" if self.boxed_returns else f"return {code}")
+
+    def visit_function(self, stmt: Function):
+        function = f"PyFunction({self.define(stmt)}, {self.capture(stmt)}, False)"
+        if stmt.slot is None:
+            self.emit(f"G[{self.globals.slot(stmt.name.lexeme)}] = {function}")
+            return
+        # A local function is always kept in a cell, so it can capture itself.
+        self.emit(f"s{stmt.slot} = Cell()")
+        self.emit(f"s{stmt.slot}.value = {function}")
+
+    def visit_class(self, stmt: Class):
+        superclass, line = "None", stmt.name.line
+        if stmt.superclass is not None:
+            superclass, _ = self.expression(stmt.superclass)
+            line = stmt.superclass.name.line
+        if stmt.slot is not None:
+            # A local class is always kept in a cell, which has to exist
+            # before the methods can capture it.
+            self.emit(f"s{stmt.slot} = Cell()")
+        methods = []
+        prefix = ("this", "super") if stmt.superclass is not None else ("this",)
+        for method in stmt.methods:
+            methods.append(f"({method.name.lexeme!r}, {self.define(method, prefix)}, {self.capture(method)})")
+        klass = f"make_class({stmt.name.lexeme!r}, {superclass}, {line}, [{', '.join(methods)}])"
+        if stmt.slot is None:
+            self.emit(f"G[{self.globals.slot(stmt.name.lexeme)}] = {klass}")
+        else:
+            self.emit(f"s{stmt.slot}.value = {klass}")
+
+    # --- Expressions ---
+
+    def visit_literal(self, node: Literal):
+        value = node.value
+        if isinstance(value, float):
+            if value != value or value in (float('inf'), float('-inf')):
+                return self.constant(value), FLOAT
+            # A negative number is parenthesized, so its attributes can be taken.
+            code = repr(value)
+            return f"({code})" if code.startswith("-") else code, FLOAT
+        if isinstance(value, bool):
+            return repr(value), BOOL
+        if isinstance(value, str):
+            return repr(value), STRING
+        return repr(value), ANY
+
+    def visit_grouping(self, node: Grouping):
+        return self.expression(node.expression)
+
+    def visit_logical(self, node: Logical):
+        left, kind = self.expression(node.left)
+        temp = self.temp()
+        self.emit(f"{temp} = {left}")
+        test = self.truthy(temp, kind)
+        self.emit(f"if {test}:" if node.operator.kind == tokens.AND else f"if not {test}:")
+        self.indent += 1
+        right, right_kind = self.expression(node.right)
+        self.emit(f"{temp} = {right}")
+        self.indent -= 1
+        return temp, kind if kind == right_kind else ANY
+
+    def visit_unary(self, node: Unary):
+        code, kind = self.expression(node.right)
+        if node.operands is not None:
+            kind = FLOAT
+        temp = self.temp()
+        if node.operator.kind == tokens.MINUS:
+            if kind != FLOAT:
+                self.emit(f"if {code}.__class__ is not float: "
+                          f"raise RuntimeError('[{node.operator.line}] Operand must be a number.')")
+            self.emit(f"{temp} = -{code}")
+            return temp, FLOAT
+        if node.operator.kind == tokens.BANG:
+            self.emit(f"{temp} = not {self.truthy(code, kind)}")
+            return temp, BOOL
+        return "None", ANY
+
+    def visit_binary(self, node: Binary):
+        left, left_kind = self.value(node.left, [node.right])
+        right, right_kind = self.expression(node.right)
+        if node.operands is not None:
+            # Proven by the type inference pass.
+            left_kind = right_kind = FLOAT if node.operands == NUMBER else STRING
+        kind, line, temp = node.operator.kind, node.operator.line, self.temp()
+        if kind == tokens.PLUS:
+            return self.add(left, left_kind, right, right_kind, line, temp)
+        if kind == tokens.EQUAL_EQUAL or kind == tokens.BANG_EQUAL:
+            self.emit(f"{temp} = {equal(left, right)}" if kind == tokens.EQUAL_EQUAL
+                      else f"{temp} = not {equal(left, right)}")
+            return temp, BOOL
+        operator = ARITHMETIC.get(kind) or COMPARISONS.get(kind)
+        if operator is None:
+            return "None", ANY
+        checks = [f"{code}.__class__ is not float" for code, known in ((left, left_kind), (right, right_kind))
+                  if known != FLOAT]
+        if checks:
+            self.emit(f"if {' or '.join(checks)}: operands_error({line})")
+        if kind == tokens.SLASH and not nonzero(right):
+            self.emit(f"if {right} == 0.0: raise RuntimeError('[{line}] Error: Division by zero.')")
+        self.emit(f"{temp} = {left} {operator} {right}")
+        return temp, FLOAT if kind in ARITHMETIC else BOOL
+
+    def add(self, left: str, left_kind: int, right: str, right_kind: int, line: int, temp: str):
+        """'+' on numbers or strings, checking only the operands not known to be either."""
+        for kind, type_name in ((FLOAT, "float"), (STRING, "str")):
+            if left_kind == kind or right_kind == kind:
+                unknown = [code for code, known in ((left, left_kind), (right, right_kind)) if known != kind]
+                if unknown:
+                    self.emit(f"if {unknown[0]}.__class__ is not {type_name}: "
+                              f"raise RuntimeError('[{line}] Operands must be two numbers or two strings.')")
+                self.emit(f"{temp} = {left} + {right}")
+                return temp, kind
+        self.emit(f"if ({left}.__class__ is float and {right}.__class__ is float) "
+                  f"or ({left}.__class__ is str and {right}.__class__ is str): {temp} = {left} + {right}")
+        self.emit(f"else: raise RuntimeError('[{line}] Operands must be two numbers or two strings.')")
+        return temp, ANY
+
+    def visit_call(self, node: Call):
+        callee, _ = self.value(node.callee, node.arguments)
+        arguments = []
+        for index, argument in enumerate(node.arguments):
+            code, _ = self.value(argument, node.arguments[index + 1:])
+            arguments.append(code)
+        temp, count, line = self.temp(), len(arguments), node.paren.line
+        listed = ", ".join(arguments)
+        # Calls of plain functions skip the generic path.
+        self.emit(f"if {callee}.__class__ is PyFunction and {callee}.receiver is None "
+                  f"and len({callee}.declaration.params) == {count} and {callee}.definition.code is not None:")
+        self.emit(f"    {temp} = {callee}.definition.code({callee}.upvalues{', ' if listed else ''}{listed})")
+        self.emit(f"else: {temp} = call_value(I, {callee}, [{listed}], {line})")
+        return temp, ANY
+
+    def visit_get(self, node: Get):
+        obj, _ = self.expression(node.obj)
+        temp = self.temp()
+        self.caches.site(node)
+        site = self.constant(node)
+        self.emit(f"if {obj}.__class__ is LoxInstance and {obj}.shape is {site}.shape: {temp} = {obj}.values[{site}.slot]")
+        self.emit(f"else: {temp} = get_property({obj}, {site})")
+        return temp, ANY
+
+    def visit_set(self, node: Set):
+        obj, _ = self.value(node.obj, [node.value])
+        # The object is checked before the value is evaluated.
+        self.emit(f"if not isinstance({obj}, LoxInstance): "
+                  f"raise RuntimeError('[{node.name.line}] Only instances have fields.')")
+        value, kind = self.expression(node.value)
+        self.caches.site(node)
+        site = self.constant(node)
+        self.emit(f"if {obj}.shape is {site}.shape: {obj}.values[{site}.slot] = {value}")
+        self.emit(f"else: set_property({obj}, {site}, {value})")
+        return value, kind
+
+
+def equal(left: str, right: str) -> str:
+    """Lox equality of two operands, where nil only equals nil."""
+    if left == "None" or right == "None":
+        other = right if left == "None" else left
+        if other == "None" or is_literal(other) or other in ("True", "False"):
+            return str(other == "None")
+        return f"{other} is None"
+    if is_literal(left) or is_literal(right):
+        # Neither can be nil, and 'is' must not be used on a literal.
+        return f"{left} == {right}"
+    return f"({right} is None if {left} is None else {left} == {right})"
+
+
+def is_literal(code: str) -> bool:
+    """Whether generated code is a number or string literal."""
+    return code[0] in "'\"(0123456789"
+
+
+def nonzero(code: str) -> bool:
+    """Whether generated code is a number literal other than zero."""
+    try:
+        return float(code.strip("()")) != 0.0
+    except ValueError:
+        return False
+
+
+def assigns(expressions: List[Expr]) -> bool:
+    """Whether evaluating the expressions can assign to a local of the running function."""
+    pending = list(expressions)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, Assign):
+            return True
+        if isinstance(node, (Binary, Logical)):
+            pending += (node.left, node.right)
+        elif isinstance(node, Unary):
+            pending.append(node.right)
+        elif isinstance(node, Grouping):
+            pending.append(node.expression)
+        elif isinstance(node, Call):
+            pending.append(node.callee)
+            pending.extend(node.arguments)
+        elif isinstance(node, Get):
+            pending.append(node.obj)
+        elif isinstance(node, Set):
+            pending += (node.obj, node.value)
+    return False
+
+
+class PythonEvaluator:
+    """
+    Runs a resolved program by translating it to Python source, compiling
+    that with compile() and running it with exec(). Output and runtime
+    errors are the same as the Evaluator's.
+    """
+    def __init__(self, globals: Environment = None, interpreter=None, caches: InlineCaches = None):
+        if globals is None:
+            globals = Environment()
+            globals.define("clock", NativeClock())
+        self.globals = globals
+        self.constants, self.definitions = [], []
+        # The inline caches of the property sites translated.
+        self.caches = caches or InlineCaches()
+        # The generated code passes `interpreter` to the functions it calls,
+        # which may belong to another engine sharing the global table.
+        self.namespace = {
+            'G': self.globals.values, 'K': self.constants, 'D': self.definitions, 'I': interpreter or self,
+            'UNDEFINED': UNDEFINED, 'Cell': Cell, 'PyFunction': PyFunction, 'LoxInstance': LoxInstance,
+            'stringify': stringify, 'call_value': call_value, 'get_property': get_property, 'set_property': set_property,
+            'get_super': get_super, 'make_class': make_class, 'undefined': undefined,
+            'operands_error': operands_error,
+        }
+        self.scripts = 0
+        # How many definitions have been looked up in the namespace.
+        self.linked = 0
+
+    def translate(self, statements: List[Stmt]) -> Tuple[str, str]:
+        """Returns the Python source for a program and the name of its top-level function."""
+        self.scripts += 1
+        name = f"script{self.scripts}"
+        transpiler = Transpiler(self.globals, self.constants, self.definitions, self.caches)
+        transpiler.translate_script(statements, name)
+        return transpiler.source(), name
+
+    def load(self, source: str):
+        code = compile(source, "<lox>", "exec")
+        exec(code, self.namespace)
+        for definition in self.definitions[self.linked:]:
+            definition.code = self.namespace.get(definition.name)
+        self.linked = len(self.definitions)
+
+    def evaluate_statements(self, statements: List[Stmt]):
+        source, name = self.translate(statements)
+        self.load(source)
+        try:
+            self.namespace[name](())
+        except RecursionError:
+            raise RecursionError(RECURSION_MESSAGE) from None
+
+    def execute(self, stmt: Stmt):
+        """Translates and runs a top-level statement."""
+        self.evaluate_statements([stmt])
+
+    def translate_lazy(self, definition: Definition):
+        """Translates a lazily parsed function on its first call."""
+        compile_lazy(definition.declaration)
+        transpiler = Transpiler(self.globals, self.constants, self.definitions, self.caches)
+        transpiler.translate_function(definition)
+        self.load(transpiler.source())
+        definition.code = self.namespace[definition.name]
+        return definition.code
+
+    def compile_function(self, declaration: Function, prefix: tuple = ()) -> Definition:
+        """Translates a function whose body has been parsed and resolved."""
+        definition = Definition(declaration, f"f{len(self.definitions)}_{declaration.name.lexeme}", prefix)
+        self.definitions.append(definition)
+        transpiler = Transpiler(self.globals, self.constants, self.definitions, self.caches)
+        transpiler.translate_function(definition)
+        self.load(transpiler.source())
+        return definition
+
+    def compile_loop(self, stmt: While, size: int):
+        """Translates a loop to run with a frame of `size` slots; see Transpiler.translate_loop."""
+        self.scripts += 1
+        name = f"loop{self.scripts}"
+        transpiler = Transpiler(self.globals, self.constants, self.definitions, self.caches)
+        transpiler.translate_loop(stmt, name, size)
+        self.load(transpiler.source())
+        return self.namespace[name]
@@ -59,6 +59,34 @@ class Visitor(ABC):
    def visit_super(self, node):
         """Visit a 'super' keyword node in the AST."""
         pass
+
+   # The quickened forms the Evaluator rewrites nodes into, from
+   # app/evaluation/quickening.py; any other visitor sees the node they
+   # came from.
+   def visit_float_add(self, node): return self.visit_binary(node)
+   def visit_string_concat(self, node): return self.visit_binary(node)
+   def visit_float_subtract(self, node): return self.visit_binary(node)
+   def visit_float_multiply(self, node): return self.visit_binary(node)
+   def visit_float_divide(self, node): return self.visit_binary(node)
+   def visit_float_less(self, node): return self.visit_binary(node)
+   def visit_float_less_equal(self, node): return self.visit_binary(node)
+   def visit_float_greater(self, node): return self.visit_binary(node)
+   def visit_float_greater_equal(self, node): return self.visit_binary(node)
+   def visit_equal(self, node): return self.visit_binary(node)
+   def visit_not_equal(self, node): return self.visit_binary(node)
+   def visit_unchecked_add(self, node): return self.visit_binary(node)
+   def visit_unchecked_subtract(self, node): return self.visit_binary(node)
+   def visit_unchecked_multiply(self, node): return self.visit_binary(node)
+   def visit_unchecked_divide(self, node): return self.visit_binary(node)
+   def visit_unchecked_less(self, node): return self.visit_binary(node)
+   def visit_unchecked_less_equal(self, node): return self.visit_binary(node)
+   def visit_unchecked_greater(self, node): return self.visit_binary(node)
+   def visit_unchecked_greater_equal(self, node): return self.visit_binary(node)
+   def visit_float_negate(self, node): return self.visit_unary(node)
+   def visit_unchecked_negate(self, node): return self.visit_unary(node)
+   def visit_not(self, node): return self.visit_unary(node)
+   def visit_and(self, node): return self.visit_logical(node)
+   def visit_or(self, node): return self.visit_logical(node)
         
 class StmtVisitor(ABC):
     
@@ -0,0 +1,219 @@
+from typing import Dict, List, Optional
+from app.parser.ast import (
+    Expr, Stmt, Assign, Binary, Call, Get, Grouping, Literal, Logical, Set, Super,
+    This, Unary, Variable, Block, Class, Expression, Function, If,
+    Print, Return, Var, While
+)
+from app.evaluation.visitors import Visitor, StmtVisitor
+from app.environment import LOCAL
+from app.parser.lazy import LazyBody
+from app.scan_for.tokens import (
+    MINUS, PLUS, SLASH, STAR, BANG, BANG_EQUAL, EQUAL_EQUAL, GREATER,
+    GREATER_EQUAL, LESS, LESS_EQUAL
+)
+
+# The types the pass can prove; None stands for any value.
+NUMBER, STRING, BOOLEAN, NIL = range(4)
+TYPE_NAMES = ('numbers', 'strings', 'booleans', 'nil')
+
+ARITHMETIC = (MINUS, STAR, SLASH)
+COMPARISONS = (GREATER, GREATER_EQUAL, LESS, LESS_EQUAL)
+
+
+def join(types: Dict[int, int], other: Dict[int, int]) -> Dict[int, int]:
+    """What is known at a point reached from both states: the slots they agree on."""
+    return {slot: kind for slot, kind in types.items() if other.get(slot) == kind}
+
+
+class TypeInference(Visitor, StmtVisitor):
+    """
+    Proves the operand types of Binary and Unary expressions in a resolved
+    program, and records them in their `operands` field for the engines,
+    which then skip the checks those operands would otherwise need.
+
+    The analysis is flow sensitive over the frame slots of locals that no
+    closure captures (the resolver's LOCAL access). Only the code of their
+    own call can change those, so the type of the value last stored in one
+    holds until the next store, whatever runs in between. At a join the
+    slots keep only the types both paths agree on, and a loop is analysed
+    until its state stops changing. Globals, captured variables, fields
+    and the results of calls are never proven.
+
+    Expression visitors return the inferred type of the expression, or
+    None. A lazily parsed body is inferred when it is compiled.
+    """
+    def __init__(self):
+        # The known types of the slots of the function being analysed.
+        self.types: Dict[int, int] = {}
+        # Every operator with operand checks, for the report.
+        self.operators: Dict[Expr, None] = {}
+
+    def infer(self, statements: List[Stmt]):
+        for statement in statements:
+            if statement: self.statement(statement)
+
+    def infer_function(self, function: Function):
+        enclosing, self.types = self.types, {}
+        self.infer(function.body)
+        self.types = enclosing
+
+    def statement(self, stmt: Stmt): stmt.accept(self)
+    def expression(self, expr: Expr) -> Optional[int]: return expr.accept(self)
+
+    def report(self) -> List[str]:
+        """A line per operator whose checks were proven unnecessary, then a summary."""
+        proven = [node for node in self.operators if node.operands is not None]
+        lines = [f"[{node.operator.line}] '{node.operator.lexeme}' on {TYPE_NAMES[node.operands]}"
+                 for node in sorted(proven, key=lambda node: node.operator.line)]
+        lines.append(f"proved the operands of {len(proven)} of {len(self.operators)} checked operators")
+        return lines
+
+    # --- Statements ---
+
+    def visit_block(self, stmt: Block):
+        self.infer(stmt.statements)
+
+    def visit_expression(self, stmt: Expression):
+        self.expression(stmt.expression)
+
+    def visit_print(self, stmt: Print):
+        self.expression(stmt.expression)
+
+    def visit_var(self, stmt: Var):
+        kind = NIL if stmt.initializer is None else self.expression(stmt.initializer)
+        if stmt.slot is not None:
+            # A captured variable's slot holds its cell.
+            self.store(stmt.slot, None if stmt.cell else kind)
+
+    def visit_if(self, stmt: If):
+        self.expression(stmt.condition)
+        before = dict(self.types)
+        self.statement(stmt.then_branch)
+        after_then, self.types = self.types, before
+        if stmt.else_branch is not None:
+            self.statement(stmt.else_branch)
+        self.types = join(after_then, self.types)
+
+    def visit_while(self, stmt: While):
+        while True:
+            entry = dict(self.types)
+            self.expression(stmt.condition)
+            leaving = dict(self.types)
+            self.statement(stmt.body)
+            merged = join(entry, self.types)
+            if merged == entry:
+                # The last pass ran from a state every iteration starts in.
+                self.types = leaving
+                return
+            self.types = merged
+
+    def visit_function(self, stmt: Function):
+        if stmt.slot is not None:
+            self.store(stmt.slot, None)
+        if not isinstance(stmt.body, LazyBody):
+            self.infer_function(stmt)
+
+    def visit_return(self, stmt: Return):
+        if stmt.value is not None:
+            self.expression(stmt.value)
+
+    def visit_class(self, stmt: Class):
+        if stmt.superclass is not None:
+            self.expression(stmt.superclass)
+        if stmt.slot is not None:
+            self.store(stmt.slot, None)
+        for method in stmt.methods:
+            if not isinstance(method.body, LazyBody):
+                self.infer_function(method)
+
+    # --- Expressions ---
+
+    def store(self, slot: int, kind: Optional[int]):
+        if kind is None:
+            self.types.pop(slot, None)
+        else:
+            self.types[slot] = kind
+
+    def visit_literal(self, node: Literal):
+        value = node.value
+        if value is None: return NIL
+        if isinstance(value, bool): return BOOLEAN
+        if isinstance(value, float): return NUMBER
+        if isinstance(value, str): return STRING
+        return None
+
+    def visit_grouping(self, node: Grouping):
+        return self.expression(node.expression)
+
+    def visit_variable(self, node: Variable):
+        return self.types.get(node.slot) if node.access == LOCAL else None
+
+    def visit_assign(self, node: Assign):
+        kind = self.expression(node.value)
+        if node.access == LOCAL:
+            self.store(node.slot, kind)
+        return kind
+
+    def visit_logical(self, node: Logical):
+        left = self.expression(node.left)
+        before = dict(self.types)
+        right = self.expression(node.right)
+        self.types = join(before, self.types)
+        return left if left == right else None
+
+    def visit_unary(self, node: Unary):
+        right = self.expression(node.right)
+        kind = node.operator.kind
+        if kind == BANG:
+            return BOOLEAN
+        if kind == MINUS:
+            self.operators[node] = None
+            node.operands = NUMBER if right == NUMBER else None
+            return NUMBER
+        return None
+
+    def visit_binary(self, node: Binary):
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        kind = node.operator.kind
+        if kind in ARITHMETIC or kind in COMPARISONS:
+            self.operators[node] = None
+            node.operands = NUMBER if left == NUMBER and right == NUMBER else None
+            # Anything else fails the check, so the result is known either way.
+            return NUMBER if kind in ARITHMETIC else BOOLEAN
+        if kind == PLUS:
+            self.operators[node] = None
+            node.operands = left if left == right and left in (NUMBER, STRING) else None
+            if left in (NUMBER, STRING): return left
+            if right in (NUMBER, STRING): return right
+            return None
+        if kind == EQUAL_EQUAL or kind == BANG_EQUAL:
+            return BOOLEAN
+        return None
+
+    def visit_call(self, node: Call):
+        self.expression(node.callee)
+        for argument in node.arguments:
+            self.expression(argument)
+        return None
+
+    def visit_get(self, node: Get):
+        self.expression(node.obj)
+        return None
+
+    def visit_set(self, node: Set):
+        self.expression(node.obj)
+        return self.expression(node.value)
+
+    def visit_this(self, node: This):
+        return None
+
+    def visit_super(self, node: Super):
+        return None
+
+
+def infer_types(statements: List[Stmt]) -> TypeInference:
+    """Annotates a resolved program; returns the pass, for its report."""
+    inference = TypeInference()
+    inference.infer(statements)
+    return inference
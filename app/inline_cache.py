@@ -0,0 +1,178 @@
+from typing import Any, Dict, List
+from app.lox_instance import LoxInstance, Shape
+from app.parser.ast import Get
+
+# How many shapes a site remembers before it gives up on caching more.
+MAX_ENTRIES = 5
+
+
+class InlineCache:
+    """
+    What one Get or Set site has learned about the instances it has seen,
+    keyed by their shape. A shape belongs to one class and fixes which
+    fields an instance has and where, so whatever the site worked out for
+    one instance holds for any other of the same shape, and the lookup by
+    name only runs on a miss. Instances whose fields are in a dict are
+    never cached.
+
+    The first field the site finds is also written to the node itself
+    (Get.shape and Get.slot, or for a Set that adds a field, Set.before
+    and Set.after), which the engines check inline before they call into
+    the cache at all. Everything else, methods and further shapes, is
+    looked up here.
+    """
+    __slots__ = ('site', 'owner', 'entries', 'full', 'accesses', 'misses')
+    kind = ''
+
+    def __init__(self, site, owner: 'InlineCaches'):
+        self.site = site
+        self.owner = owner
+        self.entries: Dict[Shape, Any] = {}
+        # Whether a shape was turned away because the site was full.
+        self.full = False
+        # Only the Counting variants count accesses; misses always are.
+        self.accesses = 0
+        self.misses = 0
+
+    def remember(self, shape: Shape, entry) -> bool:
+        """Caches `entry` for `shape`; False if the site is full."""
+        if len(self.entries) < MAX_ENTRIES:
+            self.entries[shape] = entry
+            return not self.owner.counting
+        self.full = True
+        return False
+
+    @property
+    def state(self) -> str:
+        if not self.entries:
+            return 'uncached'
+        if self.full:
+            return 'megamorphic'
+        return 'polymorphic' if len(self.entries) > 1 else 'monomorphic'
+
+    def describe(self) -> str:
+        name = self.site.name
+        return (f"[{name.line}] {self.kind} '{name.lexeme}': {self.state}, "
+                f"{self.accesses - self.misses} hits, {self.misses} misses")
+
+
+class GetCache(InlineCache):
+    """Caches where a field is (its slot) or, if it is not one, the method the name finds."""
+    __slots__ = ()
+    kind = 'get'
+
+    def get(self, instance: LoxInstance):
+        entry = self.entries.get(instance.shape)
+        if entry is None:
+            return self.miss(instance)
+        if entry.__class__ is int:
+            return instance.values[entry]
+        return entry.bind(instance)
+
+    def miss(self, instance: LoxInstance):
+        self.misses += 1
+        shape, name = instance.shape, self.site.name
+        if shape is None:
+            return instance.get(name)
+        entry = shape.index.get(name.lexeme)
+        if entry is not None:
+            value = instance.values[entry]
+        else:
+            entry = instance.klass.find_method(name.lexeme)
+            if entry is None:
+                raise RuntimeError(f"[{name.line}] Undefined property '{name.lexeme}'.")
+            value = entry.bind(instance)
+        if self.remember(shape, entry) and entry.__class__ is int and self.site.shape == ():
+            self.site.shape, self.site.slot = shape, entry
+        return value
+
+
+class SetCache(InlineCache):
+    """Caches where a field is (its slot) or, if it is new, the shape adding it leads to."""
+    __slots__ = ()
+    kind = 'set'
+
+    def set(self, instance: LoxInstance, value):
+        entry = self.entries.get(instance.shape)
+        if entry is None:
+            self.miss(instance, value)
+        elif entry.__class__ is int:
+            instance.values[entry] = value
+        else:
+            instance.values.append(value)
+            instance.shape = entry
+
+    def miss(self, instance: LoxInstance, value):
+        self.misses += 1
+        shape, site = instance.shape, self.site
+        instance.set_field(site.name.lexeme, value)
+        if shape is None or instance.shape is None:
+            return
+        if instance.shape is shape:
+            entry = shape.index[site.name.lexeme]
+            if self.remember(shape, entry) and site.shape == ():
+                site.shape, site.slot = shape, entry
+        elif self.remember(shape, instance.shape) and site.before == ():
+            site.before, site.after = shape, instance.shape
+
+
+class CountingGetCache(GetCache):
+    __slots__ = ()
+
+    def get(self, instance: LoxInstance):
+        self.accesses += 1
+        return GetCache.get(self, instance)
+
+
+class CountingSetCache(SetCache):
+    __slots__ = ()
+
+    def set(self, instance: LoxInstance, value):
+        self.accesses += 1
+        SetCache.set(self, instance, value)
+
+
+class InlineCaches:
+    """
+    The inline caches of the property sites an engine has run or compiled.
+    The engines go to a site's cache when the node's own memo missed.
+
+    With `counting` set, as it has to be before any sites are made, every
+    access is counted, and sites leave their node's memo empty so that
+    every access reaches the cache. That makes them slower; it is for
+    `run --ic-stats`.
+
+    A cache is kept on its node but belongs to the engine that made it. An
+    AST run again by another engine, as watch mode does with the
+    declarations that did not change, gets new caches rather than ones
+    full of the shapes of classes from the earlier run.
+    """
+    def __init__(self):
+        self.caches: List[InlineCache] = []
+        self.counting = False
+
+    def site(self, node) -> InlineCache:
+        """The cache of a Get or Set node, made on first use by this engine."""
+        cache = node.cache
+        # An arena view without one yet gives back ().
+        if not cache or cache.owner is not self:
+            if isinstance(node, Get):
+                cache_class = CountingGetCache if self.counting else GetCache
+            else:
+                cache_class = CountingSetCache if self.counting else SetCache
+            cache = node.cache = cache_class(node, self)
+            node.shape = node.slot = ()
+            if cache.kind == 'set':
+                node.before = node.after = ()
+            self.caches.append(cache)
+        return cache
+
+    def report(self) -> List[str]:
+        """A line per site that ran, then the hit rate over all of them."""
+        used = sorted((cache for cache in self.caches if cache.accesses), key=lambda cache: cache.site.name.line)
+        lines = [cache.describe() for cache in used]
+        accesses = sum(cache.accesses for cache in used)
+        hits = accesses - sum(cache.misses for cache in used)
+        rate = 100 * hits / accesses if accesses else 0
+        lines.append(f"{hits} of {accesses} property accesses hit the inline cache ({rate:.1f}%) at {len(used)} sites")
+        return lines
@@ -3,13 +3,15 @@ from typing import Dict, Any
 from app.lox_callable import LoxCallable
 
 from app.lox_function import LoxFunction
-from app.lox_instance import LoxInstance
+from app.lox_instance import LoxInstance, Shape
 
 class LoxClass(LoxCallable):
     def __init__(self, name: str, superclass: LoxClass | None, methods: Dict[str, 'LoxFunction']):
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        # The shape of its instances before they have any fields.
+        self.shape = Shape()
 
     def arity(self) -> int:
         initializer = self.find_method("init")
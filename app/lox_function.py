@@ -1,48 +1,66 @@
-from app.environment import Environment
+from app.environment import Cell
 from app.lox_callable import LoxCallable, ReturnValue
 from app.parser.ast import Function as FunctionNode
+from app.parser.lazy import LazyBody
+from app.resolver.resolver import compile_lazy
 
 # Forward declaration to avoid circular import
 class LoxInstance: pass
 
 class LoxFunction(LoxCallable):
-    def __init__(self, declaration: FunctionNode, closure: Environment, is_initializer: bool):
+    def __init__(self, declaration: FunctionNode, upvalues: tuple, is_initializer: bool,
+                 receiver: LoxInstance = None, superclass=None):
         self.declaration = declaration
-        self.closure = closure
+        # The cells of the enclosing variables this closure uses.
+        self.upvalues = upvalues
         self.is_initializer = is_initializer
+        # For a method, the instance it is bound to and the superclass of
+        # the class declaring it, which 'this' and 'super' refer to.
+        self.receiver = receiver
+        self.superclass = superclass
 
     def arity(self) -> int:
         return len(self.declaration.params)
 
+    def new_frame(self, arguments: list) -> list:
+        """The frame of a call, once the body has been resolved."""
+        declaration = self.declaration
+        # A method's frame starts with 'this' and 'super', then the
+        # parameters take the next slots, in order.
+        if self.receiver is None:
+            frame = list(arguments)
+        elif self.superclass is None:
+            frame = [self.receiver, *arguments]
+        else:
+            frame = [self.receiver, self.superclass, *arguments]
+        if declaration.size is not None and declaration.size > len(frame):
+            frame.extend([None] * (declaration.size - len(frame)))
+        for slot in declaration.cells:
+            frame[slot] = Cell(frame[slot])
+        return frame
+
     def call(self, interpreter, arguments: list):
-        # Create a new environment for the function's body.
-        environment = Environment(self.closure)
-        for i, param in enumerate(self.declaration.params):
-            environment.define(param.lexeme, arguments[i])
+        declaration = self.declaration
+        if isinstance(declaration.body, LazyBody):
+            compile_lazy(declaration)
 
         try:
-            interpreter.execute_block(self.declaration.body, environment)
+            interpreter.execute_body(declaration.body, self.new_frame(arguments), self.upvalues)
         except ReturnValue as return_value:
             # If this is an init method, return 'this' even if there's an explicit return.
             if self.is_initializer:
-                return self.closure.get_at(0, "this")
+                return self.receiver
             return return_value.value
         
         # If this is an init method, implicitly return 'this'.
         if self.is_initializer:
-            return self.closure.get_at(0, "this")
+            return self.receiver
 
         return None
 
     def bind(self, instance: LoxInstance):
-        """
-        Creates a new environment where 'this' is bound to the instance.
-        Returns a new LoxFunction with this new environment as its closure.
-        """
-        environment = Environment(self.closure)
-        environment.define("this", instance)
-        return LoxFunction(self.declaration, environment, self.is_initializer)
+        """Returns a copy of this method whose calls have 'this' bound to the instance."""
+        return LoxFunction(self.declaration, self.upvalues, self.is_initializer, instance, self.superclass)
 
     def __repr__(self) -> str:
         return f"<fn {self.declaration.name.lexeme}>"
-
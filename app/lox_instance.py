@@ -1,33 +1,100 @@
 from __future__ import annotations
-from typing import Dict, Any, TYPE_CHECKING
+from typing import Dict, Any, Optional, TYPE_CHECKING
 from app.scan_for.tokens import Token
 
 if TYPE_CHECKING:
     from app.lox_class import LoxClass
     from app.lox_function import LoxFunction
 
+# An instance moves its fields to a dict of its own when it would need a
+# shape with more fields than this, or its class already has this many
+# shapes; either way its layout is not one others share.
+MAX_FIELDS = 64
+MAX_SHAPES = 256
+
+
+class Shape:
+    """
+    The layout of the fields of instances of one class that had the same
+    fields added in the same order. Instances that start alike go through
+    the same shapes, since adding a field to an instance moves it to the
+    shape its old one transitions to for that name, and that is made once.
+    """
+    __slots__ = ('index', 'transitions', 'root', 'count')
+
+    def __init__(self, index: Dict[str, int] = None, root: Shape = None):
+        # Where each field is in the values of an instance with this shape.
+        self.index: Dict[str, int] = index or {}
+        self.transitions: Dict[str, Shape] = {}
+        self.root = root or self
+        # How many shapes the class has, kept on its root.
+        self.count = 1
+
+    def add(self, name: str) -> Optional[Shape]:
+        """The shape with `name` added; None if instances should not share one."""
+        shape = self.transitions.get(name)
+        if shape is None:
+            root = self.root
+            if len(self.index) >= MAX_FIELDS or root.count >= MAX_SHAPES:
+                return None
+            root.count += 1
+            shape = self.transitions[name] = Shape({**self.index, name: len(self.index)}, root)
+        return shape
+
+
 class LoxInstance:
+    """
+    An object. Its field values are a list laid out by its shape, or, once
+    the shape is None, a dict by name.
+    """
+    __slots__ = ('klass', 'shape', 'values')
+
     def __init__(self, klass: 'LoxClass'):
         self.klass = klass
-        self.fields: Dict[str, Any] = {}
+        self.shape: Optional[Shape] = klass.shape
+        self.values = []
 
     def get(self, name: Token):
         """
         Looks for a property on this instance.
         First checks fields, then falls back to methods on the class.
         """
-        if name.lexeme in self.fields:
-            return self.fields[name.lexeme]
+        lexeme = name.lexeme
+        shape = self.shape
+        if shape is None:
+            if lexeme in self.values:
+                return self.values[lexeme]
+        else:
+            index = shape.index.get(lexeme)
+            if index is not None:
+                return self.values[index]
 
-        method = self.klass.find_method(name.lexeme)
+        method = self.klass.find_method(lexeme)
         if method is not None:
             return method.bind(self)
 
-        raise RuntimeError(f"[{name.line}] Undefined property '{name.lexeme}'.")
+        raise RuntimeError(f"[{name.line}] Undefined property '{lexeme}'.")
 
     def set(self, name: Token, value: Any):
-        self.fields[name.lexeme] = value
+        self.set_field(name.lexeme, value)
+
+    def set_field(self, name: str, value: Any):
+        shape = self.shape
+        if shape is None:
+            self.values[name] = value
+            return
+        index = shape.index.get(name)
+        if index is not None:
+            self.values[index] = value
+        else:
+            # A new field: follow the transition for it, made once per shape.
+            next_shape = shape.transitions.get(name) or shape.add(name)
+            if next_shape is None:
+                self.values = dict(zip(shape.index, self.values))
+                self.values[name] = value
+            else:
+                self.values.append(value)
+            self.shape = next_shape
 
     def __repr__(self) -> str:
         return f"{self.klass.name} instance"
-
@@ -1,67 +1,216 @@
+import os
 import sys
 from app.parser.parser import Parser, ParseError
+from app.parser.pratt import PrattParser
+from app.parser.stack_parser import StackParser
+from app.parser.printer import write_ast, write_program
+from app.parser.arena import Arena
+from app.parser.lazy import CompileError
+from app.parser.token_stream import TokenStream
 from app.parser.ast import Expression
 from app.scan_for.parentheses import ParenthesesScanner
+from app.scan_for.table_scanner import TableScanner
+from app.scan_for.streaming import StreamingScanner
+from app.scan_for.parallel import ParallelScanner
 from app.evaluation.evaluator import Evaluator
+from app.evaluation.closures import ClosureEvaluator
+from app.bytecode.vm import VM
+from app.evaluation.transpiler import PythonEvaluator
+from app.evaluation.tiered import TieredEvaluator
+from app.bytecode.disassembler import disassemble
 from app.stringify import stringify
-from app.resolver.resolver import Resolver 
+from app.resolver.resolver import Resolver
+from app.watch import Watcher
+from app.cache import ProgramCache
+from app.pipeline import Pipeline
+from app.optimizer import optimize, LEVELS
+from app.inference import infer_types
+
+SCANNERS = {
+    'table': TableScanner,
+    'legacy': ParenthesesScanner,
+}
+
+PARSERS = {
+    'descent': Parser,
+    'pratt': PrattParser,
+    'stack': StackParser,
+}
+
+# Every --name a command may be given, and O for -O<level>.
+OPTIONS = {'scanner', 'stream', 'jobs', 'parser', 'no-cache', 'ast', 'lazy', 'pipeline', 'O', 'dump-ast', 'engine', 'emit-py', 'trace-tiers', 'ic-stats'}
+
+ENGINES = {
+    'tree': Evaluator,
+    'closure': ClosureEvaluator,
+    'vm': VM,
+    'python': PythonEvaluator,
+    'tiered': TieredEvaluator,
+}
+
+def parse_options(args):
+    """Splits `--name=value` and `-O<level>` options from the positional arguments."""
+    positional, options = [], {}
+    for arg in args:
+        if arg.startswith('--'):
+            name, _, value = arg[2:].partition('=')
+            options[name] = value
+        elif arg.startswith('-O'):
+            options['O'] = arg[2:]
+        else:
+            positional.append(arg)
+    return positional, options
+
+def make_scanner(filename, options):
+    if 'jobs' in options:
+        jobs = options['jobs']
+        if jobs and not jobs.isdecimal():
+            print(f"Usage: --jobs takes a number of processes, not '{jobs}'.", file=sys.stderr)
+            exit(1)
+        return ParallelScanner(filename, int(jobs or 0))
+    name = options.get('scanner', 'table')
+    if name not in SCANNERS:
+        print(f"Unknown scanner: {name}", file=sys.stderr)
+        exit(1)
+    return SCANNERS[name](filename)
+
+def make_parser(tokens, options):
+    name = options.get('parser', 'descent')
+    if name not in PARSERS:
+        print(f"Unknown parser: {name}", file=sys.stderr)
+        exit(1)
+    parser = PARSERS[name](tokens)
+    # Lazy bodies only exist as objects, so an arena is always parsed eagerly.
+    parser.lazy = 'lazy' in options and options.get('ast', 'objects') == 'objects'
+    return parser
+
+def make_evaluator(options):
+    name = options.get('engine', 'tree')
+    if name not in ENGINES:
+        print(f"Unknown engine: {name}", file=sys.stderr)
+        exit(1)
+    evaluator = ENGINES[name]()
+    # Property sites count their hits for --ic-stats, which slows them down.
+    evaluator.caches.counting = 'ic-stats' in options
+    if isinstance(evaluator, TieredEvaluator):
+        # Reports each function and loop as it is compiled, or left interpreted.
+        evaluator.trace = 'trace-tiers' in options
+    return evaluator
+
+def parse_statements(parser, options):
+    """Runs the parser, keeping the AST as objects or, with --ast=arena, in an Arena."""
+    layout = options.get('ast', 'objects')
+    if layout == 'arena':
+        return Arena.parse(parser).statements()
+    if layout != 'objects':
+        print(f"Unknown AST layout: {layout}", file=sys.stderr)
+        exit(1)
+    return parser.parse()
+
+def parse_stream(filename, options):
+    """
+    Parses while the file is still being scanned. Diagnostics come out as in
+    the batch pipeline: lexical errors win over syntax errors, which are only
+    reported once the whole input has been scanned.
+    """
+    scanner = StreamingScanner(filename)
+    tokens = TokenStream(scanner.iter_tokens())
+    parser = make_parser(tokens, options)
+    diagnostics = []
+    parser.report = diagnostics.append
+    try:
+        statements = parse_statements(parser, options)
+    except ParseError:
+        statements = None
+        tokens.drain()
+    if scanner.has_error:
+        exit(65)
+    for message in diagnostics:
+        print(message, file=sys.stderr)
+    if statements is None:
+        exit(65)
+    return statements, parser
+
+def load_program(filename, options):
+    """
+    Scans and parses a file, exiting with 65 on any front-end error.
+    Returns the statements and the parser, whose `had_error` tells whether
+    a non-fatal error was reported.
+    """
+    if 'stream' in options:
+        return parse_stream(filename, options)
+    scanner = make_scanner(filename, options)
+    tokens = scanner.scan_all()
+    if scanner.has_error:
+        exit(65)
+
+    parser = make_parser(tokens, options)
+    try:
+        return parse_statements(parser, options), parser
+    except ParseError:
+        exit(65)
+
+def parse_program(filename, options):
+    return load_program(filename, options)[0]
+
+def optimization_level(options):
+    level = options.get('O', '1')
+    if not level.isdigit() or int(level) not in LEVELS:
+        print(f"Unknown optimization level: -O{level}", file=sys.stderr)
+        exit(1)
+    # An arena is read-only, so it is run as parsed.
+    if options.get('ast', 'objects') == 'arena':
+        return 0
+    return int(level)
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: ./your_program.sh <command> <filename>", file=sys.stderr)
+    args, options = parse_options(sys.argv[1:])
+    if len(args) < 2:
+        print("Usage: ./your_program.sh <command> <filename> [--scanner=table|legacy] [--stream] [--jobs[=N]] [--parser=descent|pratt|stack] [--no-cache] [--ast=objects|arena] [--lazy] [-O0|-O1] [--dump-ast] [--engine=tree|closure|vm|python|tiered] [--emit-py] [--trace-tiers] [--ic-stats]\n       ./your_program.sh run <filename> --pipeline [--parser=descent|pratt|stack] [--lazy] [--engine=tree|closure|vm|python|tiered] [--trace-tiers]\n       ./your_program.sh watch <filename>\n       ./your_program.sh disassemble <filename> [-O0|-O1]\n       ./your_program.sh types <filename> [-O0|-O1]", file=sys.stderr)
+        exit(1)
+
+    unknown = [name for name in options if name not in OPTIONS]
+    if unknown:
+        print(f"Unknown option: --{unknown[0]}", file=sys.stderr)
         exit(1)
 
-    command = sys.argv[1]
-    filename = sys.argv[2]
+    command = args[0]
+    filename = args[1]
 
-    if command not in ['parse', 'tokenize', 'evaluate', 'run']:
+    if command not in ['parse', 'tokenize', 'evaluate', 'run', 'watch', 'check', 'disassemble', 'types']:
         print(f"Unknown command: {command}", file=sys.stderr)
         exit(1)
 
     if command == 'tokenize':
-        scanner = ParenthesesScanner(filename)
-        tokens = scanner.scan_all()
+        if 'stream' in options:
+            scanner = StreamingScanner(filename)
+            tokens = scanner.iter_tokens()
+        else:
+            scanner = make_scanner(filename, options)
+            if isinstance(scanner, ParallelScanner):
+                for block in scanner.render_all():
+                    sys.stdout.write(block)
+                tokens = []
+            else:
+                tokens = scanner.scan_all()
         
         for token in tokens:
-            literal_to_print = token.literal
-            if isinstance(literal_to_print, float):
-                literal_to_print = f"{literal_to_print}"
-            elif literal_to_print is None:
-                literal_to_print = "null"
-            print(f"{token.type} {token.lexeme} {literal_to_print}")
+            print(token)
         
         if scanner.has_error:
             exit(65)
         return
     
     if command == 'parse':
-        scanner = ParenthesesScanner(filename)
-        tokens = scanner.scan_all()
-        if scanner.has_error:
-            exit(65)
-        
-        parser = Parser(tokens)
-        try:
-            ast = parser.parse()
-        except ParseError:
-            exit(65)
-        
+        ast = parse_program(filename, options)
         if ast:
-            print(ast[0])
+            write_ast(ast[0])
+            print()
         return
 
     if command == 'evaluate':
         # 'evaluate' will run without the resolver for simpler testing.
-        scanner = ParenthesesScanner(filename)
-        tokens = scanner.scan_all()
-        if scanner.has_error:
-            exit(65)
-        
-        parser = Parser(tokens)
-        try:
-            statements = parser.parse()
-        except ParseError:
-            exit(65)
+        statements = parse_program(filename, options)
 
         evaluator = Evaluator()
         try:
@@ -75,37 +224,129 @@ def main():
             exit(70)
         return
 
-    if command == 'run':
-        # Step 1: Scanning
-        scanner = ParenthesesScanner(filename)
-        tokens = scanner.scan_all()
-        if scanner.has_error:
+    if command == 'check':
+        # Parses and resolves everything up front, including what --lazy would defer.
+        options.pop('lazy', None)
+        statements, parser = load_program(filename, options)
+        resolver = Resolver()
+        resolver.resolve_statements(statements)
+        # Unlike run, errors the parser recovered from fail the check too.
+        if parser.had_error or resolver.had_error:
             exit(65)
+        return
 
-        # Step 2: Parsing
-        parser = Parser(tokens)
-        try:
-            statements = parser.parse()
-        except ParseError:
+    if command == 'disassemble':
+        # Shows the bytecode --engine=vm runs, with every function compiled up front.
+        options.pop('lazy', None)
+        level = optimization_level(options)
+        statements = parse_program(filename, options)
+        resolver = Resolver()
+        resolver.resolve_statements(statements)
+        if resolver.had_error:
             exit(65)
+        if level:
+            statements = optimize(statements, level)
+            Resolver().resolve_statements(statements)
+        vm = VM()
+        disassemble(vm.compiler.compile_script(statements), vm.globals)
+        return
 
-        # Create the interpreter instance that will run the code.
-        evaluator = Evaluator()
-
-        # Step 3: Resolution
-        resolver = Resolver(evaluator)
+    if command == 'types':
+        # Reports which operators type inference proved need no operand checks.
+        options.pop('lazy', None)
+        level = optimization_level(options)
+        statements = parse_program(filename, options)
+        resolver = Resolver()
         resolver.resolve_statements(statements)
-        
-        # --- FIX: Check for resolution errors before evaluating ---
         if resolver.had_error:
             exit(65)
-        
+        if level:
+            statements = optimize(statements, level)
+            Resolver().resolve_statements(statements)
+        for line in infer_types(statements).report():
+            print(line)
+        return
+
+    if command == 'watch':
+        if not os.path.exists(filename):
+            print(f"File {filename} not found.", file=sys.stderr)
+            exit(1)
+        Watcher(filename).run()
+        return
+
+    if command == 'run' and 'pipeline' in options:
+        # Runs each declaration as soon as it has been read; always streams,
+        # so it has no use for another scanner or AST layout. Nothing is
+        # optimized, dumped or emitted either, and caches are not reported on.
+        unsupported = [option for option in ('scanner', 'jobs', 'ast', 'O', 'dump-ast', 'emit-py', 'ic-stats') if option in options]
+        if unsupported:
+            names = ', '.join(f"-O{options['O']}" if option == 'O' else f"--{option}" for option in unsupported)
+            print(f"Usage: --pipeline cannot be combined with {names}.", file=sys.stderr)
+            exit(1)
+        exit(Pipeline(filename, lambda tokens: make_parser(tokens, options), lambda: make_evaluator(options)).run())
+
+    if command == 'run':
+        # Create the interpreter instance that will run the code.
+        evaluator = make_evaluator(options)
+
+        level = optimization_level(options)
+
+        # A cached program has already been scanned, parsed, resolved and optimized.
+        cache = None
+        # Only a fully parsed object AST is cached.
+        if 'no-cache' not in options and 'stream' not in options and 'ast' not in options \
+                and 'lazy' not in options and os.path.isfile(filename):
+            cache = ProgramCache(filename, f"O{level}")
+        statements = cache.load() if cache else None
+        if statements is None:
+            # Steps 1 and 2: Scanning and parsing
+            statements, parser = load_program(filename, options)
+
+            # Step 3: Resolution
+            resolver = Resolver()
+            resolver.resolve_statements(statements)
+
+            # --- FIX: Check for resolution errors before evaluating ---
+            if resolver.had_error:
+                exit(65)
+
+            # Step 3b: Optimization. Blocks may have been merged, so the
+            # result is resolved again.
+            if level:
+                statements = optimize(statements, level)
+                Resolver().resolve_statements(statements)
+
+            # Step 3c: Type inference, which lets the engines skip operand
+            # checks it proves unnecessary.
+            infer_types(statements)
+
+            # Programs with non-fatal errors are not cached, so they get reported every run.
+            if cache and not parser.had_error:
+                cache.store(statements)
+
+        if 'dump-ast' in options:
+            write_program(statements)
+            return
+
+        if 'emit-py' in options:
+            # The Python source --engine=python runs.
+            sys.stdout.write(PythonEvaluator().translate(statements)[0])
+            return
+
         # Step 4: Evaluation (Interpretation)
         try:
             evaluator.evaluate_statements(statements)
         except RuntimeError as e:
             print(e, file=sys.stderr)
             exit(70)
+        except CompileError:
+            # A lazily parsed function had errors; they were reported on its first call.
+            exit(65)
+        finally:
+            if 'ic-stats' in options:
+                # How well the inline caches of property sites did, site by site.
+                for line in evaluator.caches.report():
+                    print(line, file=sys.stderr)
 
 if __name__ == "__main__":
     main()
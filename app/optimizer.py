@@ -0,0 +1,185 @@
+from typing import List
+from app.parser.ast import (
+    Expr, Stmt, Assign, Binary, Call, Get, Grouping, Literal, Logical, Set, Super,
+    This, Unary, Variable, Block, Class, Expression, Function, If,
+    Print, Return, Var, While
+)
+from app.evaluation.visitors import Visitor, StmtVisitor
+from app.evaluation.evaluator import Evaluator
+from app.parser.lazy import LazyBody
+from app.scan_for.tokens import OR
+
+# Optimization levels accepted by -O.
+LEVELS = (0, 1)
+
+
+def declares(statements: List[Stmt]) -> bool:
+    """Whether a statement list defines any names of its own."""
+    return any(isinstance(statement, (Var, Function, Class)) for statement in statements)
+
+
+class Optimizer(Visitor, StmtVisitor):
+    """
+    Simplifies a resolved program without changing what it does:
+
+    - Binary, Unary and Logical expressions over literals are folded. The
+      folding is done by the evaluator itself, so the result is exactly
+      what the program would have computed; an expression that would fail
+      at runtime is left alone so it still fails there.
+    - Groupings are dropped, since the tree already encodes the grouping.
+    - `if` and `while` statements with a constant condition lose their
+      unreachable branch or body, as do expression statements that are
+      just a literal.
+    - The loop body block that `for` desugars to, { { body } increment; },
+      becomes { body increment; } when the body declares nothing, saving
+      an environment per iteration.
+
+    Expression visitors return the replacement node and statement visitors
+    return the replacement statement, or None when it can be dropped. The
+    result has to be resolved again, as blocks may have gone away.
+    """
+    def __init__(self):
+        self.folder = Evaluator()
+
+    def optimize(self, statements: List[Stmt]) -> List[Stmt]:
+        optimized = []
+        for statement in statements:
+            if statement is not None:
+                statement = statement.accept(self)
+            if statement is not None:
+                optimized.append(statement)
+        return optimized
+
+    def fold(self, node: Expr) -> Expr:
+        try:
+            return Literal(node.accept(self.folder))
+        except RuntimeError:
+            return node
+
+    # --- Statements ---
+
+    def visit_block(self, stmt: Block):
+        stmt.statements = self.optimize(stmt.statements)
+        return stmt
+
+    def visit_expression(self, stmt: Expression):
+        stmt.expression = stmt.expression.accept(self)
+        if isinstance(stmt.expression, Literal):
+            return None
+        return stmt
+
+    def visit_print(self, stmt: Print):
+        stmt.expression = stmt.expression.accept(self)
+        return stmt
+
+    def visit_var(self, stmt: Var):
+        if stmt.initializer is not None:
+            stmt.initializer = stmt.initializer.accept(self)
+        return stmt
+
+    def visit_if(self, stmt: If):
+        stmt.condition = stmt.condition.accept(self)
+        then_branch = stmt.then_branch.accept(self)
+        else_branch = stmt.else_branch.accept(self) if stmt.else_branch is not None else None
+        if isinstance(stmt.condition, Literal):
+            return then_branch if self.folder._is_truthy(stmt.condition.value) else else_branch
+        if then_branch is None and else_branch is None:
+            # The condition is still evaluated for its side effects.
+            return Expression(stmt.condition)
+        stmt.then_branch = then_branch if then_branch is not None else Block([])
+        stmt.else_branch = else_branch
+        return stmt
+
+    def visit_while(self, stmt: While):
+        stmt.condition = stmt.condition.accept(self)
+        if isinstance(stmt.condition, Literal) and not self.folder._is_truthy(stmt.condition.value):
+            return None
+        body = stmt.body.accept(self)
+        stmt.body = body if body is not None else Block([])
+        if isinstance(body, Block) and len(body.statements) == 2:
+            inner, increment = body.statements
+            if isinstance(inner, Block) and isinstance(increment, Expression) and not declares(inner.statements):
+                body.statements = inner.statements + [increment]
+        return stmt
+
+    def visit_function(self, stmt: Function):
+        # A body that has not been parsed yet stays as it is.
+        if not isinstance(stmt.body, LazyBody):
+            stmt.body = self.optimize(stmt.body)
+        return stmt
+
+    def visit_return(self, stmt: Return):
+        if stmt.value is not None:
+            stmt.value = stmt.value.accept(self)
+        return stmt
+
+    def visit_class(self, stmt: Class):
+        for method in stmt.methods:
+            method.accept(self)
+        return stmt
+
+    # --- Expressions ---
+
+    def visit_binary(self, node: Binary):
+        node.left = node.left.accept(self)
+        node.right = node.right.accept(self)
+        if isinstance(node.left, Literal) and isinstance(node.right, Literal):
+            return self.fold(node)
+        return node
+
+    def visit_unary(self, node: Unary):
+        node.right = node.right.accept(self)
+        if isinstance(node.right, Literal):
+            return self.fold(node)
+        return node
+
+    def visit_logical(self, node: Logical):
+        node.left = node.left.accept(self)
+        node.right = node.right.accept(self)
+        if isinstance(node.left, Literal):
+            # The left operand decides whether the right one is the result.
+            truthy = self.folder._is_truthy(node.left.value)
+            if truthy == (node.operator.kind == OR):
+                return node.left
+            return node.right
+        return node
+
+    def visit_grouping(self, node: Grouping):
+        return node.expression.accept(self)
+
+    def visit_literal(self, node: Literal):
+        return node
+
+    def visit_variable(self, node: Variable):
+        return node
+
+    def visit_assign(self, node: Assign):
+        node.value = node.value.accept(self)
+        return node
+
+    def visit_call(self, node: Call):
+        node.callee = node.callee.accept(self)
+        node.arguments = [argument.accept(self) for argument in node.arguments]
+        return node
+
+    def visit_get(self, node: Get):
+        node.obj = node.obj.accept(self)
+        return node
+
+    def visit_set(self, node: Set):
+        node.obj = node.obj.accept(self)
+        node.value = node.value.accept(self)
+        return node
+
+    def visit_this(self, node: This):
+        return node
+
+    def visit_super(self, node: Super):
+        return node
+
+
+def optimize(statements: List[Stmt], level: int) -> List[Stmt]:
+    """Returns the program optimized for `level`; level 0 leaves it alone."""
+    if level == 0:
+        return statements
+    return Optimizer().optimize(statements)
@@ -0,0 +1,204 @@
+from array import array
+from app.parser.ast import (
+    Print, Expression, Literal, Grouping, Unary, Binary, Assign, Variable, Var,
+    Block, If, Logical, While, Function, Return, Call, Class, Get, Set, This,
+    Super
+)
+
+# How a field is stored: a single child node (or None), a list of child
+# nodes, a plain object reference such as a token or a literal value, a
+# small int (or None) kept inline in `links`, such as a resolved slot, or
+# any other value the resolver or an engine sets, kept in a side table.
+NODE, NODES, REF, INT, SIDE = range(5)
+
+# The fields of every node class. Each node gets four int slots in
+# `links`, enough for any mix of children and ints in this grammar (a
+# list of children takes two: its start in `children` and its length).
+LAYOUT = {
+    Binary: (('left', NODE), ('operator', REF), ('right', NODE), ('operands', INT)),
+    Logical: (('left', NODE), ('operator', REF), ('right', NODE)),
+    Unary: (('operator', REF), ('right', NODE), ('operands', INT)),
+    Literal: (('value', REF),),
+    Grouping: (('expression', NODE),),
+    Variable: (('name', REF), ('access', INT), ('slot', INT), ('stamp', INT)),
+    Assign: (('name', REF), ('value', NODE), ('access', INT), ('slot', INT), ('stamp', INT)),
+    Call: (('callee', NODE), ('paren', REF), ('arguments', NODES)),
+    Get: (('obj', NODE), ('name', REF), ('cache', SIDE), ('shape', SIDE), ('slot', SIDE)),
+    Set: (('obj', NODE), ('name', REF), ('value', NODE), ('cache', SIDE), ('shape', SIDE), ('slot', SIDE),
+          ('before', SIDE), ('after', SIDE)),
+    This: (('keyword', REF), ('access', INT), ('slot', INT)),
+    Super: (('keyword', REF), ('method', REF), ('access', INT), ('slot', INT),
+            ('this_access', INT), ('this_slot', INT)),
+    Expression: (('expression', NODE),),
+    Print: (('expression', NODE),),
+    Var: (('name', REF), ('initializer', NODE), ('slot', INT), ('cell', INT)),
+    Block: (('statements', NODES), ('size', INT)),
+    If: (('condition', NODE), ('then_branch', NODE), ('else_branch', NODE)),
+    While: (('condition', NODE), ('body', NODE)),
+    Function: (('name', REF), ('params', REF), ('body', NODES), ('slot', INT), ('size', INT),
+               ('upvalues', SIDE), ('cells', SIDE)),
+    Return: (('keyword', REF), ('value', NODE)),
+    Class: (('name', REF), ('superclass', NODE), ('methods', NODES), ('slot', INT)),
+}
+LINKS = 4
+
+
+class Arena:
+    """
+    Stores an AST as parallel arrays instead of one object per node. A node
+    is an index: its class in `kinds`, its children in `links` (and
+    `children` for lists of them), and its tokens or literal value in
+    `refs`, as a tuple when it has more than one. The few fields that fit
+    none of these live in `side`, keyed by index and field name.
+
+    `node(index)` returns a lightweight view that is an instance of the
+    original node class, so the resolver, the evaluator and anything else
+    that walks the AST work on an arena unchanged. Views are created on
+    access and compare equal when they refer to the same node; what the
+    resolver writes to a view goes to the arena.
+    """
+    def __init__(self):
+        self.kinds = array('B')
+        self.links = array('i')
+        self.children = array('i')
+        self.refs = []
+        self.side = {}
+        self.roots = array('i')
+
+    @classmethod
+    def parse(cls, parser):
+        """
+        Parses a program straight into an arena, one declaration at a time,
+        so only a single declaration ever exists as node objects.
+        """
+        arena = cls()
+        while not parser.is_at_end():
+            arena.roots.append(arena.add(parser.declaration()))
+        return arena
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def statements(self):
+        return [self.node(index) for index in self.roots]
+
+    def add(self, node):
+        """Copies a node and everything below it into the arena; returns its index."""
+        node_class = type(node)
+        links, refs = [], []
+        for name, storage in LAYOUT[node_class]:
+            value = getattr(node, name)
+            if storage == NODE:
+                links.append(-1 if value is None else self.add(value))
+            elif storage == NODES:
+                indices = [self.add(child) for child in value]
+                links.append(len(self.children))
+                links.append(len(indices))
+                self.children.extend(indices)
+            elif storage == INT:
+                links.append(-1 if value is None else value)
+            elif storage == REF:
+                refs.append(value)
+        links.extend([-1] * (LINKS - len(links)))
+
+        index = len(self.kinds)
+        for name, storage in LAYOUT[node_class]:
+            if storage == SIDE and getattr(node, name):
+                self.side[index, name] = getattr(node, name)
+        self.kinds.append(KINDS[node_class])
+        self.links.extend(links)
+        self.refs.append(refs[0] if len(refs) == 1 else tuple(refs) or None)
+        return index
+
+    def node(self, index):
+        if index < 0:
+            return None
+        return VIEWS[self.kinds[index]](self, index)
+
+
+class View:
+    """Behaviour shared by the generated per-class view types."""
+    __slots__ = ()
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.index == self.index and other.arena is self.arena
+
+    def __hash__(self):
+        return self.index
+
+    def __repr__(self):
+        base = type(self).__mro__[1]
+        return f"<{base.__module__}.{base.__qualname__} object at {hex(id(self))}>"
+
+
+def node_field(slot):
+    def get(self):
+        arena = self.arena
+        return arena.node(arena.links[self.index * LINKS + slot])
+    return property(get)
+
+
+def nodes_field(slot):
+    def get(self):
+        arena = self.arena
+        start = self.index * LINKS + slot
+        first, count = arena.links[start], arena.links[start + 1]
+        return [arena.node(index) for index in arena.children[first:first + count]]
+    return property(get)
+
+
+def int_field(slot):
+    def get(self):
+        value = self.arena.links[self.index * LINKS + slot]
+        return None if value < 0 else value
+
+    def set(self, value):
+        self.arena.links[self.index * LINKS + slot] = -1 if value is None else value
+    return property(get, set)
+
+
+def side_field(name):
+    def get(self):
+        return self.arena.side.get((self.index, name), ())
+
+    def set(self, value):
+        self.arena.side[self.index, name] = value
+    return property(get, set)
+
+
+def ref_field(position, shared):
+    if not shared:
+        return property(lambda self: self.arena.refs[self.index])
+    return property(lambda self: self.arena.refs[self.index][position])
+
+
+def make_view(node_class, fields):
+    # The node class comes first in the bases so its __repr__ and
+    # behaviour win, except for construction.
+    namespace = {'__slots__': ('arena', 'index'), '__init__': View.__init__}
+    slot, position = 0, 0
+    shared = sum(storage == REF for _, storage in fields) > 1
+    for name, storage in fields:
+        if storage == NODE:
+            namespace[name] = node_field(slot)
+            slot += 1
+        elif storage == NODES:
+            namespace[name] = nodes_field(slot)
+            slot += 2
+        elif storage == INT:
+            namespace[name] = int_field(slot)
+            slot += 1
+        elif storage == SIDE:
+            namespace[name] = side_field(name)
+        else:
+            namespace[name] = ref_field(position, shared)
+            position += 1
+    return type(f"{node_class.__name__}View", (node_class, View), namespace)
+
+
+KINDS = {node_class: kind for kind, node_class in enumerate(LAYOUT)}
+VIEWS = [make_view(node_class, fields) for node_class, fields in LAYOUT.items()]
@@ -5,15 +5,24 @@ from app.scan_for.tokens import Token
 
 # --- Base Classes ---
 class Expr:
+    __slots__ = ()
+
     def accept(self, visitor: Visitor):
         raise NotImplementedError("Subclasses must implement this method")
 
 class Stmt:
+    __slots__ = ()
+
     def accept(self, visitor: StmtVisitor):
         raise NotImplementedError("Subclasses must implement this method")
 class Block(Stmt):
+    # The frame size the outermost blocks of top-level code need; the
+    # resolver sets it to 0 for any other block, which shares its frame.
+    __slots__ = ('statements', 'size')
+
     def __init__(self, statements: List[Stmt]):
                 self.statements = statements
+                self.size = None
         
     def accept(self, visitor: StmtVisitor):
                 return visitor.visit_block(self)
@@ -21,23 +30,41 @@ class Block(Stmt):
 # --- NEW: Function and Return Statement Nodes ---
 class Function(Stmt):
     """AST node for a function declaration statement."""
+    # Set by the resolver: the frame slot of a local function's cell, the
+    # size of a call's frame, the (is_local, index) upvalues a closure
+    # captures, and the frame slots of parameters that closures capture.
+    __slots__ = ('name', 'params', 'body', 'slot', 'size', 'upvalues', 'cells')
+
     def __init__(self, name: Token, params: List[Token], body: List[Stmt]):
         self.name = name
         self.params = params
         self.body = body
+        self.slot = None
+        self.size = None
+        self.upvalues = ()
+        self.cells = ()
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visit_function(self)
 
 class Super(Expr):
+    # Where the superclass is, like a Variable, and where 'this' is.
+    __slots__ = ('keyword', 'method', 'access', 'slot', 'this_access', 'this_slot')
+
     def __init__(self, keyword: Token, method: Token):
         self.keyword = keyword
         self.method = method
+        self.access = None
+        self.slot = None
+        self.this_access = None
+        self.this_slot = None
     def accept(self, visitor: Visitor) : return visitor.visit_super(self)
     
 
 class Return(Stmt):
     """AST node for a return statement."""
+    __slots__ = ('keyword', 'value')
+
     def __init__(self, keyword: Token, value: Optional[Expr]):
         self.keyword = keyword
         self.value = value
@@ -47,6 +74,8 @@ class Return(Stmt):
 
 # --- Existing Expression Nodes (unchanged) ---
 class Call(Expr):
+    __slots__ = ('callee', 'paren', 'arguments')
+
     def __init__(self, callee: Expr, paren: Token, arguments: List[Expr]):
         self.callee = callee
         self.paren = paren
@@ -55,6 +84,8 @@ class Call(Expr):
         return visitor.visit_call(self)
                 
 class If(Stmt):
+    __slots__ = ('condition', 'then_branch', 'else_branch')
+
     def __init__(self, condition: Expr, then_branch: Stmt, else_branch: Optional[Stmt]):
         self.condition = condition
         self.then_branch = then_branch
@@ -64,6 +95,8 @@ class If(Stmt):
         return visitor.visit_if(self)
 
 class Logical(Expr):
+    __slots__ = ('left', 'operator', 'right')
+
     def __init__(self, left: Expr, operator: Token, right: Expr):
         self.left = left
         self.operator = operator
@@ -74,14 +107,22 @@ class Logical(Expr):
 # --- Statement Node Classes ---
 
 class Var(Stmt):
+    # The frame slot of a local, and whether closures capture it, so that
+    # it has to be kept in a Cell.
+    __slots__ = ('name', 'initializer', 'slot', 'cell')
+
     def __init__(self, name, initializer=None):
         self.name = name
         self.initializer = initializer
+        self.slot = None
+        self.cell = False
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visit_var(self)
     
 class While(Stmt):
+    __slots__ = ('condition', 'body')
+
     def __init__(self, condition: Expr, body: Stmt):
         self.condition = condition
         self.body = body
@@ -89,6 +130,8 @@ class While(Stmt):
         return visitor.visit_while(self)
 
 class Print(Stmt):
+    __slots__ = ('expression',)
+
     def __init__(self, expression: Expr):
         self.expression = expression
 
@@ -96,6 +139,8 @@ class Print(Stmt):
         return visitor.visit_print(self)
     
 class Expression(Stmt):
+    __slots__ = ('expression',)
+
     def __init__(self, expression: Expr):
         self.expression = expression
 
@@ -109,25 +154,42 @@ class Expression(Stmt):
 # --- Expression Node Classes ---
 
 class Assign(Expr):
+    __slots__ = ('name', 'value', 'access', 'slot', 'stamp')
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
+        self.access = None
+        self.slot = None
+        self.stamp = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_assign(self)
     
 class Variable(Expr):
+    # The resolver sets `access` (LOCAL, CELL or UPVALUE) and `slot` for a
+    # local variable; None means the variable is global. For a global, the
+    # evaluator caches its slot in the global table whose stamp is `stamp`.
+    __slots__ = ('name', 'access', 'slot', 'stamp')
+
     def __init__(self, name):
         self.name = name
+        self.access = None
+        self.slot = None
+        self.stamp = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_variable(self)
     
 class Binary(Expr):
+    # Set by type inference: the type both operands are proven to have.
+    __slots__ = ('left', 'operator', 'right', 'operands')
+
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
         self.right = right
+        self.operands = None
 
     def __repr__(self):
         return f"({self.operator.lexeme} {self.left} {self.right})"
@@ -136,9 +198,13 @@ class Binary(Expr):
         return visitor.visit_binary(self)
 
 class Unary(Expr):
+    # Set by type inference: the type the operand is proven to have.
+    __slots__ = ('operator', 'right', 'operands')
+
     def __init__(self, operator, right):
         self.operator = operator
         self.right = right
+        self.operands = None
 
     def __repr__(self):
         return f"({self.operator.lexeme} {self.right})"
@@ -147,6 +213,8 @@ class Unary(Expr):
         return visitor.visit_unary(self)
     
 class Literal(Expr):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
@@ -164,6 +232,8 @@ class Literal(Expr):
         return visitor.visit_literal(self)
     
 class Grouping(Expr):
+    __slots__ = ('expression',)
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -174,30 +244,58 @@ class Grouping(Expr):
         return visitor.visit_grouping(self)
 
 class Get(Expr):
+    # Set by the engines: the site's inline cache, and the shape of the
+    # first instance whose field it read with the field's slot in its
+    # values. No instance has the shape (), and like an arena's side
+    # fields, these are () until then.
+    __slots__ = ('obj', 'name', 'cache', 'shape', 'slot')
+
     def __init__(self, obj: Expr, name: Token):
         self.obj = obj
         self.name = name
+        self.cache = ()
+        self.shape = ()
+        self.slot = ()
     def accept(self, visitor: Visitor):
         return visitor.visit_get(self)
 
 class Set(Expr):
+    # Set by the engines: the site's inline cache; the shape of the first
+    # instance it wrote a field of in place, with the field's slot in its
+    # values; and the first shape it added the field to, `before`, with the
+    # shape that led to, `after`. No instance has the shape ().
+    __slots__ = ('obj', 'name', 'value', 'cache', 'shape', 'slot', 'before', 'after')
+
     def __init__(self, obj: Expr, name: Token, value: Expr):
         self.obj = obj
         self.name = name
         self.value = value
+        self.cache = ()
+        self.shape = ()
+        self.slot = ()
+        self.before = ()
+        self.after = ()
     def accept(self, visitor: Visitor):
         return visitor.visit_set(self)
 
 class This(Expr):
+    __slots__ = ('keyword', 'access', 'slot')
+
     def __init__(self, keyword: Token):
         self.keyword = keyword
+        self.access = None
+        self.slot = None
     def accept(self, visitor: Visitor):
         return visitor.visit_this(self)
         
 class Class(Stmt):
+    # The frame slot of a local class's cell.
+    __slots__ = ('name', 'superclass', 'methods', 'slot')
+
     def __init__(self, name: Token, superclass:Variable,  methods: List[Function]):
         self.name = name
         self.methods = methods
         self.superclass = superclass
+        self.slot = None
     def accept(self, visitor: StmtVisitor):
         return visitor.visit_class(self)
\ No newline at end of file
@@ -0,0 +1,25 @@
+class CompileError(Exception):
+    """Raised when a lazily parsed function body turns out to have errors."""
+    pass
+
+class LazyBody:
+    """
+    Stands in for the statements of a function body that has not been
+    parsed yet. It holds the body's tokens, up to and including the closing
+    '}', and once the resolver has passed the declaration, the resolver
+    state needed to resolve the body exactly as it would have been in place.
+    """
+    __slots__ = ('parser_class', 'tokens', 'state', 'class_type', 'function_type')
+
+    def __init__(self, parser_class, tokens):
+        self.parser_class = parser_class
+        self.tokens = tokens
+        self.state = None
+        self.class_type = None
+        self.function_type = None
+
+    def defer(self, state, class_type, function_type):
+        """Records the resolver state at the declaration."""
+        self.state = state
+        self.class_type = class_type
+        self.function_type = function_type
@@ -4,15 +4,26 @@ from app.parser.ast import (
     Variable, Var, Block, If, Logical, While, Function, Return, Call, Class,
     Get, Set, This, Super
 )
-from app.scan_for.tokens import Token
+from app.parser.lazy import LazyBody
+from app.scan_for.tokens import (
+    Token, LEFT_PAREN, RIGHT_PAREN, LEFT_BRACE, RIGHT_BRACE, COMMA, DOT, MINUS,
+    PLUS, SEMICOLON, SLASH, STAR, BANG, BANG_EQUAL, EQUAL, EQUAL_EQUAL, GREATER,
+    GREATER_EQUAL, LESS, LESS_EQUAL, IDENTIFIER, STRING, NUMBER, AND, CLASS,
+    ELSE, FALSE, FUN, FOR, IF, NIL, OR, PRINT, RETURN, SUPER, THIS, TRUE, VAR,
+    WHILE, EOF
+)
 
 class ParseError(Exception):
     pass
 
 class Parser:
+    # In lazy mode function bodies are only skipped; see skip_body().
+    lazy = False
+
     def __init__(self, tokens):
         self.tokens = tokens
         self.current = 0
+        self.had_error = False
 
     def parse(self):
         statements = []
@@ -26,66 +37,88 @@ class Parser:
         Parses a declaration. If it finds an error, it will raise a ParseError
         which will be caught by the main script.
         """
-        if self.match('CLASS'):
+        if self.match(CLASS):
             return self.class_declaration()
-        if self.match('FUN'):
+        if self.match(FUN):
             return self.function("function")
-        if self.match('VAR'):
+        if self.match(VAR):
             return self.var_declaration()
         return self.statement()
 
     def class_declaration(self):
-        name = self.consume('IDENTIFIER', "Expect class name.")
+        name = self.consume(IDENTIFIER, "Expect class name.")
         
         superclass = None
-        if self.match('LESS'):
-            self.consume('IDENTIFIER', "Expect superclass name.")
+        if self.match(LESS):
+            self.consume(IDENTIFIER, "Expect superclass name.")
             superclass = Variable(self.previous())
 
-        self.consume('LEFT_BRACE', "Expect '{' before class body.")
+        self.consume(LEFT_BRACE, "Expect '{' before class body.")
         methods = []
-        while not self.check('RIGHT_BRACE') and not self.is_at_end():
+        while not self.check(RIGHT_BRACE) and not self.is_at_end():
             methods.append(self.function("method"))
-        self.consume('RIGHT_BRACE', "Expect '}' after class body.")
+        self.consume(RIGHT_BRACE, "Expect '}' after class body.")
         return Class(name, superclass, methods)
 
     def function(self, kind: str):
-        name = self.consume('IDENTIFIER', f"Expect {kind} name.")
-        self.consume('LEFT_PAREN', f"Expect '(' after {kind} name.")
+        name = self.consume(IDENTIFIER, f"Expect {kind} name.")
+        self.consume(LEFT_PAREN, f"Expect '(' after {kind} name.")
         parameters = []
-        if not self.check('RIGHT_PAREN'):
+        if not self.check(RIGHT_PAREN):
             while True:
                 if len(parameters) >= 255: self.error(self.peek(), "Can't have more than 255 parameters.")
-                parameters.append(self.consume('IDENTIFIER', "Expect parameter name."))
-                if not self.match('COMMA'): break
-        self.consume('RIGHT_PAREN', "Expect ')' after parameters.")
-        self.consume('LEFT_BRACE', f"Expect '{{' before {kind} body.")
-        body = self.block()
+                parameters.append(self.consume(IDENTIFIER, "Expect parameter name."))
+                if not self.match(COMMA): break
+        self.consume(RIGHT_PAREN, "Expect ')' after parameters.")
+        self.consume(LEFT_BRACE, f"Expect '{{' before {kind} body.")
+        body = self.skip_body() if self.lazy else self.block()
         return Function(name, parameters, body)
 
+    def skip_body(self):
+        """
+        Collects the tokens of a function body up to the matching '}' into a
+        LazyBody instead of parsing them. Braces that never balance are an
+        error either way, so those bodies are parsed eagerly to report it.
+        """
+        tokens, depth = [], 1
+        while not self.is_at_end():
+            token = self.advance()
+            tokens.append(token)
+            if token.kind == LEFT_BRACE:
+                depth += 1
+            elif token.kind == RIGHT_BRACE:
+                depth -= 1
+                if depth == 0:
+                    tokens.append(Token('EOF', '', None, token.line))
+                    return LazyBody(type(self), tokens)
+        tokens.append(self.peek())
+        parser = type(self)(tokens)
+        parser.report = self.report
+        return parser.block()
+
     def statement(self):
-        if self.match('FOR'): return self.for_statement()
-        if self.match('IF'): return self.if_statement()
-        if self.match('WHILE'): return self.while_statement()
-        if self.match('LEFT_BRACE'): return Block(self.block())
-        if self.match('PRINT'): return self.print_statement()
-        if self.match('RETURN'): return self.return_statement()
+        if self.match(FOR): return self.for_statement()
+        if self.match(IF): return self.if_statement()
+        if self.match(WHILE): return self.while_statement()
+        if self.match(LEFT_BRACE): return Block(self.block())
+        if self.match(PRINT): return self.print_statement()
+        if self.match(RETURN): return self.return_statement()
         return self.expression_statement()
 
     def for_statement(self):
-        self.consume('LEFT_PAREN', "Expect '(' after 'for'.")
+        self.consume(LEFT_PAREN, "Expect '(' after 'for'.")
         initializer = None
-        if self.match('SEMICOLON'): pass
-        elif self.match('VAR'): initializer = self.var_declaration()
+        if self.match(SEMICOLON): pass
+        elif self.match(VAR): initializer = self.var_declaration()
         else: initializer = self.expression_statement()
         
         condition = None
-        if not self.check('SEMICOLON'): condition = self.expression()
-        self.consume('SEMICOLON', "Expect ';' after loop condition.")
+        if not self.check(SEMICOLON): condition = self.expression()
+        self.consume(SEMICOLON, "Expect ';' after loop condition.")
         
         increment = None
-        if not self.check('RIGHT_PAREN'): increment = self.expression()
-        self.consume('RIGHT_PAREN', "Expect ')' after for clauses.")
+        if not self.check(RIGHT_PAREN): increment = self.expression()
+        self.consume(RIGHT_PAREN, "Expect ')' after for clauses.")
         
         body = self.statement()
         
@@ -96,56 +129,56 @@ class Parser:
         return body
 
     def if_statement(self):
-        self.consume('LEFT_PAREN', "Expect '(' after 'if'.")
+        self.consume(LEFT_PAREN, "Expect '(' after 'if'.")
         condition = self.expression()
-        self.consume('RIGHT_PAREN', "Expect ')' after if condition.")
+        self.consume(RIGHT_PAREN, "Expect ')' after if condition.")
         then_branch = self.statement()
         else_branch = None
-        if self.match('ELSE'): else_branch = self.statement()
+        if self.match(ELSE): else_branch = self.statement()
         return If(condition, then_branch, else_branch)
 
     def while_statement(self):
-        self.consume('LEFT_PAREN', "Expect '(' after 'while'.")
+        self.consume(LEFT_PAREN, "Expect '(' after 'while'.")
         condition = self.expression()
-        self.consume('RIGHT_PAREN', "Expect ')' after condition.")
+        self.consume(RIGHT_PAREN, "Expect ')' after condition.")
         body = self.statement()
         return While(condition, body)
 
     def block(self):
         statements = []
-        while not self.check('RIGHT_BRACE') and not self.is_at_end():
+        while not self.check(RIGHT_BRACE) and not self.is_at_end():
             statements.append(self.declaration())
-        self.consume('RIGHT_BRACE', "Expect '}' after block.")
+        self.consume(RIGHT_BRACE, "Expect '}' after block.")
         return statements
 
     def var_declaration(self):
-        name = self.consume('IDENTIFIER', "Expect variable name.")
+        name = self.consume(IDENTIFIER, "Expect variable name.")
         initializer = None
-        if self.match('EQUAL'): initializer = self.expression()
-        self.consume('SEMICOLON', "Expect ';' after variable declaration.")
+        if self.match(EQUAL): initializer = self.expression()
+        self.consume(SEMICOLON, "Expect ';' after variable declaration.")
         return Var(name, initializer)
 
     def print_statement(self):
         value = self.expression()
-        self.consume('SEMICOLON', "Expect ';' after value.")
+        self.consume(SEMICOLON, "Expect ';' after value.")
         return Print(value)
 
     def return_statement(self):
         keyword = self.previous()
         value = None
-        if not self.check('SEMICOLON'): value = self.expression()
-        self.consume('SEMICOLON', "Expect ';' after return value.")
+        if not self.check(SEMICOLON): value = self.expression()
+        self.consume(SEMICOLON, "Expect ';' after return value.")
         return Return(keyword, value)
 
     def expression_statement(self):
         expr = self.expression()
-        self.match('SEMICOLON')
+        self.match(SEMICOLON)
         return Expression(expr)
 
     def expression(self): return self.assignment()
     def assignment(self):
         expr = self.logic_or()
-        if self.match('EQUAL'):
+        if self.match(EQUAL):
             equals = self.previous()
             value = self.assignment()
             if isinstance(expr, Variable): return Assign(expr.name, value)
@@ -155,48 +188,48 @@ class Parser:
 
     def logic_or(self):
         expr = self.logic_and()
-        while self.match('OR'):
+        while self.match(OR):
             operator, right = self.previous(), self.logic_and()
             expr = Logical(expr, operator, right)
         return expr
 
     def logic_and(self):
         expr = self.equality()
-        while self.match('AND'):
+        while self.match(AND):
             operator, right = self.previous(), self.equality()
             expr = Logical(expr, operator, right)
         return expr
 
     def equality(self):
         expr = self.comparison()
-        while self.match("EQUAL_EQUAL", "BANG_EQUAL"):
+        while self.match(EQUAL_EQUAL, BANG_EQUAL):
             operator, right = self.previous(), self.comparison()
             expr = Binary(expr, operator, right)
         return expr
 
     def comparison(self):
         expr = self.term()
-        while self.match("GREATER", "GREATER_EQUAL", "LESS", "LESS_EQUAL"):
+        while self.match(GREATER, GREATER_EQUAL, LESS, LESS_EQUAL):
             operator, right = self.previous(), self.term()
             expr = Binary(expr, operator, right)
         return expr
 
     def term(self):
         expr = self.factor()
-        while self.match("MINUS", "PLUS"):
+        while self.match(MINUS, PLUS):
             operator, right = self.previous(), self.factor()
             expr = Binary(expr, operator, right)
         return expr
 
     def factor(self):
         expr = self.unary()
-        while self.match("SLASH", "STAR"):
+        while self.match(SLASH, STAR):
             operator, right = self.previous(), self.unary()
             expr = Binary(expr, operator, right)
         return expr
 
     def unary(self):
-        if self.match("BANG", "MINUS"):
+        if self.match(BANG, MINUS):
             operator, right = self.previous(), self.unary()
             return Unary(operator, right)
         return self.call()
@@ -204,54 +237,58 @@ class Parser:
     def call(self):
         expr = self.primary()
         while True:
-            if self.match('LEFT_PAREN'):
+            if self.match(LEFT_PAREN):
                 expr = self.finish_call(expr)
-            elif self.match('DOT'):
-                name = self.consume('IDENTIFIER', "Expect property name after '.'.")
+            elif self.match(DOT):
+                name = self.consume(IDENTIFIER, "Expect property name after '.'.")
                 expr = Get(expr, name)
             else: break
         return expr
 
     def finish_call(self, callee: Expr):
         arguments = []
-        if not self.check('RIGHT_PAREN'):
+        if not self.check(RIGHT_PAREN):
             while True:
                 if len(arguments) >= 255: self.error(self.peek(), "Can't have more than 255 arguments.")
                 arguments.append(self.expression())
-                if not self.match('COMMA'): break
-        paren = self.consume('RIGHT_PAREN', "Expect ')' after arguments.")
+                if not self.match(COMMA): break
+        paren = self.consume(RIGHT_PAREN, "Expect ')' after arguments.")
         return Call(callee, paren, arguments)
 
     def primary(self):
-        if self.match("TRUE"): return Literal(True)
-        if self.match("FALSE"): return Literal(False)
-        if self.match("NIL"): return Literal(None)
-        if self.match("NUMBER", "STRING"): return Literal(self.previous().literal)
-        if self.match("SUPER"):
+        if self.match(TRUE): return Literal(True)
+        if self.match(FALSE): return Literal(False)
+        if self.match(NIL): return Literal(None)
+        if self.match(NUMBER, STRING): return Literal(self.previous().literal)
+        if self.match(SUPER):
             keyword = self.previous()
-            self.consume('DOT', "Expect '.' after 'super'.")
-            method = self.consume('IDENTIFIER', "Expect superclass method name.")
+            self.consume(DOT, "Expect '.' after 'super'.")
+            method = self.consume(IDENTIFIER, "Expect superclass method name.")
             return Super(keyword, method)
-        if self.match("THIS"): return This(self.previous())
-        if self.match("IDENTIFIER"): return Variable(self.previous())
-        if self.match('LEFT_PAREN'):
+        if self.match(THIS): return This(self.previous())
+        if self.match(IDENTIFIER): return Variable(self.previous())
+        if self.match(LEFT_PAREN):
             expr = self.expression()
-            self.consume('RIGHT_PAREN', "Expect ')' after expression")
+            self.consume(RIGHT_PAREN, "Expect ')' after expression")
             return Grouping(expr)
         raise self.error(self.peek(), "Expect expression.")
 
     def error(self, token, message):
-        if token.type == 'EOF': print(f"[line {token.line}] Error at end: {message}", file=sys.stderr)
-        else: print(f"[line {token.line}] Error at '{token.lexeme}': {message}", file=sys.stderr)
+        self.had_error = True
+        if token.kind == EOF: self.report(f"[line {token.line}] Error at end: {message}")
+        else: self.report(f"[line {token.line}] Error at '{token.lexeme}': {message}")
         return ParseError()
 
+    def report(self, message):
+        print(message, file=sys.stderr)
+
     def consume(self, token_type, error_msg):
         if self.check(token_type): return self.advance()
         raise self.error(self.peek(), error_msg)
 
     def check(self, token_type):
         if self.is_at_end(): return False
-        return self.peek().type == token_type
+        return self.peek().kind == token_type
 
     def match(self, *token_types):
         for token_type in token_types:
@@ -265,7 +302,7 @@ class Parser:
         return self.previous()
 
     def peek(self): return self.tokens[self.current]
-    def is_at_end(self): return self.peek().type == "EOF"
+    def is_at_end(self): return self.peek().kind == EOF
     def previous(self): return self.tokens[self.current - 1]
     
     # The synchronize method is removed to ensure the parser fails fast.
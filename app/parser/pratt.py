@@ -0,0 +1,128 @@
+from app.parser.ast import (
+    Literal, Grouping, Unary, Binary, Assign, Variable, Logical, Get, Set,
+    This, Super
+)
+from app.parser.parser import Parser
+from app.scan_for.tokens import (
+    TokenTypes, LEFT_PAREN, RIGHT_PAREN, DOT, MINUS, PLUS, SLASH, STAR, BANG,
+    BANG_EQUAL, EQUAL, EQUAL_EQUAL, GREATER, GREATER_EQUAL, LESS, LESS_EQUAL,
+    IDENTIFIER, STRING, NUMBER, AND, FALSE, NIL, OR, SUPER, THIS, TRUE
+)
+
+# Binding powers, weakest first. NONE ends every expression loop.
+(
+    NONE, ASSIGNMENT, LOGIC_OR, LOGIC_AND, EQUALITY, COMPARISON, TERM, FACTOR,
+    UNARY, CALL,
+) = range(10)
+
+
+class PrattParser(Parser):
+    """
+    Parses expressions by operator precedence instead of one method per
+    grammar level. The token kind indexes straight into the PREFIX, INFIX
+    and PRECEDENCE tables, so a literal costs one lookup rather than a walk
+    through every level of the descent. Statements are parsed by Parser and
+    the resulting AST and error messages are the same.
+    """
+    def expression(self):
+        return self.parse_precedence(ASSIGNMENT)
+
+    def parse_precedence(self, precedence):
+        tokens = self.tokens
+        token = tokens[self.current]
+        prefix = PREFIX[token.kind]
+        if prefix is None:
+            raise self.error(token, "Expect expression.")
+        self.current += 1
+        expr = prefix(self, token)
+        while True:
+            token = tokens[self.current]
+            if PRECEDENCE[token.kind] < precedence:
+                return expr
+            self.current += 1
+            expr = INFIX[token.kind](self, expr, token)
+
+    # --- Prefix rules ---
+
+    def prefix_literal(self, token):
+        return Literal(token.literal)
+
+    def prefix_true(self, token): return Literal(True)
+    def prefix_false(self, token): return Literal(False)
+    def prefix_nil(self, token): return Literal(None)
+
+    def prefix_variable(self, token):
+        return Variable(token)
+
+    def prefix_this(self, token):
+        return This(token)
+
+    def prefix_super(self, token):
+        self.consume(DOT, "Expect '.' after 'super'.")
+        method = self.consume(IDENTIFIER, "Expect superclass method name.")
+        return Super(token, method)
+
+    def prefix_grouping(self, token):
+        expr = self.expression()
+        self.consume(RIGHT_PAREN, "Expect ')' after expression")
+        return Grouping(expr)
+
+    def prefix_unary(self, token):
+        return Unary(token, self.parse_precedence(UNARY))
+
+    # --- Infix rules ---
+
+    def infix_binary(self, left, token):
+        right = self.parse_precedence(PRECEDENCE[token.kind] + 1)
+        return Binary(left, token, right)
+
+    def infix_logical(self, left, token):
+        right = self.parse_precedence(PRECEDENCE[token.kind] + 1)
+        return Logical(left, token, right)
+
+    def infix_call(self, left, token):
+        return self.finish_call(left)
+
+    def infix_dot(self, left, token):
+        name = self.consume(IDENTIFIER, "Expect property name after '.'.")
+        return Get(left, name)
+
+    def infix_assign(self, left, token):
+        # Right-associative, and the target is only checked once the value
+        # has parsed, which keeps the error order of Parser.assignment.
+        value = self.parse_precedence(ASSIGNMENT)
+        if isinstance(left, Variable): return Assign(left.name, value)
+        elif isinstance(left, Get): return Set(left.obj, left.name, value)
+        raise self.error(token, "Invalid assignment target.")
+
+
+PREFIX = [None] * len(TokenTypes)
+PREFIX[NUMBER] = PrattParser.prefix_literal
+PREFIX[STRING] = PrattParser.prefix_literal
+PREFIX[TRUE] = PrattParser.prefix_true
+PREFIX[FALSE] = PrattParser.prefix_false
+PREFIX[NIL] = PrattParser.prefix_nil
+PREFIX[IDENTIFIER] = PrattParser.prefix_variable
+PREFIX[THIS] = PrattParser.prefix_this
+PREFIX[SUPER] = PrattParser.prefix_super
+PREFIX[LEFT_PAREN] = PrattParser.prefix_grouping
+PREFIX[BANG] = PrattParser.prefix_unary
+PREFIX[MINUS] = PrattParser.prefix_unary
+
+INFIX = [None] * len(TokenTypes)
+PRECEDENCE = [NONE] * len(TokenTypes)
+
+def infix(kinds, precedence, rule):
+    for kind in kinds:
+        INFIX[kind] = rule
+        PRECEDENCE[kind] = precedence
+
+infix([EQUAL], ASSIGNMENT, PrattParser.infix_assign)
+infix([OR], LOGIC_OR, PrattParser.infix_logical)
+infix([AND], LOGIC_AND, PrattParser.infix_logical)
+infix([EQUAL_EQUAL, BANG_EQUAL], EQUALITY, PrattParser.infix_binary)
+infix([GREATER, GREATER_EQUAL, LESS, LESS_EQUAL], COMPARISON, PrattParser.infix_binary)
+infix([MINUS, PLUS], TERM, PrattParser.infix_binary)
+infix([SLASH, STAR], FACTOR, PrattParser.infix_binary)
+infix([LEFT_PAREN], CALL, PrattParser.infix_call)
+infix([DOT], CALL, PrattParser.infix_dot)
@@ -0,0 +1,111 @@
+import sys
+from app.parser.ast import (
+    Print, Expression, Grouping, Unary, Binary, Assign, Variable, Var, Block, If,
+    Logical, While, Function, Return, Call, Class, Get, Set, This, Super
+)
+from app.parser.lazy import LazyBody
+
+# Pieces are collected and written in batches of this many.
+BATCH = 4096
+
+
+def write_ast(node, out=sys.stdout, full=False):
+    """
+    Writes `str(node)` to `out` without recursing, so arbitrarily deep trees
+    print in linear time and constant Python stack. Binary, Unary, Grouping
+    and Expression nodes are expanded here the way their __repr__ does;
+    anything else is written with str(), unless `full` is set, in which case
+    the nodes without a __repr__ of their own are written as similar
+    S-expressions.
+    """
+    parts = []
+    pending = [node]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif isinstance(item, Expression):
+            pending.append(item.expression)
+        elif isinstance(item, Binary):
+            parts.append(f"({item.operator.lexeme} ")
+            pending += (")", item.right, " ", item.left)
+        elif isinstance(item, Unary):
+            parts.append(f"({item.operator.lexeme} ")
+            pending += (")", item.right)
+        elif isinstance(item, Grouping):
+            parts.append("(group ")
+            pending += (")", item.expression)
+        else:
+            pieces = form(item) if full else None
+            if pieces is None:
+                parts.append(str(item))
+            else:
+                pending += reversed(pieces)
+        if len(parts) >= BATCH:
+            out.write(''.join(parts))
+            parts.clear()
+    out.write(''.join(parts))
+
+
+def write_program(statements, out=sys.stdout):
+    """Writes every statement in full, one per line."""
+    for statement in statements:
+        write_ast(statement, out, full=True)
+        out.write("\n")
+
+
+def sexpr(head, *items):
+    """The pieces of `(head item ...)`; items are nodes or strings."""
+    pieces = [f"({head}"]
+    for item in items:
+        pieces += (" ", item)
+    pieces.append(")")
+    return pieces
+
+
+def form(node):
+    """The pieces of the S-expression for a node without a matching __repr__, or None."""
+    if isinstance(node, Logical):
+        return sexpr(node.operator.lexeme, node.left, node.right)
+    if isinstance(node, Variable):
+        return [node.name.lexeme]
+    if isinstance(node, This):
+        return ["this"]
+    if isinstance(node, Super):
+        return sexpr("super", node.method.lexeme)
+    if isinstance(node, Assign):
+        return sexpr("=", node.name.lexeme, node.value)
+    if isinstance(node, Call):
+        return sexpr("call", node.callee, *node.arguments)
+    if isinstance(node, Get):
+        return sexpr(".", node.obj, node.name.lexeme)
+    if isinstance(node, Set):
+        return sexpr("=", Get(node.obj, node.name), node.value)
+    if isinstance(node, Print):
+        return sexpr("print", node.expression)
+    if isinstance(node, Var):
+        if node.initializer is None:
+            return sexpr("var", node.name.lexeme)
+        return sexpr("var", node.name.lexeme, node.initializer)
+    if isinstance(node, Block):
+        return sexpr("block", *node.statements)
+    if isinstance(node, If):
+        if node.else_branch is None:
+            return sexpr("if", node.condition, node.then_branch)
+        return sexpr("if", node.condition, node.then_branch, node.else_branch)
+    if isinstance(node, While):
+        return sexpr("while", node.condition, node.body)
+    if isinstance(node, Return):
+        if node.value is None:
+            return sexpr("return")
+        return sexpr("return", node.value)
+    if isinstance(node, Function):
+        params = "(" + " ".join(param.lexeme for param in node.params) + ")"
+        if isinstance(node.body, LazyBody):
+            return sexpr("fun", node.name.lexeme, params, "...")
+        return sexpr("fun", node.name.lexeme, params, *node.body)
+    if isinstance(node, Class):
+        if node.superclass is None:
+            return sexpr("class", node.name.lexeme, *node.methods)
+        return sexpr("class", node.name.lexeme, "<", node.superclass.name.lexeme, *node.methods)
+    return None
@@ -0,0 +1,223 @@
+from app.parser.ast import (
+    Print, Expression, Literal, Grouping, Unary, Binary, Assign, Variable, Var,
+    Block, If, Logical, While, Function, Return, Call, Class, Get, Set, This,
+    Super
+)
+from app.parser.parser import Parser
+from app.parser.pratt import PREFIX, PRECEDENCE, ASSIGNMENT, UNARY
+from app.scan_for.tokens import (
+    LEFT_PAREN, RIGHT_PAREN, LEFT_BRACE, RIGHT_BRACE, COMMA, DOT, SEMICOLON,
+    EQUAL, LESS, IDENTIFIER, STRING, NUMBER, AND, CLASS, ELSE,
+    FALSE, FUN, FOR, IF, NIL, OR, PRINT, RETURN, SUPER, THIS, TRUE, VAR, WHILE
+)
+
+
+class StackParser(Parser):
+    """
+    Parses without recursing on the Python stack, so nesting depth is only
+    limited by memory. Every grammar rule is a generator that yields the
+    rule it needs parsed next and is sent back the result; `drive` keeps
+    the suspended rules on an explicit stack. Expressions use the binding
+    powers of PrattParser. The AST and error messages match Parser's.
+    """
+    def declaration(self):
+        return self.drive(self.parse_declaration())
+
+    def expression(self):
+        return self.drive(self.parse_expression())
+
+    def block(self):
+        return self.drive(self.parse_block())
+
+    def drive(self, rule):
+        stack = [rule]
+        value = None
+        while True:
+            try:
+                request = stack[-1].send(value)
+            except StopIteration as done:
+                stack.pop()
+                if not stack:
+                    return done.value
+                value = done.value
+            else:
+                stack.append(request)
+                value = None
+
+    # --- Statements ---
+
+    def parse_declaration(self):
+        if self.match(CLASS):
+            return (yield self.parse_class_declaration())
+        if self.match(FUN):
+            return (yield self.parse_function("function"))
+        if self.match(VAR):
+            return (yield self.parse_var_declaration())
+        return (yield self.parse_statement())
+
+    def parse_class_declaration(self):
+        name = self.consume(IDENTIFIER, "Expect class name.")
+
+        superclass = None
+        if self.match(LESS):
+            self.consume(IDENTIFIER, "Expect superclass name.")
+            superclass = Variable(self.previous())
+
+        self.consume(LEFT_BRACE, "Expect '{' before class body.")
+        methods = []
+        while not self.check(RIGHT_BRACE) and not self.is_at_end():
+            methods.append((yield self.parse_function("method")))
+        self.consume(RIGHT_BRACE, "Expect '}' after class body.")
+        return Class(name, superclass, methods)
+
+    def parse_function(self, kind: str):
+        name = self.consume(IDENTIFIER, f"Expect {kind} name.")
+        self.consume(LEFT_PAREN, f"Expect '(' after {kind} name.")
+        parameters = []
+        if not self.check(RIGHT_PAREN):
+            while True:
+                if len(parameters) >= 255: self.error(self.peek(), "Can't have more than 255 parameters.")
+                parameters.append(self.consume(IDENTIFIER, "Expect parameter name."))
+                if not self.match(COMMA): break
+        self.consume(RIGHT_PAREN, "Expect ')' after parameters.")
+        self.consume(LEFT_BRACE, f"Expect '{{' before {kind} body.")
+        body = self.skip_body() if self.lazy else (yield self.parse_block())
+        return Function(name, parameters, body)
+
+    def parse_statement(self):
+        if self.match(FOR): return (yield self.parse_for_statement())
+        if self.match(IF): return (yield self.parse_if_statement())
+        if self.match(WHILE): return (yield self.parse_while_statement())
+        if self.match(LEFT_BRACE): return Block((yield self.parse_block()))
+        if self.match(PRINT): return (yield self.parse_print_statement())
+        if self.match(RETURN): return (yield self.parse_return_statement())
+        return (yield self.parse_expression_statement())
+
+    def parse_for_statement(self):
+        self.consume(LEFT_PAREN, "Expect '(' after 'for'.")
+        initializer = None
+        if self.match(SEMICOLON): pass
+        elif self.match(VAR): initializer = yield self.parse_var_declaration()
+        else: initializer = yield self.parse_expression_statement()
+
+        condition = None
+        if not self.check(SEMICOLON): condition = yield self.parse_expression()
+        self.consume(SEMICOLON, "Expect ';' after loop condition.")
+
+        increment = None
+        if not self.check(RIGHT_PAREN): increment = yield self.parse_expression()
+        self.consume(RIGHT_PAREN, "Expect ')' after for clauses.")
+
+        body = yield self.parse_statement()
+
+        if increment is not None: body = Block([body, Expression(increment)])
+        if condition is None: condition = Literal(True)
+        body = While(condition, body)
+        if initializer is not None: body = Block([initializer, body])
+        return body
+
+    def parse_if_statement(self):
+        self.consume(LEFT_PAREN, "Expect '(' after 'if'.")
+        condition = yield self.parse_expression()
+        self.consume(RIGHT_PAREN, "Expect ')' after if condition.")
+        then_branch = yield self.parse_statement()
+        else_branch = None
+        if self.match(ELSE): else_branch = yield self.parse_statement()
+        return If(condition, then_branch, else_branch)
+
+    def parse_while_statement(self):
+        self.consume(LEFT_PAREN, "Expect '(' after 'while'.")
+        condition = yield self.parse_expression()
+        self.consume(RIGHT_PAREN, "Expect ')' after condition.")
+        body = yield self.parse_statement()
+        return While(condition, body)
+
+    def parse_block(self):
+        statements = []
+        while not self.check(RIGHT_BRACE) and not self.is_at_end():
+            statements.append((yield self.parse_declaration()))
+        self.consume(RIGHT_BRACE, "Expect '}' after block.")
+        return statements
+
+    def parse_var_declaration(self):
+        name = self.consume(IDENTIFIER, "Expect variable name.")
+        initializer = None
+        if self.match(EQUAL): initializer = yield self.parse_expression()
+        self.consume(SEMICOLON, "Expect ';' after variable declaration.")
+        return Var(name, initializer)
+
+    def parse_print_statement(self):
+        value = yield self.parse_expression()
+        self.consume(SEMICOLON, "Expect ';' after value.")
+        return Print(value)
+
+    def parse_return_statement(self):
+        keyword = self.previous()
+        value = None
+        if not self.check(SEMICOLON): value = yield self.parse_expression()
+        self.consume(SEMICOLON, "Expect ';' after return value.")
+        return Return(keyword, value)
+
+    def parse_expression_statement(self):
+        expr = yield self.parse_expression()
+        self.match(SEMICOLON)
+        return Expression(expr)
+
+    # --- Expressions ---
+
+    def parse_expression(self):
+        return self.parse_precedence(ASSIGNMENT)
+
+    def parse_precedence(self, precedence):
+        token = self.peek()
+        kind = token.kind
+        if PREFIX[kind] is None:
+            raise self.error(token, "Expect expression.")
+        self.advance()
+        if kind == NUMBER or kind == STRING: expr = Literal(token.literal)
+        elif kind == IDENTIFIER: expr = Variable(token)
+        elif kind == TRUE: expr = Literal(True)
+        elif kind == FALSE: expr = Literal(False)
+        elif kind == NIL: expr = Literal(None)
+        elif kind == THIS: expr = This(token)
+        elif kind == LEFT_PAREN:
+            expr = yield self.parse_expression()
+            self.consume(RIGHT_PAREN, "Expect ')' after expression")
+            expr = Grouping(expr)
+        elif kind == SUPER:
+            self.consume(DOT, "Expect '.' after 'super'.")
+            method = self.consume(IDENTIFIER, "Expect superclass method name.")
+            expr = Super(token, method)
+        else:
+            expr = Unary(token, (yield self.parse_precedence(UNARY)))
+
+        while True:
+            operator = self.peek()
+            kind = operator.kind
+            if PRECEDENCE[kind] < precedence:
+                return expr
+            self.advance()
+            if kind == LEFT_PAREN:
+                expr = yield self.parse_call(expr)
+            elif kind == DOT:
+                expr = Get(expr, self.consume(IDENTIFIER, "Expect property name after '.'."))
+            elif kind == EQUAL:
+                # As in Parser.assignment, the target is checked after the value.
+                value = yield self.parse_precedence(ASSIGNMENT)
+                if isinstance(expr, Variable): expr = Assign(expr.name, value)
+                elif isinstance(expr, Get): expr = Set(expr.obj, expr.name, value)
+                else: raise self.error(operator, "Invalid assignment target.")
+            elif kind == OR or kind == AND:
+                expr = Logical(expr, operator, (yield self.parse_precedence(PRECEDENCE[kind] + 1)))
+            else:
+                expr = Binary(expr, operator, (yield self.parse_precedence(PRECEDENCE[kind] + 1)))
+
+    def parse_call(self, callee):
+        arguments = []
+        if not self.check(RIGHT_PAREN):
+            while True:
+                if len(arguments) >= 255: self.error(self.peek(), "Can't have more than 255 arguments.")
+                arguments.append((yield self.parse_expression()))
+                if not self.match(COMMA): break
+        paren = self.consume(RIGHT_PAREN, "Expect ')' after arguments.")
+        return Call(callee, paren, arguments)
@@ -0,0 +1,41 @@
+from itertools import islice
+
+# How many tokens are pulled from the source at a time.
+BATCH = 256
+
+
+class TokenStream(dict):
+    """
+    Lets Parser index into a token iterator as if it were the full token
+    list. Tokens are pulled on demand in small batches, and only a small
+    window behind the newest requested one is kept, which is all `peek()`
+    and `previous()` ever need. Buffered tokens are plain dict entries, so
+    the common case costs no Python-level call; `__missing__` refills.
+    """
+    def __init__(self, tokens, window: int = 2):
+        super().__init__()
+        self.source = iter(tokens)
+        self.window = window
+        self.start = 0
+        self.end = 0
+
+    def __missing__(self, index: int):
+        if index < self.start:
+            raise IndexError(f"token {index} is no longer buffered")
+        keep = max(self.start, index - self.window + 1)
+        for old in range(self.start, min(keep, self.end)):
+            del self[old]
+        self.start = keep
+        while index >= self.end:
+            before = len(self)
+            self.update(zip(range(self.end, self.end + BATCH), islice(self.source, BATCH)))
+            pulled = len(self) - before
+            if not pulled:
+                raise IndexError(f"token {index} is past the end of the stream")
+            self.end += pulled
+        return self[index]
+
+    def drain(self):
+        """Consumes whatever is left in the underlying iterator."""
+        for _ in self.source:
+            pass
@@ -0,0 +1,80 @@
+import sys
+from app.parser.parser import Parser, ParseError
+from app.parser.lazy import CompileError
+from app.parser.token_stream import TokenStream
+from app.scan_for.streaming import StreamingScanner
+from app.evaluation.evaluator import Evaluator
+from app.resolver.resolver import Resolver
+from app.inference import infer_types
+
+
+class Pipeline:
+    """
+    Runs a script while it is still being read: each top-level declaration
+    is scanned, parsed, resolved and executed as soon as it is complete,
+    and its AST is only kept alive by whatever functions it declared.
+
+    Diagnostics and the exit status are those of the batch pipeline, so
+    they are held back until the whole input has been checked: lexical
+    errors win over syntax errors, which win over resolution errors, which
+    win over a runtime error. Execution stops at the first error of any
+    kind, but output from declarations that already ran stays printed.
+    """
+    def __init__(self, filename, make_parser=Parser, make_evaluator=Evaluator):
+        self.filename = filename
+        self.make_parser = make_parser
+        self.make_evaluator = make_evaluator
+
+    def run(self):
+        """Returns the exit status."""
+        scanner = StreamingScanner(self.filename)
+        scan_errors = []
+        scanner.report = scan_errors.append
+        tokens = TokenStream(scanner.iter_tokens())
+
+        parser = self.make_parser(tokens)
+        parse_errors = []
+        parser.report = parse_errors.append
+
+        evaluator = self.make_evaluator()
+        resolver = Resolver()
+        resolve_errors = []
+        resolver.report = resolve_errors.append
+
+        runtime_error = None
+        compile_error = False
+        try:
+            while not parser.is_at_end():
+                statement = parser.declaration()
+                resolver.resolve_statements([statement])
+                if not resolver.had_error:
+                    infer_types([statement])
+                if not (scanner.has_error or resolver.had_error or runtime_error or compile_error):
+                    try:
+                        evaluator.evaluate_statements([statement])
+                    except RuntimeError as e:
+                        runtime_error = e
+                    except CompileError:
+                        compile_error = True
+        except ParseError:
+            tokens.drain()
+            self.print_all(scan_errors if scanner.has_error else parse_errors)
+            return 65
+
+        if scanner.has_error:
+            self.print_all(scan_errors)
+            return 65
+        self.print_all(parse_errors)
+        if resolver.had_error:
+            self.print_all(resolve_errors)
+            return 65
+        if compile_error:
+            return 65
+        if runtime_error:
+            print(runtime_error, file=sys.stderr)
+            return 70
+        return 0
+
+    def print_all(self, messages):
+        for message in messages:
+            print(message, file=sys.stderr)
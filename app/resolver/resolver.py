@@ -1,15 +1,17 @@
-from __future__ import annotations
 from enum import Enum, auto
 import sys
-from typing import List, Dict
+from typing import List, Dict, Optional
 from app.parser.ast import (
     Expr, Stmt, Assign, Binary, Call, Get, Grouping, Literal, Logical, Set, Super,
     This, Unary, Variable, Block, Class, Expression, Function, If,
     Print, Return, Var, While
 )
 from app.evaluation.visitors import Visitor, StmtVisitor
-from app.evaluation.evaluator import Evaluator
-from app.scan_for.tokens import Token
+from app.environment import LOCAL, CELL, UPVALUE
+from app.parser.parser import ParseError
+from app.parser.lazy import LazyBody, CompileError
+from app.inference import TypeInference
+from app.scan_for.tokens import Token, IDENTIFIER, THIS, SUPER
 
 class FunctionType(Enum):
     NONE = auto()
@@ -22,19 +24,83 @@ class ClassType(Enum):
     CLASS = auto()
     SUBCLASS = auto()
 
+class Local:
+    """
+    A local variable being resolved. Until a closure captures it, it lives
+    directly in its frame slot; once captured, the slot holds a Cell
+    instead, so its declaration and the uses resolved so far are switched
+    over. Local functions and classes, which have no `declaration`, are
+    always kept in cells.
+    """
+    __slots__ = ('slot', 'defined', 'declaration', 'uses')
+
+    def __init__(self, slot: int, declaration):
+        self.slot = slot
+        self.defined = False
+        # The Var that declares it, or the Function it is a parameter of.
+        self.declaration = declaration
+        # (node, field) pairs to switch to CELL; None once it is captured.
+        self.uses = [] if declaration is not None else None
+
+    @property
+    def captured(self) -> bool:
+        return self.uses is None
+
+class FunctionState:
+    """
+    What the resolver tracks for each function it is inside, including the
+    top-level code: its block scopes, the frame slots they take, and the
+    upvalues a closure of it captures, as (is_local, index) pairs naming a
+    slot of the enclosing frame or an upvalue of the enclosing function.
+    """
+    __slots__ = ('enclosing', 'scopes', 'count', 'size', 'upvalues', 'indices')
+
+    def __init__(self, enclosing):
+        self.enclosing = enclosing
+        self.scopes: List[Dict[str, Local]] = []
+        self.count = 0
+        self.size = 0
+        self.upvalues = []
+        self.indices = {}
+
+    def find(self, name: str) -> Optional[Local]:
+        for scope in reversed(self.scopes):
+            local = scope.get(name)
+            if local is not None:
+                return local
+        return None
+
+    def add_upvalue(self, is_local: bool, index: int) -> int:
+        key = (is_local, index)
+        if key not in self.indices:
+            self.indices[key] = len(self.upvalues)
+            self.upvalues.append(key)
+        return self.indices[key]
+
+    def snapshot(self):
+        """A copy of the chain that later declarations cannot change."""
+        state = FunctionState(self.enclosing and self.enclosing.snapshot())
+        state.scopes = [dict(scope) for scope in self.scopes]
+        state.count, state.size = self.count, self.size
+        state.upvalues, state.indices = self.upvalues, self.indices
+        return state
+
 class Resolver(Visitor, StmtVisitor):
-    def __init__(self, evaluator: Evaluator):
-        self.evaluator = evaluator
-        self.scopes: List[Dict[str, bool]] = []
+    def __init__(self):
+        # The top-level code; its locals are those of top-level blocks.
+        self.function = FunctionState(None)
         self.current_function = FunctionType.NONE
         self.current_class = ClassType.NONE
         self.had_error = False
 
     def error(self, token: Token, message: str):
         # In a real compiler, you'd have a better error reporting system.
-        print(f"[line {token.line}] Error: {message}", file=sys.stderr)
+        self.report(f"[line {token.line}] Error: {message}")
         self.had_error = True
 
+    def report(self, message: str):
+        print(message, file=sys.stderr)
+
     def resolve_statements(self, statements: List[Stmt]):
         for statement in statements:
             if statement: self.resolve_statement(statement)
@@ -46,84 +112,166 @@ class Resolver(Visitor, StmtVisitor):
         expr.accept(self)
 
     def begin_scope(self):
-        self.scopes.append({})
+        self.function.scopes.append({})
 
     def end_scope(self):
-        self.scopes.pop()
-
-    def declare(self, name: Token):
-        if not self.scopes: return
-        scope = self.scopes[-1]
-        if name.lexeme in scope:
+        # The slots of a finished scope are free for the next one, as on a stack.
+        function = self.function
+        function.count -= len(function.scopes.pop())
+
+    def declare(self, name: Token, declaration=None) -> Optional[int]:
+        """Gives a local its frame slot and returns it; globals get None."""
+        scopes = self.function.scopes
+        if not scopes: return None
+        if name.lexeme in scopes[-1]:
             self.error(name, "Already a variable with this name in this scope.")
-        scope[name.lexeme] = False
+            return scopes[-1][name.lexeme].slot
+        return self.add_local(name.lexeme, declaration).slot
+
+    def add_local(self, name: str, declaration) -> Local:
+        function = self.function
+        local = function.scopes[-1][name] = Local(function.count, declaration)
+        function.count += 1
+        function.size = max(function.size, function.count)
+        return local
 
     def define(self, name: Token):
-        if not self.scopes: return
-        self.scopes[-1][name.lexeme] = True
+        scopes = self.function.scopes
+        if not scopes: return
+        scopes[-1][name.lexeme].defined = True
 
     def resolve_local(self, expr: Expr, name: Token):
-        for i in range(len(self.scopes) - 1, -1, -1):
-            if name.lexeme in self.scopes[i]:
-                self.evaluator.resolve(expr, len(self.scopes) - 1 - i)
-                return
+        """Records on the node where the evaluator will find a local; globals are left unresolved."""
+        expr.access, expr.slot = self.lookup(name.lexeme, expr, 'access')
+
+    def lookup(self, name: str, node: Expr, field: str):
+        """Returns (access, slot) for a name as used by `node.field`; (None, None) for a global."""
+        local = self.function.find(name)
+        if local is not None:
+            if local.captured:
+                return CELL, local.slot
+            local.uses.append((node, field))
+            return LOCAL, local.slot
+        index = self.resolve_upvalue(self.function, name)
+        if index is not None:
+            return UPVALUE, index
+        return None, None
+
+    def resolve_upvalue(self, function: FunctionState, name: str) -> Optional[int]:
+        enclosing = function.enclosing
+        if enclosing is None:
+            return None
+        local = enclosing.find(name)
+        if local is not None:
+            self.capture(local)
+            return function.add_upvalue(True, local.slot)
+        index = self.resolve_upvalue(enclosing, name)
+        if index is not None:
+            return function.add_upvalue(False, index)
+        return None
+
+    def capture(self, local: Local):
+        if local.captured:
+            return
+        for node, field in local.uses:
+            setattr(node, field, CELL)
+        local.uses = None
+        declaration = local.declaration
+        if isinstance(declaration, Function):
+            declaration.cells += (local.slot,)
+        else:
+            declaration.cell = True
 
     def resolve_function(self, function: Function, func_type: FunctionType):
+        self.function = FunctionState(self.function)
+        function.cells = ()
+        self.begin_scope()
+        if func_type in (FunctionType.METHOD, FunctionType.INITIALIZER):
+            # A method's frame starts with the receiver and, in a subclass, the superclass.
+            self.add_local("this", function).defined = True
+            if self.current_class == ClassType.SUBCLASS:
+                self.add_local("super", function).defined = True
+        if isinstance(function.body, LazyBody):
+            self.defer_function(function, func_type)
+        else:
+            self.resolve_body(function, func_type)
+        function.upvalues = tuple(self.function.upvalues)
+        self.function = self.function.enclosing
+
+    def resolve_body(self, function: Function, func_type: FunctionType):
         enclosing_function = self.current_function
         self.current_function = func_type
-        self.begin_scope()
         for param in function.params:
-            self.declare(param)
+            self.declare(param, function)
             self.define(param)
         self.resolve_statements(function.body)
+        function.size = self.function.size
         self.end_scope()
         self.current_function = enclosing_function
 
+    def defer_function(self, function: Function, func_type: FunctionType):
+        """
+        The body is resolved on the first call, but a closure needs its
+        upvalues before that. Every name in the body's tokens that refers
+        to an enclosing local is captured now, which covers whatever the
+        body turns out to use; 'super' also uses 'this'.
+        """
+        lazy = function.body
+        for token in lazy.tokens:
+            if token.kind == IDENTIFIER or token.kind == THIS or token.kind == SUPER:
+                names = (token.lexeme, "this") if token.kind == SUPER else (token.lexeme,)
+                for name in names:
+                    if self.function.find(name) is None:
+                        self.resolve_upvalue(self.function, name)
+        lazy.defer(self.function.snapshot(), self.current_class, func_type)
+
     def visit_block(self, stmt: Block):
+        function = self.function
+        # Blocks share the frame of their function, except the outermost
+        # ones of top-level code, which get a frame of their own.
+        outermost = function.enclosing is None and not function.scopes
         self.begin_scope()
         self.resolve_statements(stmt.statements)
         self.end_scope()
+        if outermost:
+            stmt.size, function.size = function.size, 0
+        else:
+            stmt.size = 0
 
     def visit_class(self, stmt: Class):
         enclosing_class = self.current_class
         self.current_class = ClassType.CLASS
-        self.declare(stmt.name)
+        stmt.slot = self.declare(stmt.name)
         self.define(stmt.name)
 
         if stmt.superclass is not None and stmt.name.lexeme == stmt.superclass.name.lexeme:
             self.error(stmt.superclass.name, "A class can't inherit from itself.")
-        
+
         if stmt.superclass is not None:
             self.current_class = ClassType.SUBCLASS
             self.resolve_expression(stmt.superclass)
-            self.begin_scope()
-            self.scopes[-1]["super"] = True
-
-        self.begin_scope()
-        self.scopes[-1]["this"] = True
 
         for method in stmt.methods:
             declaration = FunctionType.METHOD
             if method.name.lexeme == "init":
                 declaration = FunctionType.INITIALIZER
             self.resolve_function(method, declaration)
-        
-        self.end_scope()
 
-        if stmt.superclass is not None:
-            self.end_scope()
-        
         self.current_class = enclosing_class
 
     def visit_var(self, stmt: Var):
-        self.declare(stmt.name)
+        stmt.cell = False
+        stmt.slot = self.declare(stmt.name, stmt)
         if stmt.initializer is not None:
             self.resolve_expression(stmt.initializer)
         self.define(stmt.name)
 
     def visit_variable(self, node: Variable):
-        if self.scopes and self.scopes[-1].get(node.name.lexeme) is False:
-            self.error(node.name, "Can't read local variable in its own initializer.")
+        scopes = self.function.scopes
+        if scopes:
+            local = scopes[-1].get(node.name.lexeme)
+            if local is not None and not local.defined:
+                self.error(node.name, "Can't read local variable in its own initializer.")
         self.resolve_local(node, node.name)
 
     def visit_assign(self, node: Assign):
@@ -131,7 +279,7 @@ class Resolver(Visitor, StmtVisitor):
         self.resolve_local(node, node.name)
 
     def visit_function(self, stmt: Function):
-        self.declare(stmt.name)
+        stmt.slot = self.declare(stmt.name)
         self.define(stmt.name)
         self.resolve_function(stmt, FunctionType.FUNCTION)
 
@@ -191,6 +339,7 @@ class Resolver(Visitor, StmtVisitor):
         elif self.current_class != ClassType.SUBCLASS:
             self.error(node.keyword, "Can't use 'super' in a class with no superclass.")
         self.resolve_local(node, node.keyword)
+        node.this_access, node.this_slot = self.lookup("this", node, 'this_access')
 
     def visit_this(self, node: This):
         if self.current_class == ClassType.NONE:
@@ -201,3 +350,30 @@ class Resolver(Visitor, StmtVisitor):
     def visit_unary(self, node: Unary):
         self.resolve_expression(node.right)
 
+
+def compile_lazy(function: Function) -> List[Stmt]:
+    """
+    Parses and resolves a lazily parsed function body on its first call and
+    puts the statements in place. Errors are reported as they would have
+    been up front, then raised as CompileError.
+    """
+    lazy = function.body
+    parser = lazy.parser_class(lazy.tokens)
+    parser.lazy = True
+    try:
+        body = parser.block()
+    except ParseError:
+        raise CompileError()
+    function.body = body
+    if lazy.function_type is None:
+        # The declaration itself was never resolved (the `evaluate` command).
+        return body
+
+    resolver = Resolver()
+    resolver.function = lazy.state
+    resolver.current_class = lazy.class_type
+    resolver.resolve_body(function, lazy.function_type)
+    if resolver.had_error:
+        raise CompileError()
+    TypeInference().infer_function(function)
+    return body
@@ -0,0 +1,128 @@
+import os
+import re
+import sys
+from sys import intern
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from app.scan_for.table_scanner import TableScanner, unescape
+from app.scan_for.tokens import Token
+
+# Chunks smaller than this are not worth shipping to another process.
+MIN_CHUNK_SIZE = 1 << 18
+
+# Only strings and comments decide whether a newline is a safe split point:
+# a newline inside a string belongs to the literal, and a quote inside a
+# comment does not open one. A lone quote is an unterminated string.
+STRING_OR_COMMENT = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|//[^\n]*|"', re.DOTALL)
+
+
+def split_source(text, parts):
+    """
+    Splits `text` into at most `parts` chunks that each start right after a
+    newline outside of any string literal. Returns (start, end, first_line)
+    triples, where first_line is what the serial scanner's line counter
+    would read at `start`.
+    """
+    spans, escaped = [], []
+    for m in STRING_OR_COMMENT.finditer(text):
+        lexeme = m.group()
+        if lexeme[0] != '"':
+            continue
+        if lexeme == '"':
+            spans.append((m.start(), len(text)))
+            break
+        if '\n' in lexeme:
+            spans.append((m.start(), m.end()))
+            if '\\' in lexeme:
+                escaped.append((m.end(), lexeme.count('\n') - unescape(lexeme[1:-1])[1]))
+    starts = [start for start, _ in spans]
+
+    cuts = [0]
+    for target in range(len(text) // parts, len(text), len(text) // parts or 1):
+        pos = max(target, cuts[-1])
+        while True:
+            newline = text.find('\n', pos)
+            if newline == -1:
+                break
+            index = bisect_right(starts, newline) - 1
+            if index >= 0 and spans[index][1] > newline:
+                pos = spans[index][1]
+                continue
+            if newline + 1 < len(text):
+                cuts.append(newline + 1)
+            break
+        if newline == -1:
+            break
+    cuts.append(len(text))
+
+    chunks = []
+    for start, end in zip(cuts, cuts[1:]):
+        hidden = sum(count for position, count in escaped if position <= start)
+        chunks.append((start, end, 1 + text.count('\n', 0, start) - hidden))
+    return chunks
+
+
+def scan_chunk(job):
+    """Scans one chunk in a worker process, collecting errors instead of printing them."""
+    text, first_line, render = job
+    scanner = TableScanner.from_text(text, first_line)
+    scanner.errors = []
+    scanner.report = scanner.errors.append
+    scanner.scan_text(text, final=True)
+    if render:
+        tokens = ''.join(f"{token}\n" for token in scanner.tokens)
+    else:
+        tokens = [(token.type, token.lexeme, token.literal, token.line) for token in scanner.tokens]
+    return tokens, scanner.errors, scanner.line_number
+
+
+class ParallelScanner(TableScanner):
+    """
+    Scans large sources on several cores. The text is split at newlines
+    that lie outside string literals, so every chunk starts in a clean
+    state and can be scanned independently; the results are stitched back
+    together in order with the serial scanner's line numbers and errors.
+    """
+    def __init__(self, filename, jobs=None):
+        super().__init__(filename)
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def scan_chunks(self, render):
+        text = self.file_contents
+        parts = min(self.jobs * 4, len(text) // MIN_CHUNK_SIZE)
+        if self.jobs < 2 or parts < 2:
+            return None
+        jobs = [(text[start:end], line, render) for start, end, line in split_source(text, parts)]
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            results = list(pool.map(scan_chunk, jobs))
+        for _, errors, _ in results:
+            for message in errors:
+                self.has_error = True
+                print(message, file=sys.stderr)
+        self.line_number = results[-1][2]
+        self.pos = len(text)
+        return [tokens for tokens, _, _ in results]
+
+    def scan_all(self):
+        chunks = self.scan_chunks(render=False)
+        if chunks is None:
+            return super().scan_all()
+        keywords = self.keywords
+        for tokens in chunks:
+            for type_, lexeme, literal, line in tokens:
+                # Interning does not survive pickling; redo what the serial scanner does.
+                if type_ == 'IDENTIFIER' or lexeme in keywords:
+                    lexeme = intern(lexeme)
+                self.tokens.append(Token(type_, lexeme, literal, line))
+        self.add_token("EOF", '', None)
+        return self.tokens
+
+    def render_all(self):
+        """
+        Returns the `tokenize` output as text blocks. Formatting happens in
+        the workers, which keeps the parent from rebuilding every Token.
+        """
+        chunks = self.scan_chunks(render=True)
+        if chunks is None:
+            return [''.join(f"{token}\n" for token in super().scan_all())]
+        return chunks + [f"{Token('EOF', '', None, self.line_number)}\n"]
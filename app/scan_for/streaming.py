@@ -0,0 +1,80 @@
+import codecs
+import io
+import locale
+import mmap
+import os
+import sys
+from app.scan_for.keywords import Keywords
+from app.scan_for.table_scanner import TableScanner
+
+CHUNK_SIZE = 1 << 16
+
+
+def mapped_chunks(filename, size=CHUNK_SIZE):
+    """
+    Decodes a memory-mapped file chunk by chunk, with the same encoding and
+    newline translation that `open(filename, 'r')` would apply.
+    """
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))()
+            decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+            for start in range(0, len(data), size):
+                yield decoder.decode(data[start:start + size])
+            yield decoder.decode(b'', final=True)
+
+
+def stream_chunks(stream, size=CHUNK_SIZE):
+    """Reads a text stream such as stdin or a pipe in chunks."""
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class StreamingScanner(TableScanner):
+    """
+    Scans lazily instead of reading the whole source up front. Tokens are
+    yielded as soon as the line they end on has been read, so only the
+    current chunk and the tokens not yet consumed are held in memory.
+    A filename of '-' reads from stdin.
+    """
+    def __init__(self, filename):
+        if filename != '-' and not os.path.exists(filename):
+            raise FileNotFoundError(f"File {filename} not found.")
+        self.filename = filename
+        self.file_contents = None
+        self.pos = 0
+        self.line_number = 1
+        self.has_error = False
+        self.keywords = Keywords
+        self.tokens = []
+
+    def chunks(self):
+        if self.filename == '-':
+            return stream_chunks(sys.stdin)
+        return mapped_chunks(self.filename)
+
+    def iter_tokens(self):
+        tokens = self.tokens
+        pending = ''
+        for chunk in self.chunks():
+            if pending.startswith('"') and '"' not in chunk:
+                # Still inside a long string; no point rescanning it yet.
+                pending += chunk
+                continue
+            text = pending + chunk
+            pending = text[self.scan_text(text, final=False):]
+            yield from tokens
+            tokens.clear()
+        self.scan_text(pending, final=True)
+        self.add_token("EOF", '', None)
+        yield from tokens
+        tokens.clear()
+
+    def scan_all(self):
+        self.tokens = list(self.iter_tokens())
+        return self.tokens
@@ -0,0 +1,187 @@
+import re
+import sys
+from sys import intern
+from app.scan_for.parentheses import ParenthesesScanner
+from app.scan_for.tokens import Token
+from app.scan_for.escseq import EscapeSequences
+from app.scan_for.keywords import Keywords
+from app.scan_for.operations import Operations
+
+# Leading blanks are folded into every match and each token class gets its
+# own group, so `m.lastindex` tells the scanner what matched. The catch-all
+# keeps matches contiguous; a match with no group is trailing blanks at EOF.
+TOKEN_PATTERN = re.compile(r'''[ \t\r]*(?:
+    ([A-Za-z_]\w*)                      # 1: identifier or keyword
+  | (//[^\n]*)                          # 2: comment
+  | ([!=<>]=?|[(){}.,;/*+\-])           # 3: operator
+  | (\n)                                # 4: newline
+  | ([0-9]+(?:\.[0-9]+)?)               # 5: number
+  | ("[^"\\]*(?:\\.[^"\\]*)*")          # 6: terminated string
+  | (.)                                 # 7: anything else
+)?''', re.VERBOSE | re.DOTALL)
+
+IDENTIFIER, COMMENT, OPERATOR, NEWLINE, NUMBER, STRING, OTHER = range(1, 8)
+
+IDENTIFIER_TAIL = re.compile(r'\w*')
+ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+
+OperatorTypes = dict(Operations)
+OperatorTypes.update({
+    '!': 'BANG', '!=': 'BANG_EQUAL', '==': 'EQUAL_EQUAL',
+    '<': 'LESS', '<=': 'LESS_EQUAL', '>': 'GREATER', '>=': 'GREATER_EQUAL',
+})
+
+
+def unescape(body):
+    """
+    Resolves escape sequences in a string body the way ParenthesesScanner
+    does. Returns the value and the number of line breaks to count, which
+    excludes escaped newlines.
+    """
+    if '\\' not in body:
+        return body, body.count('\n')
+    escaped_newlines = 0
+    def replace(match):
+        nonlocal escaped_newlines
+        char = match.group(1)
+        if char == '\n':
+            escaped_newlines += 1
+        return EscapeSequences.get(char, char)
+    value = ESCAPE_PATTERN.sub(replace, body)
+    return value, body.count('\n') - escaped_newlines
+
+
+def number_end(text, start):
+    """Mirrors ParenthesesScanner.number_scanner for non-ASCII digits."""
+    pos, end = start + 1, len(text)
+    while pos < end and text[pos].isdigit():
+        pos += 1
+    if pos + 1 < end and text[pos] == '.' and text[pos + 1].isdigit():
+        pos += 2
+        while pos < end and text[pos].isdigit():
+            pos += 1
+    return pos
+
+
+class TableScanner(ParenthesesScanner):
+    """
+    Drop-in replacement for ParenthesesScanner that tokenizes with a single
+    compiled master regex and dispatch tables instead of per-character method
+    calls. Produces the same tokens, errors and line numbers.
+
+    If `offsets` is set to a list, the source offset just past each token is
+    recorded in it, which lets callers map token ranges back to source spans.
+    """
+    offsets = None
+
+    @classmethod
+    def from_text(cls, text, line=1):
+        """Creates a scanner over an in-memory source instead of a file."""
+        scanner = cls.__new__(cls)
+        scanner.filename = None
+        scanner.file_contents = text
+        scanner.pos = 0
+        scanner.line_number = line
+        scanner.has_error = False
+        scanner.keywords = Keywords
+        scanner.tokens = []
+        return scanner
+
+    def error(self, line, message):
+        self.has_error = True
+        self.report(f"[line {line}] Error: {message}")
+
+    def report(self, message):
+        print(message, file=sys.stderr)
+
+    def scan_all(self):
+        self.pos = self.scan_text(self.file_contents, final=True)
+        self.add_token("EOF", '', None)
+        return self.tokens
+
+    def scan_text(self, text, final=True):
+        """
+        Appends the tokens found in `text` to self.tokens and returns how far
+        it got. Unless `final` is set, scanning stops after the last complete
+        line (or at a string that is still open there) so the caller can
+        resume once more input has arrived.
+        """
+        append = self.tokens.append
+        offsets = self.offsets
+        keywords = self.keywords
+        line = self.line_number
+        pos, end = 0, len(text)
+        if not final:
+            end = text.rfind('\n') + 1
+
+        while pos < end:
+            restart = None
+            for m in TOKEN_PATTERN.finditer(text, pos, end):
+                kind = m.lastindex
+                if kind == IDENTIFIER:
+                    lexeme = intern(m.group(kind))
+                    append(Token(keywords.get(lexeme, 'IDENTIFIER'), lexeme, None, line))
+                    if offsets is not None: offsets.append(m.end())
+                elif kind == OPERATOR:
+                    lexeme = m.group(kind)
+                    append(Token(OperatorTypes[lexeme], lexeme, None, line))
+                    if offsets is not None: offsets.append(m.end())
+                elif kind == NEWLINE:
+                    line += 1
+                elif kind == NUMBER:
+                    lexeme = m.group(kind)
+                    after = m.end()
+                    char = text[after:after + 1]
+                    if char == '.' and '.' not in lexeme:
+                        char = text[after + 1:after + 2]
+                    if char > '\x7f' and char.isdigit():
+                        # A non-ASCII digit continues the literal; rescan it slowly.
+                        restart = self.scan_number(text, m.start(kind), line)
+                        break
+                    append(Token('NUMBER', lexeme, float(lexeme), line))
+                    if offsets is not None: offsets.append(after)
+                elif kind == STRING:
+                    value, newlines = unescape(m.group(kind)[1:-1])
+                    line += newlines
+                    append(Token('STRING', f'"{value}"', value, line))
+                    if offsets is not None: offsets.append(m.end())
+                elif kind == OTHER:
+                    char = m.group(kind)
+                    start = m.start(kind)
+                    if char == '"':
+                        if not final:
+                            # The closing quote has not been read yet.
+                            self.line_number = line
+                            return start
+                        self.error(line, "Unterminated string.")
+                        line += unescape(text[start + 1:])[1]
+                        restart = end
+                        break
+                    if char.isalpha():
+                        tail = IDENTIFIER_TAIL.match(text, start + 1).end()
+                        append(Token('IDENTIFIER', intern(text[start:tail]), None, line))
+                        if offsets is not None: offsets.append(tail)
+                        restart = tail
+                        break
+                    if char.isdigit():
+                        restart = self.scan_number(text, start, line)
+                        break
+                    self.error(line, f"Unexpected character: {char}")
+            if restart is None:
+                break
+            pos = restart
+
+        self.line_number = line
+        return end
+
+    def scan_number(self, text, start, line):
+        end = number_end(text, start)
+        lexeme = text[start:end]
+        try:
+            literal = float(lexeme)
+        except ValueError:
+            self.error(line, f"Invalid number literal: {lexeme}")
+        else:
+            self.tokens.append(Token('NUMBER', lexeme, literal, line))
+            if self.offsets is not None: self.offsets.append(end)
+        return end
@@ -1,9 +1,49 @@
+TokenTypes = (
+    'LEFT_PAREN', 'RIGHT_PAREN', 'LEFT_BRACE', 'RIGHT_BRACE',
+    'COMMA', 'DOT', 'MINUS', 'PLUS', 'SEMICOLON', 'SLASH', 'STAR',
+    'BANG', 'BANG_EQUAL', 'EQUAL', 'EQUAL_EQUAL',
+    'GREATER', 'GREATER_EQUAL', 'LESS', 'LESS_EQUAL',
+    'IDENTIFIER', 'STRING', 'NUMBER',
+    'AND', 'CLASS', 'ELSE', 'FALSE', 'FUN', 'FOR', 'IF', 'NIL', 'OR',
+    'PRINT', 'RETURN', 'SUPER', 'THIS', 'TRUE', 'VAR', 'WHILE',
+    'EOF',
+)
+
+# Integer token kinds, so hot comparisons and dispatch tables work on small
+# ints rather than type names.
+(
+    LEFT_PAREN, RIGHT_PAREN, LEFT_BRACE, RIGHT_BRACE,
+    COMMA, DOT, MINUS, PLUS, SEMICOLON, SLASH, STAR,
+    BANG, BANG_EQUAL, EQUAL, EQUAL_EQUAL,
+    GREATER, GREATER_EQUAL, LESS, LESS_EQUAL,
+    IDENTIFIER, STRING, NUMBER,
+    AND, CLASS, ELSE, FALSE, FUN, FOR, IF, NIL, OR,
+    PRINT, RETURN, SUPER, THIS, TRUE, VAR, WHILE,
+    EOF,
+) = range(len(TokenTypes))
+
+TokenKinds = {name: kind for kind, name in enumerate(TokenTypes)}
+
+
 class Token:
+    __slots__ = ('kind', 'lexeme', 'literal', 'line')
+
     def __init__(self, type_, lexeme, literal, line):
-        self.type = type_
+        self.kind = TokenKinds[type_]
         self.lexeme = lexeme
         self.literal = literal
         self.line = line
 
+    @property
+    def type(self):
+        return TokenTypes[self.kind]
+
+    def __str__(self):
+        """The token as the `tokenize` command prints it."""
+        literal = self.literal
+        if literal is None:
+            literal = "null"
+        return f"{TokenTypes[self.kind]} {self.lexeme} {literal}"
+
     def __repr__(self):
-        return f"Token(type={self.type}, lexeme='{self.lexeme}', literal={self.literal}, line={self.line})"
\ No newline at end of file
+        return f"Token(type={self.type}, lexeme='{self.lexeme}', literal={self.literal}, line={self.line})"
@@ -0,0 +1,204 @@
+import os
+import sys
+import time
+from app.parser.parser import Parser, ParseError
+from app.scan_for.table_scanner import TableScanner
+from app.scan_for.tokens import SEMICOLON, RIGHT_BRACE
+from app.evaluation.evaluator import Evaluator
+from app.resolver.resolver import Resolver
+
+
+class Unit:
+    """
+    One top-level declaration with the source text it was parsed from. The
+    text runs from the end of the previous declaration to the end of this
+    one, so the units of a program tile its source.
+    """
+    __slots__ = ('text', 'tokens', 'statement', 'end_line', 'messages')
+
+    def __init__(self, text, tokens, statement, end_line, messages):
+        self.text = text
+        self.tokens = tokens
+        self.statement = statement
+        self.end_line = end_line
+        # Errors the parser reported but recovered from, repeated on every run.
+        self.messages = messages
+
+    def ends_cleanly(self):
+        """
+        A declaration ending in ';' or '}' can be neither extended by the
+        tokens that follow it nor merged with them by the scanner.
+        """
+        return self.tokens[-1].kind in (SEMICOLON, RIGHT_BRACE)
+
+
+class Watcher:
+    """
+    Re-runs a script whenever it changes. The previous declarations are kept
+    in memory and only the ones whose source text changed are scanned,
+    parsed and resolved again; top-level declarations resolve independently
+    of each other because globals are not tracked by the resolver.
+    """
+    def __init__(self, filename, poll_interval=0.2):
+        self.filename = filename
+        self.poll_interval = poll_interval
+        self.source = ''
+        self.units = []
+        self.tail = ''
+        # The evaluator of the last run.
+        self.evaluator = None
+
+    def run(self):
+        stamp = None
+        try:
+            while True:
+                try:
+                    stat = os.stat(self.filename)
+                except FileNotFoundError:
+                    stat = None
+                if stat is not None and (stat.st_mtime_ns, stat.st_size) != stamp:
+                    stamp = (stat.st_mtime_ns, stat.st_size)
+                    with open(self.filename, 'r') as file:
+                        self.reload(file.read())
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+
+    def reload(self, source):
+        reparsed = self.update(source)
+        if reparsed is None:
+            print("[watch] errors found; waiting for changes", file=sys.stderr)
+            return
+        print(f"[watch] re-parsed {reparsed} of {len(self.units)} declarations", file=sys.stderr)
+        self.execute()
+
+    def execute(self):
+        for unit in self.units:
+            for message in unit.messages:
+                print(message, file=sys.stderr)
+        evaluator = self.evaluator = Evaluator()
+        try:
+            evaluator.evaluate_statements([unit.statement for unit in self.units])
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+
+    def update(self, source):
+        """
+        Brings the units in line with `source`. Returns how many declarations
+        had to be parsed again, or None (leaving the old state in place) if
+        the new source has errors.
+        """
+        units = self.units
+
+        # Unchanged declarations at the front...
+        first, begin = 0, 0
+        while first < len(units) and source.startswith(units[first].text, begin):
+            begin += len(units[first].text)
+            first += 1
+        # ...and at the back, not overlapping the front.
+        end = len(source)
+        tail_kept = end - len(self.tail) >= begin and source.endswith(self.tail)
+        last = len(units)
+        if tail_kept:
+            end -= len(self.tail)
+            while last > first and end - len(units[last - 1].text) >= begin \
+                    and source.endswith(units[last - 1].text, 0, end):
+                end -= len(units[last - 1].text)
+                last -= 1
+
+        # A declaration that does not end cleanly could absorb the edit.
+        while first > 0 and not units[first - 1].ends_cleanly():
+            first -= 1
+            begin -= len(units[first].text)
+
+        while True:
+            final = last == len(units) and not tail_kept
+            line = units[first - 1].end_line if first > 0 else 1
+            parsed, diagnostics = self.parse_region(source[begin:end], line, final)
+            if parsed is not None or final:
+                break
+            # The change reaches further than the text that was re-parsed.
+            if last < len(units):
+                end += len(units[last].text)
+                last += 1
+            else:
+                end = len(source)
+                tail_kept = False
+
+        if parsed is None:
+            for message in diagnostics:
+                print(message, file=sys.stderr)
+            return None
+        new_units, trailing, end_line = parsed
+
+        # What the parser recovered from comes before what the resolver found.
+        errors = [message for unit in new_units for message in unit.messages]
+        had_error = False
+        for unit in new_units:
+            resolver = Resolver()
+            resolver.report = errors.append
+            resolver.resolve_statements([unit.statement])
+            had_error = had_error or resolver.had_error
+        if had_error:
+            for message in errors:
+                print(message, file=sys.stderr)
+            return None
+
+        # Line numbers after the edit move by however many lines it added.
+        old_line = units[last - 1].end_line if last > 0 else 1
+        delta = end_line - old_line
+        for unit in units[last:]:
+            if delta:
+                for token in unit.tokens:
+                    token.line += delta
+                unit.end_line += delta
+
+        if last < len(units):
+            units[last].text = trailing + units[last].text
+        elif tail_kept:
+            self.tail = trailing + self.tail
+        else:
+            self.tail = trailing
+        units[first:last] = new_units
+        self.source = source
+        return len(new_units)
+
+    def parse_region(self, text, line, final):
+        """
+        Scans and parses `text` as a sequence of declarations starting at
+        `line`. Unless the region reaches the end of the file, failing to
+        parse it, or ending it in a way the following text could continue,
+        just means the region has to grow, so diagnostics are returned
+        rather than printed.
+        """
+        diagnostics = []
+        scanner = TableScanner.from_text(text, line)
+        scanner.offsets = []
+        scanner.report = diagnostics.append
+        tokens = scanner.scan_all()
+        if scanner.has_error:
+            return None, diagnostics
+
+        parser = Parser(tokens)
+        parser.report = diagnostics.append
+        units, start = [], 0
+        try:
+            while not parser.is_at_end():
+                first, reported = parser.current, len(diagnostics)
+                statement = parser.declaration()
+                last = parser.current - 1
+                end = scanner.offsets[last]
+                units.append(Unit(text[start:end], tokens[first:last + 1], statement, tokens[last].line,
+                                  diagnostics[reported:]))
+                start = end
+        except ParseError:
+            return None, diagnostics
+
+        trailing = text[start:]
+        if not final:
+            if units and not units[-1].ends_cleanly():
+                return None, diagnostics
+            if '//' in trailing[trailing.rfind('\n') + 1:]:
+                # A comment that is still open at the end of the region.
+                return None, diagnostics
+        return (units, trailing, scanner.line_number), diagnostics
@@ -0,0 +1,60 @@
+"""
+Measures how much memory the AST of a large synthetic program takes, as
+node objects and as an Arena.
+
+    python3 -m benchmarks.ast_memory [units]
+
+Tokens are scanned before measuring starts; the figures cover the nodes,
+their lists and literal values, but not the tokens they share with the
+scanner output.
+"""
+import gc
+import sys
+import tracemalloc
+from app.parser.arena import Arena, LAYOUT, NODE, NODES
+from app.parser.parser import Parser
+from app.scan_for.table_scanner import TableScanner
+from benchmarks.programs import library
+
+
+def count_nodes(nodes):
+    count, pending = 0, list(nodes)
+    while pending:
+        node = pending.pop()
+        count += 1
+        for name, storage in LAYOUT[type(node)]:
+            value = getattr(node, name)
+            if storage == NODE and value is not None:
+                pending.append(value)
+            elif storage == NODES:
+                pending.extend(value)
+    return count
+
+
+def measure(build, tokens):
+    gc.collect()
+    tracemalloc.start()
+    result = build(Parser(tokens))
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, peak
+
+
+def main():
+    units = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tokens = TableScanner.from_text(library(units)).scan_all()
+
+    statements, size, peak = measure(Parser.parse, tokens)
+    nodes = count_nodes(statements)
+    del statements
+    print(f"{nodes} nodes")
+    print(f"{'objects':>8}: {size / 1e6:.1f} MB  {size / nodes:.1f} bytes/node  peak {peak / 1e6:.1f} MB")
+
+    arena, size, peak = measure(Arena.parse, tokens)
+    assert len(arena) == nodes
+    print(f"{'arena':>8}: {size / 1e6:.1f} MB  {size / nodes:.1f} bytes/node  peak {peak / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
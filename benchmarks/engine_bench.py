@@ -0,0 +1,48 @@
+"""
+Compares the execution engines on programs that spend their time running.
+
+    python3 -m benchmarks.engine_bench [iterations [workload ...]]
+
+Each program is scanned, parsed and resolved once; only running it is
+timed, and every engine must print exactly what the tree walker prints.
+"""
+import contextlib
+import io
+import sys
+import time
+from app.main import ENGINES
+from app.parser.parser import Parser
+from app.resolver.resolver import Resolver
+from app.scan_for.table_scanner import TableScanner
+from benchmarks.programs import WORKLOADS, workload
+
+
+def bench(engine_class, source, repeat=3):
+    best, output = float('inf'), None
+    for _ in range(repeat):
+        # A fresh tree for every run, since the tree walker caches global slots on it.
+        statements = Parser(TableScanner.from_text(source).scan_all()).parse()
+        Resolver().resolve_statements(statements)
+        out = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            engine_class().evaluate_statements(statements)
+        best = min(best, time.perf_counter() - start)
+        output = out.getvalue()
+    return best, output
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for name in sys.argv[2:] or WORKLOADS:
+        source = workload(name, iterations)
+        results = {engine: bench(engine_class, source) for engine, engine_class in ENGINES.items()}
+        baseline, reference = results['tree']
+        print(f"{name}:")
+        for engine, (seconds, output) in results.items():
+            print(f"{engine:>10}: {seconds:.3f}s  {baseline / seconds:.1f}x  "
+                  f"{'identical' if output == reference else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Measures how much memory instances of a Lox class with a few fields take.
+
+    python3 -m benchmarks.instance_memory [count]
+
+Runs a program that keeps `count` instances alive in a linked list and
+reports the memory still allocated once it has finished, per instance.
+"""
+import gc
+import sys
+import tracemalloc
+from app.evaluation.evaluator import Evaluator
+from app.parser.parser import Parser
+from app.resolver.resolver import Resolver
+from app.scan_for.table_scanner import TableScanner
+
+SOURCE = '''
+class Node {{
+  init(value, next) {{ this.value = value; this.next = next; this.weight = 1; this.seen = false; }}
+}}
+var head = nil;
+for (var i = 0; i < {count}; i = i + 1) head = Node(i, head);
+'''
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    statements = Parser(TableScanner.from_text(SOURCE.format(count=count)).scan_all()).parse()
+    Resolver().resolve_statements(statements)
+    evaluator = Evaluator()
+    gc.collect()
+    tracemalloc.start()
+    evaluator.evaluate_statements(statements)
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{count} instances: {size / 1e6:.1f} MB  {size / count:.1f} bytes/instance  peak {peak / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
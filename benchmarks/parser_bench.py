@@ -0,0 +1,52 @@
+"""
+Compares the parser engines on already scanned synthetic programs.
+
+    python3 -m benchmarks.parser_bench [units]
+
+Scanning is done once up front so only parsing is timed.
+"""
+import sys
+import time
+from app.main import PARSERS
+from app.parser.ast import Expr, Stmt
+from app.scan_for.table_scanner import TableScanner
+from app.scan_for.tokens import Token
+from benchmarks.programs import library, expressions
+
+
+def shape(node):
+    """A comparable rendering of an AST, tokens included."""
+    if isinstance(node, list):
+        return [shape(item) for item in node]
+    if isinstance(node, Token):
+        return (node.type, node.lexeme, node.line)
+    if isinstance(node, (Expr, Stmt)):
+        return (type(node).__name__, [shape(getattr(node, name)) for name in node.__slots__])
+    return node
+
+
+def bench(parser_class, tokens, repeat=3):
+    best, statements = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        statements = parser_class(tokens).parse()
+        best = min(best, time.perf_counter() - start)
+    return best, statements
+
+
+def main():
+    units = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for title, source in (('expressions', expressions(units)), ('library', library(units))):
+        tokens = TableScanner.from_text(source).scan_all()
+        print(f"{title}: {len(tokens)} tokens")
+        results = {name: bench(parser, tokens) for name, parser in PARSERS.items()}
+        baseline = results['descent'][0]
+        reference = shape(results['descent'][1])
+        for name, (seconds, statements) in results.items():
+            same = shape(statements) == reference
+            print(f"{name:>10}: {seconds:.3f}s  {len(tokens) / seconds / 1e3:.0f}k tokens/s  "
+                  f"{baseline / seconds:.1f}x  {'identical' if same else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Synthetic Lox sources shared by the benchmark scripts."""
+
+UNIT = '''// unit {n}
+fun helper{n}(a, b) {{
+  var total = 0;
+  for (var i = 0; i < a; i = i + 1) {{
+    if (i / 2 == b and !(i > 10)) total = total + i * 2.5;
+    else total = total - (i + {n});
+  }}
+  return total;
+}}
+class Shape{n} {{
+  init(w, h) {{ this.w = w; this.h = h; }}
+  area() {{ return this.w * this.h; }}
+  describe() {{ return "shape {n} with area " + "unknown"; }}
+}}
+var s{n} = Shape{n}({n}, 2);
+var text{n} = "line one\\nline two \\"quoted\\" value";
+'''
+
+
+def library(units: int) -> str:
+    """A declaration-heavy program made of `units` copies of a small module."""
+    return ''.join(UNIT.format(n=n) for n in range(units))
+
+
+EXPRESSION_UNIT = '''var e{n} = (a{n} + b * 2 - c / 4) * -d + (x.y.z(1, 2 + 3) - !flag) * 0.5;
+print a == b and c != d or !(e < f and g >= h) or i <= j * (k + l);
+total = total + values(i, i + 1).first * "s" - (q > r == true) / nil;
+obj.field = other.method(arg1 * arg2, -arg3, (arg4 + arg5) / arg6).next;
+'''
+
+
+def expressions(units: int) -> str:
+    """An expression-heavy program of `units` groups of deeply mixed operators."""
+    return ''.join(EXPRESSION_UNIT.format(n=n) for n in range(units))
+
+
+# Programs that take a while to run rather than to parse, keyed by name.
+WORKLOADS = {
+    'loop': '''
+var total = 0;
+for (var i = 0; i < {n}; i = i + 1) {{
+  if (i / 3 > 10 and i != 50) total = total + i * 0.5; else total = total - 1;
+}}
+print total;
+''',
+    'fib': '''
+fun fib(n) {{ if (n < 2) return n; return fib(n - 1) + fib(n - 2); }}
+print fib({depth});
+''',
+    'closures': '''
+fun counter() {{ var count = 0; fun increment() {{ count = count + 1; return count; }} return increment; }}
+var next = counter();
+var last = 0;
+for (var i = 0; i < {n}; i = i + 1) last = next();
+print last;
+''',
+    'objects': '''
+class Point {{
+  init(x, y) {{ this.x = x; this.y = y; }}
+  plus(other) {{ return Point(this.x + other.x, this.y + other.y); }}
+}}
+var sum = Point(0, 0);
+for (var i = 0; i < {n}; i = i + 1) sum = sum.plus(Point(i, 1));
+print sum.x + sum.y;
+''',
+    'instances': '''
+class Particle {{
+  init(x, y) {{ this.x = x; this.y = y; this.vx = 1; this.vy = -1; }}
+  step() {{ this.x = this.x + this.vx; this.y = this.y + this.vy; }}
+}}
+var total = 0;
+for (var i = 0; i < {n}; i = i + 1) {{
+  var p = Particle(i, i);
+  p.step();
+  total = total + p.x - p.y;
+}}
+print total;
+''',
+    'fields': '''
+class Vector {{
+  init(x, y) {{ this.x = x; this.y = y; }}
+}}
+fun run(n) {{
+  var v = Vector(0, 1);
+  var w = Vector(1, 0);
+  for (var i = 0; i < n; i = i + 1) {{
+    v.x = v.x + w.x;
+    w.y = w.y + v.y;
+    v.y = v.x - w.y;
+  }}
+  return v.x + v.y + w.x + w.y;
+}}
+print run({n});
+''',
+    'polymorphic': '''
+class Shape {{
+  init(w, h) {{ this.w = w; this.h = h; }}
+  area() {{ return this.w * this.h; }}
+  scaled(k) {{ return this.area() * k; }}
+}}
+class Rect < Shape {{}}
+class Square < Rect {{
+  init(side) {{ this.h = side; this.w = side; }}
+}}
+fun run(n) {{
+  var a = Shape(1, 2);
+  var b = Rect(2, 3);
+  var c = Square(3);
+  var total = 0;
+  for (var i = 0; i < n; i = i + 1) {{
+    total = total + a.scaled(1) + b.scaled(2) + c.scaled(3);
+  }}
+  return total;
+}}
+print run({n});
+''',
+    'inherited': '''
+class Base {{
+  init() {{ this.count = 0; }}
+  one() {{ return 1; }}
+}}
+class A < Base {{}}
+class B < A {{}}
+class C < B {{}}
+fun run(n) {{
+  var c = C();
+  for (var i = 0; i < n; i = i + 1) c.count = c.count + c.one() + c.one();
+  return c.count;
+}}
+print run({n});
+''',
+}
+
+
+def workload(name: str, n: int) -> str:
+    """A workload scaled so that `n` is roughly its number of loop iterations."""
+    depth = max(1, n.bit_length() + 4)
+    return WORKLOADS[name].format(n=n, depth=depth)
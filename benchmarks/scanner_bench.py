@@ -0,0 +1,47 @@
+"""
+Compares the scanner engines on a large synthetic program.
+
+    python3 -m benchmarks.scanner_bench [units]
+
+The parallel engine uses one worker per core and only pays off on
+multi-core machines with multi-megabyte sources.
+"""
+import os
+import sys
+import tempfile
+import time
+from app.main import SCANNERS
+from app.scan_for.parallel import ParallelScanner
+from benchmarks.programs import library
+
+
+def bench(scanner_class, filename, repeat=3):
+    best, tokens = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = scanner_class(filename).scan_all()
+        best = min(best, time.perf_counter() - start)
+    return best, tokens
+
+
+def main():
+    units = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.NamedTemporaryFile('w', suffix='.lox', delete=False) as file:
+        file.write(library(units))
+    try:
+        size = os.path.getsize(file.name)
+        print(f"source: {size / 1e6:.1f} MB")
+        results = {name: bench(scanner, file.name) for name, scanner in SCANNERS.items()}
+        results['parallel'] = bench(ParallelScanner, file.name)
+        baseline = results['legacy'][0]
+        reference = [(t.type, t.lexeme, t.literal, t.line) for t in results['legacy'][1]]
+        for name, (seconds, tokens) in results.items():
+            same = [(t.type, t.lexeme, t.literal, t.line) for t in tokens] == reference
+            print(f"{name:>8}: {seconds:.3f}s  {len(tokens)} tokens  "
+                  f"{baseline / seconds:.1f}x  {'identical' if same else 'MISMATCH'}")
+    finally:
+        os.unlink(file.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Runs the interpreter as a user would, and finds the Lox programs the tests share."""
+import io
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stderr
+from functools import lru_cache
+from typing import NamedTuple
+from app.parser.parser import ParseError
+from app.scan_for.table_scanner import TableScanner
+from app.scan_for.tokens import Token
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMS_DIR = os.path.join(ROOT, 'tests', 'programs')
+
+# Every program in tests/programs, by name; the comments at the end of each
+# say what running it prints and reports.
+PROGRAMS = sorted(name[:-len('.lox')] for name in os.listdir(PROGRAMS_DIR) if name.endswith('.lox'))
+
+# Sources that take a scanner through every kind of token and error.
+SOURCES = {
+    'operators': 'var x = (1 + 2.5) * 3; // comment\n'
+                 'print "hello\\nworld" != nil and true or false;\n'
+                 'class A < B { init() { this.x = super.y; } }\n'
+                 'a >= b <= c == d != e ! f < g > h / i - j . k , l ; m { } _under score123 123.abc 123. .5\n',
+    'errors': 'var a = @;\n"unterminated\n string $ # \n',
+    'unicode': 'var é = 1; ² ½ café ٣٤ 12² "a\\"b" "x\\\ny" \f\v end\r\nline\rlast "multi\nline"\n// trailing comment',
+    'empty': '',
+    'whitespace': '   \n\n  \t',
+    'escapes': '"abc\\\\" "tab\\tq" "\\q" "end\\',
+    'slashes': 'a/b //c\n/',
+    'numbers': '0 00 1.0 1.00 3.14159 12. 12.x 9999999999999999999999',
+}
+
+# Expressions, valid and not, that take a parser down every rule.
+EXPRESSIONS = [
+    '(1 + 2) * -3 / !true == "s" != nil >= 4.5',
+    '((("a")))',
+    'a + b * c - d / e',
+    '1 < 2 <= 3 > 4 >= 5 == 6 != 7',
+    'a or b and c or !d and -e',
+    'a = b = c or d',
+    'a.b.c = d.e(f)(g).h',
+    'f(1)(2, 3)(a = 4).x',
+    'super.method(this.x)',
+    '!!!true == ---1',
+    '"str" + nil + false + true + 12.5',
+    '(1 + 2',
+    '1 + * 2',
+    'a + b = c',
+    'f(1,',
+    'a.',
+    '1 +',
+    '-',
+    '(a = 1) = 2',
+    'this = 1',
+    'super',
+    'super.',
+    'f(a b)',
+    ')',
+]
+
+EXPECT = re.compile(r'^// expect(?: (runtime error|error))?: ?(.*)$', re.MULTILINE)
+
+
+class Result(NamedTuple):
+    code: int
+    out: str
+    err: str
+
+
+@lru_cache(maxsize=None)
+def lox(command: str, source: str, *options: str) -> Result:
+    """Runs a command of app.main on `source`, saved to a file in a directory of its own."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.lox')
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write(source)
+        return run_file(path, command, *options)
+
+
+def run_file(path: str, command: str, *options: str) -> Result:
+    # Keeps the key that signs cached programs away from the user's own.
+    environment = dict(os.environ, XDG_CACHE_HOME=os.path.join(os.path.dirname(path), 'cache-home'))
+    process = subprocess.run([sys.executable, '-m', 'app.main', command, path, *options],
+                             cwd=ROOT, env=environment, capture_output=True)
+    return Result(process.returncode, process.stdout.decode('utf-8'), process.stderr.decode('utf-8'))
+
+
+def program(name: str) -> str:
+    with open(os.path.join(PROGRAMS_DIR, name + '.lox'), encoding='utf-8', newline='') as file:
+        return file.read()
+
+
+def node_class(value):
+    """The class in app.parser.ast that `value` is an instance of, seeing through arena views."""
+    return next((klass for klass in type(value).__mro__ if klass.__module__ == 'app.parser.ast'), None)
+
+
+def fields(value):
+    names = [name for klass in node_class(value).__mro__ for name in getattr(klass, '__slots__', ())]
+    return [(name, getattr(value, name, None)) for name in names] or sorted(vars(value).items())
+
+
+def walk(value):
+    """Every node in an AST, parents before children."""
+    if isinstance(value, list):
+        for item in value:
+            yield from walk(item)
+    elif node_class(value) is not None:
+        yield value
+        for _, field in fields(value):
+            yield from walk(field)
+
+
+def dump(value):
+    """An AST as nested tuples and lists, which compare equal if the trees are the same."""
+    if isinstance(value, list):
+        return [dump(item) for item in value]
+    if isinstance(value, Token):
+        return value.type, value.lexeme, value.literal, value.line
+    if node_class(value) is not None:
+        return (node_class(value).__name__, *[(name, dump(field)) for name, field in fields(value)])
+    return value
+
+
+def parse_tree(parser_class, source: str):
+    """What `parser_class` makes of `source`: its AST, or ParseError, and the errors it reported."""
+    errors = io.StringIO()
+    with redirect_stderr(errors):
+        parser = parser_class(TableScanner.from_text(source).scan_all())
+        try:
+            tree = dump(parser.parse())
+        except ParseError:
+            tree = ParseError
+    return tree, errors.getvalue()
+
+
+def expected(source: str) -> Result:
+    """What `run` should give for a program, going by its `// expect` comments."""
+    out, err, code = [], [], 0
+    for kind, text in EXPECT.findall(source):
+        if not kind:
+            out.append(text + '\n')
+        else:
+            err.append(text + '\n')
+            code = 70 if kind == 'runtime error' else max(code, 65)
+    return Result(code, ''.join(out), ''.join(err))
@@ -0,0 +1,42 @@
+import pytest
+from app.parser.arena import Arena
+from app.parser.parser import Parser
+from app.resolver.resolver import Resolver
+from app.scan_for.table_scanner import TableScanner
+from support import PROGRAMS, dump, lox, program
+
+# Programs the parser accepts, so both layouts have a whole AST to compare.
+PARSED = [name for name in PROGRAMS if not name.startswith(('err_parse', 'err_scan'))]
+
+
+def parse(source):
+    return Parser(TableScanner.from_text(source).scan_all())
+
+
+@pytest.mark.parametrize('name', PARSED)
+def test_views_match_the_object_ast(name):
+    source = program(name)
+    assert dump(Arena.parse(parse(source)).statements()) == dump(parse(source).parse())
+
+
+@pytest.mark.parametrize('name', PARSED)
+def test_resolutions_round_trip_through_views(name):
+    source = program(name)
+    arena, objects = Arena.parse(parse(source)).statements(), parse(source).parse()
+    Resolver().resolve_statements(arena)
+    Resolver().resolve_statements(objects)
+    assert dump(arena) == dump(objects)
+
+
+def test_views_of_one_node_are_equal():
+    arena = Arena.parse(parse('print a + b;'))
+    first, second = arena.statements()[0].expression, arena.statements()[0].expression
+    assert first is not second
+    assert first == second and hash(first) == hash(second)
+    assert first.left != first.right
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_run_matches_the_object_ast(name):
+    source = program(name)
+    assert lox('run', source, '--ast=arena') == lox('run', source)
@@ -0,0 +1,105 @@
+import hashlib
+import hmac
+import os
+import pickle
+import stat
+import pytest
+from app.cache import ProgramCache, CACHE_DIR, key_path
+from support import PROGRAMS, lox, program, run_file
+
+UNPICKLED = []
+
+
+class Planted:
+    """Records being unpickled, which a rejected cache entry must never be."""
+    def __reduce__(self):
+        return (UNPICKLED.append, ('unpickled',))
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache-home'))
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / 'script.lox'
+    path.write_text('print 1;\n')
+    return str(path)
+
+
+def plant(cache, data):
+    os.makedirs(os.path.dirname(cache.path), exist_ok=True)
+    with open(cache.path, 'wb') as file:
+        file.write(data)
+
+
+def test_store_then_load(script):
+    ProgramCache(script).store(['statements'])
+    assert ProgramCache(script).load() == ['statements']
+    assert os.path.basename(os.path.dirname(ProgramCache(script).path)) == CACHE_DIR
+
+
+def test_entry_for_another_source_is_a_miss(script, tmp_path):
+    other = tmp_path / 'other.lox'
+    other.write_text('print 2;\n')
+    ProgramCache(str(other)).store(['other'])
+    with open(ProgramCache(str(other)).path, 'rb') as file:
+        plant(ProgramCache(script), file.read())
+    assert ProgramCache(script).load() is None
+
+
+def test_entry_for_another_variant_is_a_miss(script):
+    ProgramCache(script, 'O0').store(['unoptimized'])
+    with open(ProgramCache(script, 'O0').path, 'rb') as file:
+        plant(ProgramCache(script, 'O1'), file.read())
+    assert ProgramCache(script, 'O1').load() is None
+    assert ProgramCache(script, 'O0').load() == ['unoptimized']
+
+
+def forged_signature(cache, payload):
+    """A signature made with everything that is public, but not the user's secret."""
+    message = f"{cache.key}\0{cache.variant}\0".encode() + payload
+    return hmac.new(b'\0' * 32, message, hashlib.sha256).hexdigest().encode('ascii')
+
+
+@pytest.mark.parametrize('header', [
+    lambda cache, payload: b'',
+    lambda cache, payload: b'garbage',
+    # The header of an entry written without a secret: the right key for the source.
+    lambda cache, payload: cache.key.encode('ascii'),
+    forged_signature,
+    # A genuine signature, but of another payload.
+    lambda cache, payload: cache.sign(pickle.dumps(['statements'])),
+])
+def test_unsigned_entry_is_not_unpickled(script, header):
+    cache = ProgramCache(script)
+    payload = pickle.dumps(Planted())
+    plant(cache, header(cache, payload) + b'\n' + payload)
+    UNPICKLED.clear()
+    assert cache.load() is None
+    assert UNPICKLED == []
+
+
+def test_key_is_private_and_kept_outside_the_script_directory(script, tmp_path):
+    cache = ProgramCache(script)
+    mode = os.stat(key_path()).st_mode
+    assert stat.S_IMODE(mode) & 0o077 == 0
+    assert not key_path().startswith(os.path.dirname(cache.path))
+
+
+def test_key_others_can_read_is_replaced(script):
+    cache = ProgramCache(script)
+    cache.store(['statements'])
+    os.chmod(key_path(), 0o644)
+    assert ProgramCache(script).load() is None
+    assert stat.S_IMODE(os.stat(key_path()).st_mode) & 0o077 == 0
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_cached_runs_match_uncached_runs(name, tmp_path):
+    path = tmp_path / 'program.lox'
+    path.write_text(program(name), encoding='utf-8')
+    uncached = lox('run', program(name), '--no-cache')
+    assert run_file(str(path), 'run') == uncached
+    assert run_file(str(path), 'run') == uncached
@@ -0,0 +1,65 @@
+import pytest
+from support import PROGRAMS, lox, program
+
+# Every engine but the tree walker, which the others must agree with.
+ENGINES = ['closure', 'vm', 'python', 'tiered']
+
+SNIPPETS = {
+    'closures': 'fun make() { var n = 0; fun f() { n = n + 1; return n; } return f; }\nvar f = make();\nf();\nprint f();\n',
+    'classes': 'class A { init(x) { this.x = x; } get() { return this.x; } }\nvar a = A(1);\na.x = a.get() + 1;\nprint a.x;\nprint a;\nprint A;\n',
+    'super': 'class A { m() { return "A"; } }\nclass B < A { m() { return "B" + super.m(); } }\nclass C < B {}\nprint C().m();\n',
+    'init': 'class A { init() { this.n = 1; return; } }\nvar a = A();\nprint a.init();\nprint a.init().n;\n',
+    'init returns a value': 'class A { init() { return 1; } }\n',
+    'bound methods': 'class A { init() { this.n = 2; } m() { return this.n; } }\nvar m = A().m;\nprint m();\nprint m;\n',
+    'undefined variable': 'print "before";\nprint missing;\n',
+    'undefined property': 'class A {}\nprint A().missing;\n',
+    'field on a non-instance': 'var x = 1;\nx.y = 2;\n',
+    'wrong arity': 'fun f(a, b) {}\nf(1);\n',
+    'calling a non-function': '"text"();\n',
+    'operand types': 'print 1 + "a";\n',
+    'error in a closure': 'fun f() { var s = "a"; fun g() { return -s; } return g; }\nf()();\n',
+    'error in a method': 'class A { m() { return this.nope; } }\nA().m();\n',
+    'inherit from a non-class': 'var A = 1;\nclass B < A {}\n',
+    'local changes type': 'fun f() { var a = 1; print a - 1; a = "s"; print a - 1; }\nf();\n',
+    'closure changes type': 'fun f() { var a = 1; fun g() { a = "s"; } print -a; g(); print -a; }\nf();\n',
+    'parameter types': 'fun f(a, b) { return a * b; }\nprint f(2, 3);\nprint f("2", 3);\n',
+    'global changes type': 'var n = 2;\nprint n < 3;\nn = nil;\nprint n < 3;\n',
+    'string arithmetic': 'var s = "a" + "b";\nprint s + "c";\nprint s / 2;\n',
+    'recursion within the stack': 'fun c(n) { if (n < 1) return 0; return c(n - 1) + 1; }\nprint c(50);\n',
+    'recursion in a comparison': 'fun c(n) { if (c(n + 1) < 1) return 0; return 1; }\nprint c(0);\n',
+    'recursion in a method': 'class A { m(n) { return this.m(n + 1); } }\nprint "start";\nA().m(0);\n',
+    'recursion in a closure': 'fun f() { fun g(n) { return g(n + 1) + 1; } return g; }\nf()(0);\n',
+}
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_programs_match_the_tree_walker(engine, name):
+    source = program(name)
+    assert lox('run', source, f'--engine={engine}') == lox('run', source, '--engine=tree')
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_unoptimized_programs_match_the_tree_walker(engine, name):
+    source = program(name)
+    assert lox('run', source, f'--engine={engine}', '-O0') == lox('run', source, '--engine=tree', '-O0')
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('name', SNIPPETS)
+def test_snippets_match_the_tree_walker(engine, name):
+    source = SNIPPETS[name]
+    assert lox('run', source, f'--engine={engine}') == lox('run', source, '--engine=tree')
+    assert lox('run', source, f'--engine={engine}', '--pipeline') == lox('run', source, '--engine=tree', '--pipeline')
+
+
+@pytest.mark.parametrize('engine', ['tree'] + ENGINES)
+@pytest.mark.parametrize('name', [name for name in SNIPPETS if name.startswith('recursion in')])
+def test_running_out_of_stack_reads_the_same_everywhere(engine, name):
+    result = lox('run', SNIPPETS[name], f'--engine={engine}')
+    assert (result.code, result.err) == (70, 'maximum recursion depth exceeded\n')
+
+
+def test_unknown_engine_is_rejected():
+    assert lox('run', 'print 1;', '--engine=jit') == (1, '', 'Unknown engine: jit\n')
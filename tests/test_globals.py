@@ -0,0 +1,32 @@
+import pytest
+from app.evaluation.evaluator import Evaluator
+from app.parser.parser import Parser
+from app.resolver.resolver import Resolver
+from app.scan_for.table_scanner import TableScanner
+from support import lox
+
+
+def resolved(source):
+    statements = Parser(TableScanner.from_text(source).scan_all()).parse()
+    Resolver().resolve_statements(statements)
+    return statements
+
+
+@pytest.mark.parametrize('source, result', [
+    ('var a = 1; print a; a = a + 1; print a; a', (0, '1\n2\n2\n', '')),
+    ('var g = 1; fun h() { return g; } g = 2; h()', (0, '2\n', '')),
+    ('print b;', (70, '', "[1] Undefined variable 'b'.\n")),
+    ('x = 1;', (70, '', "[1] Undefined variable 'x'.\n")),
+])
+def test_evaluate_finds_globals_without_the_resolver(source, result):
+    assert lox('evaluate', source) == result
+
+
+def test_one_ast_runs_in_evaluators_with_different_globals(capsys):
+    program = resolved('var a = "a"; var b = "b"; fun f() { return a + b; } print f();')
+    Evaluator().evaluate_statements(program)
+    # Here a and b get other slots than in the first evaluator.
+    evaluator = Evaluator()
+    evaluator.evaluate_statements(resolved('var b = 1; var c = 2;'))
+    evaluator.evaluate_statements(program)
+    assert capsys.readouterr().out == 'ab\nab\n'
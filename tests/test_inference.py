@@ -0,0 +1,96 @@
+import pytest
+from support import lox
+
+ENGINES = ['tree', 'closure', 'vm', 'python', 'tiered']
+
+# Programs whose operand types change where a careless proof would miss
+# it, each with what the interpreter printed before type inference.
+SNIPPETS = {
+    'reassigned': (
+        'fun f() {\n  var a = 1;\n  a = "s";\n  return a - 1;\n}\nprint f();\n',
+        (70, '', '[4] Operands must be numbers.\n'),
+    ),
+    'branch': (
+        'fun f(c) {\n  var a = 1;\n  if (c) a = "s";\n  return a * 2;\n}\nprint f(false);\nprint f(true);\n',
+        (70, '2\n', '[4] Operands must be numbers.\n'),
+    ),
+    'loop back edge': (
+        'fun f() {\n  var a = 1;\n  var i = 0;\n  while (i < 3) {\n    print a + 1;\n    a = "s";\n    i = i + 1;\n  }\n}\nf();\n',
+        (70, '2\n', '[5] Operands must be two numbers or two strings.\n'),
+    ),
+    'closure': (
+        'fun f() {\n  var a = 1;\n  fun g() { a = "s"; }\n  g();\n  return -a;\n}\nprint f();\n',
+        (70, '', '[5] Operand must be a number.\n'),
+    ),
+    'captured later': (
+        'fun f() {\n  var a = 2;\n  var b = a * a;\n  fun g() { a = nil; }\n  g();\n  print b;\n  return a < 3;\n}\nprint f();\n',
+        (70, '4\n', '[7] Operands must be numbers.\n'),
+    ),
+    'parameter': (
+        'fun f(a) {\n  var b = a;\n  return b - 1;\n}\nprint f(2);\nprint f("x");\n',
+        (70, '1\n', '[3] Operands must be numbers.\n'),
+    ),
+    'global': (
+        'var g = 1;\nfun f() {\n  var a = g;\n  return a + 1;\n}\nprint f();\ng = nil;\nprint f();\n',
+        (70, '2\n', '[4] Operands must be two numbers or two strings.\n'),
+    ),
+    'string plus number': (
+        'fun f() {\n  var a = "s";\n  var b = 1;\n  return a + b;\n}\nprint f();\n',
+        (70, '', '[4] Operands must be two numbers or two strings.\n'),
+    ),
+    'call result': (
+        'fun one() { return "1"; }\nfun f() {\n  var a = one();\n  return a - 1;\n}\nprint f();\n',
+        (70, '', '[4] Operands must be numbers.\n'),
+    ),
+    'nested block': (
+        'fun f() {\n  var a = 1;\n  { var a = "inner"; print a; }\n  { a = nil; }\n  return a / 2;\n}\nprint f();\n',
+        (70, 'inner\n', '[5] Operands must be numbers.\n'),
+    ),
+    'assignment expression': (
+        'fun f() {\n  var a = 1;\n  var b = (a = "s");\n  return a - 1;\n}\nprint f();\n',
+        (70, '', '[4] Operands must be numbers.\n'),
+    ),
+    'logical': (
+        'fun f(c) {\n  var a = 1;\n  c and (a = "s");\n  return a < 2;\n}\nprint f(false);\nprint f(true);\n',
+        (70, 'true\n', '[4] Operands must be numbers.\n'),
+    ),
+    'for loop': (
+        'fun f() {\n  var t = 0;\n  for (var i = 0; i < 3; i = i + 1) {\n    t = t + i;\n    if (i == 1) t = "x";\n  }\n  return t;\n}\nprint f();\n',
+        (70, '', '[4] Operands must be two numbers or two strings.\n'),
+    ),
+}
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('name', SNIPPETS)
+def test_runtime_errors_keep_their_checks(engine, name):
+    source, expected = SNIPPETS[name]
+    assert lox('run', source, f'--engine={engine}') == expected
+    assert lox('run', source, f'--engine={engine}', '-O0') == expected
+    assert lox('run', source, f'--engine={engine}', '--pipeline') == expected
+    assert lox('run', source, f'--engine={engine}', '--lazy') == expected
+
+
+@pytest.mark.parametrize('name', SNIPPETS)
+def test_report_proves_nothing_a_runtime_error_needs(name):
+    source, expected = SNIPPETS[name]
+    report = lox('types', source)
+    assert report.code == 0
+    line = expected[2][1:expected[2].index(']')]
+    assert not any(entry.startswith(f'[{line}]') for entry in report.out.splitlines()[:-1]), report.out
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_proven_division_still_checks_for_zero(engine):
+    source = 'fun f() {\n  var a = 1;\n  var b = 0;\n  return a / b;\n}\nprint f();\n'
+    assert lox('types', source).out.startswith("[4] '/' on numbers\n")
+    assert lox('run', source, f'--engine={engine}') == (70, '', '[4] Error: Division by zero.\n')
+
+
+def test_report_lists_proven_operators():
+    source = 'fun f() {\n  var a = 1;\n  var b = a * 2;\n  var s = "x";\n  return s + "y" + b;\n}\n'
+    assert lox('types', source) == (0, "[3] '*' on numbers\n[5] '+' on strings\nproved the operands of 2 of 3 checked operators\n", '')
+
+
+def test_report_fails_on_front_end_errors():
+    assert lox('types', 'fun f() { return; }\nreturn 1;\n') == (65, '', "[line 2] Error: Can't return from top-level code.\n")
@@ -0,0 +1,107 @@
+import pytest
+from app.inline_cache import MAX_ENTRIES
+from support import lox
+
+ENGINES = ['tree', 'closure', 'vm', 'python', 'tiered']
+
+INHERITANCE = '''
+class A { init() { this.x = 1; } m() { return this.x; } }
+class B < A { init() { this.y = 2; this.x = 3; } }
+class C < B {}
+fun f(o) { return o.x + o.m(); }
+var t = 0;
+for (var i = 0; i < 10; i = i + 1) { t = t + f(A()) + f(B()) + f(C()); }
+print t;
+'''
+
+# Sites that see more classes than a cache holds, and a field that comes
+# to hide a method a site has cached.
+SNIPPETS = {
+    'megamorphic': ''.join(f"class K{n} {{ init() {{ this.v = {n}; }} }}\n" for n in range(MAX_ENTRIES + 2))
+                   + "fun v(o) { return o.v; }\nvar t = 0;\nfor (var i = 0; i < 3; i = i + 1) {\n"
+                   + ''.join(f"  t = t + v(K{n}());\n" for n in range(MAX_ENTRIES + 2)) + "}\nprint t;\n",
+    'shadowing': '''
+class A { m() { return "method"; } }
+fun get(o) { return o.m; }
+var a = A();
+print get(a)();
+a.m = "field";
+print get(a);
+print get(A())();
+''',
+    'superclass methods': '''
+class A { m() { return "A"; } }
+class B < A {}
+class C < B { m() { return "C" + super.m(); } }
+fun call(o) { return o.m(); }
+for (var i = 0; i < 2; i = i + 1) { print call(A()); print call(B()); print call(C()); }
+''',
+    'undefined after a hit': '''
+class A { init() { this.x = 1; } }
+fun x(o) { return o.x; }
+print x(A());
+print x(A());
+class B {}
+print x(B());
+''',
+    'not an instance after a hit': '''
+class A { init() { this.x = 1; } }
+fun x(o) { return o.x; }
+print x(A());
+print x("text");
+''',
+}
+
+
+@pytest.mark.parametrize('engine', ENGINES[1:])
+@pytest.mark.parametrize('name', SNIPPETS)
+def test_cached_sites_match_the_tree_walker(engine, name):
+    assert lox('run', SNIPPETS[name], f"--engine={engine}") == lox('run', SNIPPETS[name])
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_stats_report_every_site(engine):
+    assert lox('run', INHERITANCE, f"--engine={engine}", '--ic-stats') == (0, '140\n', '''\
+[2] set 'x': monomorphic, 9 hits, 1 misses
+[2] get 'x': polymorphic, 27 hits, 3 misses
+[3] set 'y': polymorphic, 18 hits, 2 misses
+[3] set 'x': polymorphic, 18 hits, 2 misses
+[5] get 'x': polymorphic, 27 hits, 3 misses
+[5] get 'm': polymorphic, 27 hits, 3 misses
+126 of 140 property accesses hit the inline cache (90.0%) at 6 sites
+''')
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_sites_past_their_limit_go_megamorphic(engine):
+    result = lox('run', SNIPPETS['megamorphic'], f"--engine={engine}", '--ic-stats')
+    assert result.out == lox('run', SNIPPETS['megamorphic']).out
+    site = next(line for line in result.err.splitlines() if "get 'v'" in line)
+    assert site == f"[{MAX_ENTRIES + 3}] get 'v': megamorphic, {2 * MAX_ENTRIES} hits, {MAX_ENTRIES + 2 + 2 * 2} misses"
+
+
+def test_stats_are_reported_after_a_runtime_error():
+    result = lox('run', SNIPPETS['undefined after a hit'], '--ic-stats')
+    assert result.code == 70
+    assert result.err.splitlines()[0] == "[3] Undefined property 'x'."
+    assert result.err.splitlines()[1:] == [
+        "[2] set 'x': monomorphic, 1 hits, 1 misses",
+        "[3] get 'x': monomorphic, 1 hits, 2 misses",
+        "2 of 5 property accesses hit the inline cache (40.0%) at 2 sites",
+    ]
+
+
+def test_instances_with_their_fields_in_a_dict_are_never_cached():
+    sets = ''.join(f"this.f{number} = {number}; " for number in range(65))
+    source = f"class A {{ init() {{ {sets}}} }}\nfun f(o) {{ return o.f0; }}\nprint f(A());\nprint f(A());\n"
+    result = lox('run', source, '--ic-stats')
+    assert result.out == '0\n0\n'
+    assert "[2] get 'f0': uncached, 0 hits, 2 misses" in result.err.splitlines()
+
+
+def test_stats_leave_output_alone():
+    assert lox('run', INHERITANCE, '--ic-stats').out == lox('run', INHERITANCE).out
+
+
+def test_pipeline_rejects_stats():
+    assert lox('run', INHERITANCE, '--pipeline', '--ic-stats') == (1, '', 'Usage: --pipeline cannot be combined with --ic-stats.\n')
@@ -0,0 +1,33 @@
+import pytest
+from support import PROGRAMS, lox, program
+
+BROKEN_BODY = 'fun f() {\n  print (1;\n}\nprint "before";\nf();\nprint "after";\n'
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_run_matches_eager_parsing_for_programs_that_check(name):
+    source = program(name)
+    if lox('check', source).code == 0:
+        assert lox('run', source, '--lazy') == lox('run', source)
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_check_fails_where_run_reports_a_front_end_error(name):
+    source = program(name)
+    eager = lox('run', source)
+    check = lox('check', source, '--lazy')
+    assert check.out == ''
+    if eager.code == 65:
+        assert check == (65, '', eager.err)
+
+
+def test_errors_in_a_body_are_reported_on_its_first_call():
+    assert lox('run', BROKEN_BODY, '--lazy') == (65, 'before\n', "[line 2] Error at ';': Expect ')' after expression\n")
+    assert lox('run', BROKEN_BODY) == (65, '', "[line 2] Error at ';': Expect ')' after expression\n")
+    assert lox('check', BROKEN_BODY, '--lazy') == lox('run', BROKEN_BODY)
+
+
+def test_check_fails_on_errors_the_parser_recovers_from():
+    source = 'fun f() {}\nf(' + ', '.join(['1'] * 256) + ');\n'
+    assert lox('check', source) == (65, '', "[line 2] Error at '1': Can't have more than 255 arguments.\n")
+    assert lox('check', 'print 1;\n') == (0, '', '')
@@ -0,0 +1,41 @@
+import pytest
+from support import PROGRAMS, lox, program
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_optimized_runs_match_unoptimized_runs(name):
+    source = program(name)
+    assert lox('run', source, '-O1') == lox('run', source, '-O0')
+    assert lox('run', source) == lox('run', source, '-O0')
+
+
+@pytest.mark.parametrize('source, dumped', [
+    ('print 1 + 2 * 3;', '(print 7.0)'),
+    ('print "x" + "y";', '(print xy)'),
+    ('print (1 < 2) and "ok";', '(print ok)'),
+    ('if (false) print 1; else print 2;', '(print 2.0)'),
+    ('while (false) print 1;\nprint !nil;', '(print true)'),
+])
+def test_dump_ast_shows_constants_folded(source, dumped):
+    assert lox('run', source, '--dump-ast') == (0, dumped + '\n', '')
+    assert lox('run', source, '--dump-ast', '-O0').out != dumped + '\n'
+
+
+def test_expressions_that_would_raise_are_left_to_raise():
+    assert lox('run', 'print -"a";', '--dump-ast') == (0, '(print (- a))\n', '')
+    assert lox('run', 'print -"a";') == lox('run', 'print -"a";', '-O0')
+    assert lox('run', 'print -"a";').code == 70
+
+
+def test_dead_code_is_still_checked():
+    source = 'if (false) { var a = a; }\nprint 1;\n'
+    assert lox('run', source) == lox('run', source, '-O0')
+    assert lox('run', source).code == 65
+
+
+def test_unknown_level_is_rejected():
+    assert lox('run', 'print 1;', '-O7') == (1, '', 'Unknown optimization level: -O7\n')
+
+
+def test_pipeline_rejects_optimizer_options():
+    assert lox('run', 'print 1;', '--pipeline', '-O1', '--dump-ast') == (1, '', 'Usage: --pipeline cannot be combined with -O1, --dump-ast.\n')
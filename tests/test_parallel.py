@@ -0,0 +1,50 @@
+import sys
+import pytest
+import app.scan_for.parallel as parallel
+from app.scan_for.parallel import ParallelScanner
+from app.scan_for.table_scanner import TableScanner
+from support import PROGRAMS, SOURCES, lox, program
+
+SOURCE = ''.join(f'var name{n % 7} = "text {n}" + other; // line {n}\nfun f{n}() {{ return this; }}\n'
+                 for n in range(200))
+
+
+@pytest.fixture
+def big(tmp_path, monkeypatch):
+    """A source with errors and strings across lines, split into several chunks."""
+    path = tmp_path / 'big.lox'
+    path.write_text(SOURCE + ''.join(SOURCES.values()) + '\n' + SOURCE)
+    monkeypatch.setattr(parallel, 'MIN_CHUNK_SIZE', 256)
+    return str(path)
+
+
+def test_jobs_match_the_serial_scanner_and_intern_names(big, capfd):
+    scanner = ParallelScanner(big, 4)
+    tokens = scanner.scan_all()
+    errors = capfd.readouterr().err
+    serial = TableScanner(big)
+    assert [str(token) for token in tokens] == [str(token) for token in serial.scan_all()]
+    assert errors == capfd.readouterr().err
+    assert scanner.has_error and serial.has_error
+    for token in tokens:
+        if token.type == 'IDENTIFIER' or token.lexeme in scanner.keywords:
+            assert token.lexeme is sys.intern(token.lexeme)
+
+
+def test_rendered_tokens_match_the_serial_scanner(big, capfd):
+    rendered = ''.join(ParallelScanner(big, 4).render_all())
+    errors = capfd.readouterr().err
+    assert rendered == ''.join(f"{token}\n" for token in TableScanner(big).scan_all())
+    assert errors == capfd.readouterr().err
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_run_matches_the_serial_scanner(name):
+    source = program(name)
+    assert lox('run', source, '--jobs=2') == lox('run', source)
+
+
+@pytest.mark.parametrize('jobs', ['abc', '-1', '1.5', '²'])
+def test_jobs_must_be_a_number(jobs):
+    assert lox('tokenize', 'print 1;', f'--jobs={jobs}') == \
+        (1, '', f"Usage: --jobs takes a number of processes, not '{jobs}'.\n")
@@ -0,0 +1,45 @@
+import pytest
+from support import PROGRAMS, lox, program
+
+# Each mixes errors of several kinds; the batch front end reports only the first kind.
+MIXED_ERRORS = [
+    'print 1;\nreturn 1;\nprint @;\n',
+    'print 1;\nprint (2;\nreturn 3;\n',
+    'print 1;\n{ var a = a; }\nprint -"x";\n',
+    'print 1;\nprint -"x";\nprint (2;\n',
+]
+
+
+def assert_matches_batch(source, *options):
+    pipelined, batch = lox('run', source, '--pipeline', *options), lox('run', source, *options)
+    assert (pipelined.code, pipelined.err) == (batch.code, batch.err)
+    # Declarations that ran before an error was found keep their output.
+    if batch.code != 65:
+        assert pipelined.out == batch.out
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_run_matches_the_batch_pipeline(name):
+    assert_matches_batch(program(name))
+
+
+@pytest.mark.parametrize('source', MIXED_ERRORS)
+@pytest.mark.parametrize('parser', ['descent', 'pratt', 'stack'])
+def test_diagnostics_match_the_batch_pipeline(source, parser):
+    assert_matches_batch(source, f'--parser={parser}')
+
+
+def test_declarations_run_as_they_are_read():
+    assert lox('run', MIXED_ERRORS[2], '--pipeline').out == '1\n'
+
+
+@pytest.mark.parametrize('option', ['--scanner=legacy', '--jobs=2', '--ast=arena'])
+def test_options_it_would_ignore_are_rejected(option):
+    name = option.partition('=')[0]
+    assert lox('run', 'print 1;', '--pipeline', option) == \
+        (1, '', f"Usage: --pipeline cannot be combined with {name}.\n")
+
+
+@pytest.mark.parametrize('command', ['run', 'tokenize', 'check'])
+def test_unknown_options_are_rejected(command):
+    assert lox(command, 'print 1;', '--pipline') == (1, '', 'Unknown option: --pipline\n')
@@ -0,0 +1,22 @@
+import pytest
+from app.parser.parser import Parser
+from app.parser.pratt import PrattParser
+from support import EXPRESSIONS, PROGRAMS, lox, parse_tree, program
+
+
+@pytest.mark.parametrize('source', [*EXPRESSIONS, *(f'print {expression};' for expression in EXPRESSIONS),
+                                    *map(program, PROGRAMS)])
+def test_ast_and_errors_match_the_descent_parser(source):
+    assert parse_tree(PrattParser, source) == parse_tree(Parser, source)
+
+
+@pytest.mark.parametrize('source', EXPRESSIONS)
+def test_parse_errors_match_the_descent_parser(source):
+    pratt, descent = lox('parse', source, '--parser=pratt'), lox('parse', source)
+    assert (pratt.code, pratt.err) == (descent.code, descent.err)
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_run_matches_the_descent_parser(name):
+    source = program(name)
+    assert lox('run', source, '--parser=pratt') == lox('run', source)
@@ -0,0 +1,8 @@
+import pytest
+from support import PROGRAMS, expected, lox, program
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_program(name):
+    source = program(name)
+    assert lox('run', source) == expected(source)
@@ -0,0 +1,63 @@
+import contextlib
+import io
+import pytest
+from app.evaluation.evaluator import Evaluator
+from app.evaluation import quickening
+from app.parser.ast import Binary, Logical, Unary
+from app.parser.parser import Parser
+from app.resolver.resolver import Resolver
+from app.scan_for.table_scanner import TableScanner
+from support import lox, walk
+
+
+def run(source):
+    """Runs `source` on the tree walker; returns its output and the classes its operator nodes ended up as."""
+    statements = Parser(TableScanner.from_text(source).scan_all()).parse()
+    Resolver().resolve_statements(statements)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        try:
+            Evaluator().evaluate_statements(statements)
+        except RuntimeError as error:
+            out.write(f"error: {error}\n")
+    nodes = [node for node in walk(statements) if isinstance(node, (Binary, Unary, Logical))]
+    return out.getvalue(), [type(node).__name__ for node in nodes]
+
+
+@pytest.mark.parametrize('source, output, classes', [
+    ('fun f(a, b) { return a + b; }\nprint f(1, 2);\n', '3\n', ['FloatAdd']),
+    ('fun f(a, b) { return a + b; }\nprint f("a", "b");\n', 'ab\n', ['StringConcat']),
+    ('fun f(a, b) { return a + b; }\nprint f(1, 2);\nprint f("a", "b");\nprint f(3, 4);\n', '3\nab\n7\n', ['GenericBinary']),
+    ('fun f(a, b) { return a < b; }\nprint f(1, 2);\nprint f(1, "a");\n', 'true\nerror: [1] Operands must be numbers.\n', ['GenericBinary']),
+    ('fun f(x) { return -x; }\nprint f(1);\nprint f("a");\n', '-1\nerror: [1] Operand must be a number.\n', ['GenericUnary']),
+    ('fun f(a, b) { return a == b; }\nprint f(1, 1);\nprint f("a", nil);\n', 'true\nfalse\n', ['Equal']),
+    ('fun f(a) { return !a; }\nprint f(nil);\nprint f(0);\n', 'true\nfalse\n', ['Not']),
+    ('fun f(a, b) { return a or b; }\nprint f(nil, 1);\nprint f("x", 1);\n', '1\nx\n', ['Or']),
+])
+def test_nodes_specialize_and_fall_back_when_a_guard_fails(source, output, classes):
+    assert run(source) == (output, classes)
+
+
+def test_unrun_nodes_stay_as_parsed():
+    assert run('if (false) print 1 + 2;\n') == ('', ['Binary'])
+
+
+def test_forms_add_no_fields_to_the_node_they_rewrite():
+    for name in dir(quickening):
+        form = getattr(quickening, name)
+        if isinstance(form, type) and form not in (Binary, Unary, Logical) and issubclass(form, (Binary, Unary, Logical)):
+            assert form.__slots__ == ()
+
+
+def test_quickened_programs_match_other_engines():
+    source = '''
+fun add(a, b) { return a + b; }
+for (var i = 0; i < 6; i = i + 1) {
+  var v = i;
+  if (i > 2) v = "s";
+  print add(v, v);
+}
+print add(1, nil);
+'''
+    assert lox('run', source) == lox('run', source, '--engine=closure')
+    assert lox('run', source).code == 70
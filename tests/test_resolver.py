@@ -0,0 +1,62 @@
+from app.environment import LOCAL, CELL, UPVALUE
+from app.parser.ast import Function, Variable
+from app.parser.parser import Parser
+from app.resolver.resolver import Resolver
+from app.scan_for.table_scanner import TableScanner
+from support import walk
+
+SOURCE = '''
+var g = 0;
+fun f(p, q) {
+  var a = p;
+  {
+    var b = q;
+    var c = a;
+    print g + p + a + b + c;
+  }
+}
+'''
+
+
+def resolutions(source):
+    """The name, access and slot of every variable read in `source`, in order."""
+    statements = resolve(source)
+    return [(node.name.lexeme, node.access, node.slot) for node in walk(statements) if isinstance(node, Variable)]
+
+
+def resolve(source):
+    statements = Parser(TableScanner.from_text(source).scan_all()).parse()
+    Resolver().resolve_statements(statements)
+    return statements
+
+
+def test_locals_resolve_to_frame_slots():
+    assert resolutions(SOURCE) == [
+        # Blocks share their function's frame, so the block's locals take
+        # the next slots after the function's own.
+        ('p', LOCAL, 0),
+        ('q', LOCAL, 1),
+        ('a', LOCAL, 2),
+        # Globals are left unresolved.
+        ('g', None, None),
+        ('p', LOCAL, 0),
+        ('a', LOCAL, 2),
+        ('b', LOCAL, 3),
+        ('c', LOCAL, 4),
+    ]
+
+
+def test_captured_variables_are_cells_and_upvalues():
+    source = 'fun f(p) {\n  {\n    var b = p;\n    fun g() { return b; }\n    print b;\n  }\n}\n'
+    assert resolutions(source) == [('p', LOCAL, 0), ('b', UPVALUE, 0), ('b', CELL, 1)]
+    assert [(node.name.lexeme, node.size, node.upvalues) for node in walk(resolve(source)) if isinstance(node, Function)] == [
+        ('f', 3, ()),
+        ('g', 0, ((True, 1),)),
+    ]
+
+
+def test_upvalues_are_threaded_through_enclosing_closures():
+    source = 'fun o() { var x = 1; fun m() { fun i() { return x; } return i; } return m; }'
+    assert resolutions(source) == [('x', UPVALUE, 0), ('i', CELL, 0), ('m', CELL, 1)]
+    # m captures o's cell in slot 0, and i captures m's first upvalue.
+    assert [node.upvalues for node in walk(resolve(source)) if isinstance(node, Function)] == [(), ((True, 0),), ((False, 0),)]
@@ -0,0 +1,124 @@
+import contextlib
+import io
+import pytest
+from app.evaluation.evaluator import Evaluator
+from app.lox_class import LoxClass
+from app.lox_instance import LoxInstance, MAX_FIELDS, MAX_SHAPES
+from app.parser.ast import Get, Set
+from app.parser.parser import Parser
+from app.resolver.resolver import Resolver
+from app.scan_for.table_scanner import TableScanner
+from support import lox, walk
+
+ENGINES = ['closure', 'vm', 'python', 'tiered']
+
+
+def instance(klass, *names):
+    value = LoxInstance(klass)
+    for number, name in enumerate(names):
+        value.set_field(name, number)
+    return value
+
+
+def run(source):
+    """Runs `source` on the tree walker; returns its output and its Get and Set nodes, in order."""
+    statements = Parser(TableScanner.from_text(source).scan_all()).parse()
+    Resolver().resolve_statements(statements)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        Evaluator().evaluate_statements(statements)
+    return out.getvalue(), [node for node in walk(statements) if isinstance(node, (Get, Set))]
+
+
+def test_instances_given_the_same_fields_in_order_share_a_shape():
+    klass = LoxClass('A', None, {})
+    first, second = instance(klass, 'x', 'y'), instance(klass, 'x', 'y')
+    assert first.shape is second.shape
+    assert first.shape.index == {'x': 0, 'y': 1}
+    assert first.values == [0, 1]
+    assert instance(klass, 'y', 'x').shape is not first.shape
+    assert first.shape.root is klass.shape
+    assert klass.shape.count == 5
+
+
+def test_instances_with_too_many_fields_keep_them_in_a_dict():
+    klass = LoxClass('A', None, {})
+    names = [f"f{number}" for number in range(MAX_FIELDS + 1)]
+    value = instance(klass, *names)
+    assert value.shape is None
+    assert value.values == {name: number for number, name in enumerate(names)}
+
+
+def test_a_class_with_too_many_shapes_gives_new_layouts_a_dict():
+    klass = LoxClass('A', None, {})
+    values = [instance(klass, f"f{number}") for number in range(MAX_SHAPES)]
+    assert [value.shape is None for value in values[-2:]] == [False, True]
+    assert values[-1].values == {f"f{MAX_SHAPES - 1}": 0}
+    # Layouts that already exist are still shared.
+    assert instance(klass, 'f0').shape is values[0].shape
+
+
+def test_get_sites_remember_the_slot_of_the_last_shape_they_read():
+    out, nodes = run('class A {}\nvar a = A();\na.x = 1;\na.y = 2;\nprint a.y;\n')
+    get_y = [node for node in nodes if isinstance(node, Get)][0]
+    assert out == '2\n'
+    assert get_y.shape.index == {'x': 0, 'y': 1}
+    assert get_y.slot == 1
+
+
+def test_set_sites_remember_additions_and_writes():
+    source = 'class A {}\nfun put(a, v) { a.x = v; }\nvar a = A();\nput(a, 1);\nput(a, 2);\nprint a.x;\n'
+    out, nodes = run(source)
+    put = [node for node in nodes if isinstance(node, Set)][0]
+    assert out == '2\n'
+    assert put.before.index == {}
+    assert put.after.index == {'x': 0}
+    assert put.shape is put.after
+    assert put.slot == 0
+
+
+def test_sites_not_yet_run_remember_nothing():
+    _, nodes = run('class A {}\nvar a = A();\nif (false) { a.x = 1; print a.x; }\n')
+    assert [(node.shape, node.slot) for node in nodes] == [((), ()), ((), ())]
+
+
+def test_methods_leave_get_sites_remembering_nothing():
+    _, nodes = run('class A { m() { return 1; } }\nprint A().m();\n')
+    assert [(node.shape, node.slot) for node in nodes] == [((), ())]
+
+
+def many_fields(count):
+    """A program whose instances get `count` fields, read back through one site."""
+    sets = ''.join(f"  a.f{number} = {number};\n" for number in range(count))
+    return (f"class A {{}}\nfun make() {{\n  var a = A();\n{sets}  return a;\n}}\n"
+            f"fun last(a) {{ return a.f{count - 1} + a.f0; }}\n"
+            f"var small = A();\nsmall.f{count - 1} = 1;\nsmall.f0 = 2;\n"
+            f"print last(small);\nprint last(make());\nprint last(small);\nprint last(make());\n"
+            f"var a = make();\na.f0 = \"s\";\nprint a.f0;\nprint last(a);\n")
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('count', [MAX_FIELDS, MAX_FIELDS + 1])
+def test_instances_that_fall_back_to_a_dict_run_the_same_everywhere(engine, count):
+    source = many_fields(count)
+    expected = lox('run', source)
+    assert expected.out == f"3\n{count - 1}\n3\n{count - 1}\ns\n"
+    assert "Operands must be two numbers or two strings." in expected.err
+    assert lox('run', source, f"--engine={engine}") == expected
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_classes_out_of_shapes_run_the_same_everywhere(engine):
+    adds = ''.join(f"  if (n == {number}) a.g{number} = n;\n" for number in range(MAX_SHAPES + 4))
+    source = (f"class A {{}}\nfun make(n) {{\n  var a = A();\n  a.x = n;\n{adds}  return a;\n}}\n"
+              f"var total = 0;\nfor (var n = 0; n < {MAX_SHAPES + 4}; n = n + 1) {{\n"
+              f"  var a = make(n);\n  a.y = n;\n  total = total + a.x + a.y;\n}}\nprint total;\n")
+    expected = lox('run', source)
+    assert expected.out == f"{(MAX_SHAPES + 3) * (MAX_SHAPES + 4)}\n"
+    assert lox('run', source, f"--engine={engine}") == expected
+
+
+def test_sites_in_an_arena_remember_slots_too():
+    source = ('class A {}\nfun f(a) { a.x = a.x + 1; return a.x; }\nvar a = A();\na.x = 0;\n'
+              'var b = A();\nb.y = 0;\nb.x = 10;\nprint f(a);\nprint f(b);\nprint f(a);\n')
+    assert lox('run', source, '--ast=arena') == lox('run', source) == (0, '1\n11\n2\n', '')
@@ -0,0 +1,39 @@
+import io
+import pytest
+from app.parser.parser import Parser
+from app.parser.printer import write_ast
+from app.parser.stack_parser import StackParser
+from app.scan_for.table_scanner import TableScanner
+from support import EXPRESSIONS, PROGRAMS, lox, parse_tree, program
+
+DEPTH = 5000
+
+
+@pytest.mark.parametrize('source', [*EXPRESSIONS, *(f'print {expression};' for expression in EXPRESSIONS),
+                                    *map(program, PROGRAMS)])
+def test_ast_and_errors_match_the_descent_parser(source):
+    assert parse_tree(StackParser, source) == parse_tree(Parser, source)
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_run_matches_the_descent_parser(name):
+    source = program(name)
+    assert lox('run', source, '--parser=stack') == lox('run', source)
+
+
+@pytest.mark.parametrize('source', ['(1 + 2) * -3 / !true == "s" != nil >= 4.5', '((("a")))', '-!-!1'])
+def test_printer_matches_repr(source):
+    statement = StackParser(TableScanner.from_text(source).scan_all()).parse()[0]
+    out = io.StringIO()
+    write_ast(statement, out)
+    assert out.getvalue() == str(statement)
+
+
+@pytest.mark.parametrize('source, printed', [
+    ('(' * DEPTH + '1' + ')' * DEPTH, '(group ' * DEPTH + '1.0' + ')' * DEPTH),
+    ('-' * DEPTH + '1', '(- ' * DEPTH + '1.0' + ')' * DEPTH),
+    ('1' + ' + 1' * DEPTH, '(+ ' * DEPTH + '1.0' + ' 1.0)' * DEPTH),
+])
+def test_nesting_deeper_than_the_recursion_limit(source, printed):
+    assert lox('parse', source, '--parser=stack') == (0, printed + '\n', '')
+
@@ -0,0 +1,38 @@
+import pytest
+from app.scan_for.streaming import StreamingScanner, mapped_chunks
+from app.scan_for.table_scanner import TableScanner
+from support import PROGRAMS, SOURCES, lox, program
+
+
+@pytest.mark.parametrize('source', [*SOURCES.values(), *map(program, PROGRAMS)],
+                         ids=[*SOURCES, *PROGRAMS])
+def test_tokens_match_the_batch_scanner(source):
+    assert lox('tokenize', source, '--stream') == lox('tokenize', source)
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_run_matches_the_batch_front_end(name):
+    source = program(name)
+    assert lox('run', source, '--stream') == lox('run', source)
+
+
+@pytest.mark.parametrize('source', [
+    'print 1 +;\nprint @;\n',
+    'print (1;\n"unterminated\n',
+    'var a = 1;\nprint a b;\n',
+])
+def test_lexical_errors_win_over_syntax_errors(source):
+    assert lox('parse', source, '--stream') == lox('parse', source)
+    assert lox('run', source, '--stream') == lox('run', source)
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64])
+def test_chunk_boundaries_do_not_change_the_tokens(tmp_path, capsys, size):
+    path = tmp_path / 'chunks.lox'
+    path.write_bytes(''.join(SOURCES.values()).encode())
+    batch = [str(token) for token in TableScanner(str(path)).scan_all()]
+    batch_errors = capsys.readouterr().err
+    scanner = StreamingScanner(str(path))
+    scanner.chunks = lambda: mapped_chunks(str(path), size)
+    assert [str(token) for token in scanner.iter_tokens()] == batch
+    assert capsys.readouterr().err == batch_errors
@@ -0,0 +1,12 @@
+import pytest
+from support import PROGRAMS, SOURCES, lox, program
+
+
+@pytest.mark.parametrize('source', [*SOURCES.values(), *map(program, PROGRAMS)],
+                         ids=[*SOURCES, *PROGRAMS])
+def test_tokens_match_the_legacy_scanner(source):
+    assert lox('tokenize', source) == lox('tokenize', source, '--scanner=legacy')
+
+
+def test_unknown_scanner_is_a_usage_error():
+    assert lox('tokenize', 'print 1;', '--scanner=fast') == (1, '', 'Unknown scanner: fast\n')
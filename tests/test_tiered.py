@@ -0,0 +1,41 @@
+from support import lox, program
+
+
+def nested_loops(depth):
+    """A function whose innermost loop gets hot under more nested loops than Python compiles."""
+    source = 'fun deep() {\n  var n = 0;\n'
+    for level in range(depth):
+        source += f'  var i{level} = 0;\n  while (i{level} < 1) {{ i{level} = i{level} + 1;\n'
+    source += '  var j = 0; while (j < 1200) { j = j + 1; n = n + 1; }\n'
+    return source + '}\n' * depth + '  return n;\n}\nprint deep();\nprint deep();\n'
+
+
+def test_hot_functions_and_loops_are_compiled():
+    result = lox('run', program('tiers'), '--engine=tiered', '--trace-tiers')
+    assert result.out == lox('run', program('tiers')).out
+    assert result.err == (
+        "[tier] compiled 'add' (line 1) after 100 calls\n"
+        "[tier] compiled a loop in 'find' (line 6) after 1000 iterations\n"
+        "[1] Operands must be two numbers or two strings.\n"
+    )
+
+
+def test_tracing_is_off_by_default():
+    assert lox('run', program('tiers'), '--engine=tiered') == lox('run', program('tiers'))
+
+
+def test_code_python_will_not_compile_stays_interpreted():
+    source = nested_loops(25)
+    result = lox('run', source, '--engine=tiered', '--trace-tiers')
+    assert result.out == lox('run', source).out == '1200\n1200\n'
+    assert "[tier] 'deep' (line 1) stays interpreted: SyntaxError" in result.err
+
+
+def test_shallow_nesting_compiles_the_whole_function():
+    source = nested_loops(2).replace('print deep();\n', 'print deep();\n' * 2)
+    result = lox('run', source, '--engine=tiered', '--trace-tiers')
+    assert result.out == '1200\n' * 4
+    assert result.err == (
+        "[tier] compiled a loop in 'deep' (line 1) after 1000 iterations\n"
+        "[tier] compiled 'deep' (line 1) after 1002 loop iterations\n"
+    )
@@ -0,0 +1,47 @@
+import sys
+from app.scan_for.table_scanner import TableScanner
+from app.scan_for.tokens import Token, TokenTypes
+from support import lox
+
+SOURCE = 'var name = 1.5 + name; print "s" and nil; // c\n'
+
+
+def test_tokenize_output_is_unchanged():
+    assert lox('tokenize', SOURCE) == (0, '''\
+VAR var null
+IDENTIFIER name null
+EQUAL = null
+NUMBER 1.5 1.5
+PLUS + null
+IDENTIFIER name null
+SEMICOLON ; null
+PRINT print null
+STRING "s" s
+AND and null
+NIL nil null
+SEMICOLON ; null
+EOF  null
+''', '')
+
+
+def test_kinds_round_trip_to_type_names():
+    for name in TokenTypes:
+        token = Token(name, '', None, 1)
+        assert isinstance(token.kind, int)
+        assert token.type == name
+
+
+def test_tokens_have_no_instance_dict(tmp_path):
+    path = tmp_path / 'tokens.lox'
+    path.write_text(SOURCE)
+    for token in TableScanner(str(path)).scan_all():
+        assert not hasattr(token, '__dict__')
+
+
+def test_names_are_interned(tmp_path):
+    path = tmp_path / 'names.lox'
+    path.write_text(SOURCE)
+    names = [token.lexeme for token in TableScanner(str(path)).scan_all() if token.type in ('IDENTIFIER', 'VAR', 'AND')]
+    assert names[1] is names[2]
+    for name in names:
+        assert name is sys.intern(name)
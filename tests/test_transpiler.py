@@ -0,0 +1,23 @@
+import pytest
+from support import PROGRAMS, lox, program
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_emitted_source_compiles(name):
+    source = program(name)
+    emitted = lox('run', source, '--emit-py')
+    if lox('run', source).code == 65:
+        assert emitted == lox('run', source)
+    else:
+        assert emitted.code == 0
+        compile(emitted.out, f'<{name}>', 'exec')
+
+
+def test_known_operand_types_skip_their_checks():
+    emitted = lox('run', 'print 1 + 2 * 3;\nprint "x" + "y";\n', '--emit-py', '-O0').out
+    assert 'operands_error' not in emitted
+    assert 'operands_error' in lox('run', 'fun f(a) { return a - 1; }\n', '--emit-py').out
+
+
+def test_pipeline_rejects_emit_py():
+    assert lox('run', 'print 1;', '--pipeline', '--emit-py') == (1, '', 'Usage: --pipeline cannot be combined with --emit-py.\n')
@@ -0,0 +1,51 @@
+import pytest
+from support import PROGRAMS, lox, program
+
+SOURCE = 'fun add(a, b) { return a + b; }\nclass A { m() { return this; } }\nprint add(1, 2);\n'
+
+LISTING = '''\
+== script ==
+0000    1 CLOSURE              0 '<fn add>'
+0002    | DEFINE_GLOBAL        1 'add'
+0004    2 CLASS                1 '<class A>'
+0006    | DEFINE_GLOBAL        2 'A'
+0008    3 GET_GLOBAL           1 'add'
+0010    | CONSTANT             2 '1'
+0012    | CONSTANT             3 '2'
+0014    | CALL                 2
+0016    | PRINT
+0017    | NIL
+0018    | RETURN
+== add ==
+0000    1 GET_LOCAL            0
+0002    | GET_LOCAL            1
+0004    | ADD
+0005    | RETURN
+0006    | NIL
+0007    | RETURN
+== m ==
+0000    2 GET_LOCAL            0
+0002    | RETURN
+0003    | NIL
+0004    | RETURN
+'''
+
+
+def test_disassemble_lists_the_script_and_every_function():
+    assert lox('disassemble', SOURCE) == (0, LISTING, '')
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_disassemble_fails_where_run_reports_a_front_end_error(name):
+    source = program(name)
+    run = lox('run', source, '--engine=vm')
+    if run.code == 65:
+        assert lox('disassemble', source) == run
+    else:
+        assert lox('disassemble', source).code == 0
+
+
+def test_calls_deeper_than_the_tree_walker_can_go_complete():
+    source = 'fun c(n) { if (n < 1) return 0; return c(n - 1) + 1; }\nprint c(500);\n'
+    assert lox('run', source, '--engine=vm') == (0, '500\n', '')
+    assert lox('run', source, '--engine=tree') == (70, '', 'maximum recursion depth exceeded\n')
@@ -0,0 +1,69 @@
+import pytest
+from app.watch import Watcher
+from support import PROGRAMS, lox, program
+
+
+def edits(source):
+    """A program typed in half at a time, then with a line inserted and removed again."""
+    lines = source.splitlines(keepends=True)
+    middle = len(lines) // 2
+    return [
+        ''.join(lines[:middle]),
+        source,
+        ''.join(lines[:middle] + ['\n', 'var inserted = "line";\n'] + lines[middle:]),
+        source,
+    ]
+
+
+def reload(watcher, source, capsys):
+    watcher.reload(source)
+    out, err = capsys.readouterr()
+    return out, ''.join(line + '\n' for line in err.splitlines() if not line.startswith('[watch]'))
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_reloads_match_a_fresh_run(name, capsys):
+    watcher = Watcher('unused.lox')
+    for source in edits(program(name)):
+        fresh = lox('run', source)
+        assert reload(watcher, source, capsys) == (fresh.out, fresh.err)
+
+
+def test_errors_keep_the_last_good_program(capsys):
+    watcher = Watcher('unused.lox')
+    assert reload(watcher, 'print 1;\nprint 2;\n', capsys) == ('1\n2\n', '')
+    assert reload(watcher, 'print 1;\nprint (2;\n', capsys) == ('', "[line 2] Error at ';': Expect ')' after expression\n")
+    assert reload(watcher, 'print 1;\nreturn 2;\n', capsys) == ('', "[line 2] Error: Can't return from top-level code.\n")
+    assert len(watcher.units) == 2
+    assert reload(watcher, 'print 1;\nprint 3;\n', capsys) == ('1\n3\n', '')
+
+
+def test_only_changed_declarations_are_parsed_again(capsys):
+    watcher = Watcher('unused.lox')
+    watcher.reload('var a = 1;\nfun f() { return a; }\nprint f();\n')
+    watcher.reload('var a = 2;\nfun f() { return a; }\nprint f();\n')
+    out, err = capsys.readouterr()
+    assert out == '1\n2\n'
+    assert err.splitlines()[-1] == '[watch] re-parsed 1 of 3 declarations'
+
+
+def test_reloads_keep_property_sites_monomorphic(capsys):
+    source = '''
+class Point {
+  init(x, y) { this.x = x; this.y = y; }
+  sum() { return this.x + this.y; }
+}
+var total = 0;
+for (var i = 0; i < 10; i = i + 1) total = total + Point(i, 1).sum();
+print total;
+'''
+    watcher = Watcher('unused.lox')
+    for run in range(8):
+        # Only the last declaration changes, so the class and loop are reused.
+        watcher.reload(source + f"print {run};\n")
+    caches = watcher.evaluator.caches.caches
+    assert len(caches) == 5
+    for cache in caches:
+        assert cache.state == 'monomorphic', cache.describe()
+        assert cache.misses == 1, cache.describe()
+    assert capsys.readouterr().out.splitlines()[-2:] == ['55', '7']